@@ -0,0 +1,406 @@
+# src/api/leads/bulk_write.py
+"""
+Bulk Write (CSV upload job) path for very large lead imports, updates and upserts.
+
+Flow per job:
+    1. Stream the local CSV/JSONL into a zipped CSV (never held in memory), at most
+       `rows_per_job` rows per file.
+    2. Upload the zip (POST {upload_base}/crm/v8/upload, header feature: bulk-write).
+    3. Create the job (POST {api_base}/crm/bulk/v8/write) with field mappings and, for
+       upsert, the duplicate-check field (find_by).
+    4. Poll GET {api_base}/crm/bulk/v8/write/{job_id} until COMPLETED or FAILED.
+    5. Download the result zip and stream-parse it into a per-row report CSV.
+
+These calls go over plain HTTPS with the SDK's OAuth access token rather than through
+the SDK operations classes, so the base URLs can be pointed at a local stand-in
+server (src/tests/bulk_write_standin.py) that simulates the job lifecycle.
+"""
+import io
+import os
+import csv
+import json
+import time
+import uuid
+import zipfile
+import tempfile
+import urllib.error
+import urllib.request
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.initializer import Initializer
+
+# --- Local Imports ---
+from src.core.initialize import logger, PROJECT_ROOT
+from .common import MODULE
+
+# --- Configuration ---
+# Result row statuses that are not failures; SKIPPED rows were left alone on purpose
+# (e.g. no matching record for an update) and are reported separately
+OK_STATUSES = {"ADDED", "UPDATED"}
+SKIPPED_STATUS = "SKIPPED"
+DEFAULT_ROWS_PER_JOB = 25000 # Zoho's per-file record limit for Bulk Write
+DEFAULT_POLL_INTERVAL = 10.0 # seconds between job status checks
+DEFAULT_JOB_TIMEOUT = 6 * 3600
+CHUNK_SIZE = 1024 * 1024
+# Endpoints per data center, keyed like initialize._DC_MAP
+_BULK_ENDPOINTS = {
+    "com": ("https://www.zohoapis.com", "https://content.zohoapis.com", "https://download-accl.zoho.com"),
+    "eu": ("https://www.zohoapis.eu", "https://content.zohoapis.eu", "https://download-accl.zoho.eu"),
+    "in": ("https://www.zohoapis.in", "https://content.zohoapis.in", "https://download-accl.zoho.in"),
+    "com.cn": ("https://www.zohoapis.com.cn", "https://content.zohoapis.com.cn", "https://download-accl.zoho.com.cn"),
+    "com.au": ("https://www.zohoapis.com.au", "https://content.zohoapis.com.au", "https://download-accl.zoho.com.au"),
+}
+
+
+class BulkWriteError(RuntimeError):
+    """Raised when an upload, job creation, status check or download fails."""
+
+
+def default_endpoints():
+    """
+    Returns (api_base, upload_base, download_base). BULK_API_BASE / BULK_UPLOAD_BASE /
+    BULK_DOWNLOAD_BASE override them (e.g. to use the local stand-in server); otherwise
+    they follow the data center of ACCOUNTS_URL.
+    """
+    accounts_url = os.getenv("ACCOUNTS_URL", "https://accounts.zoho.com")
+    tld = accounts_url.split('//')[-1].split('/')[0].split('accounts.zoho.')[-1]
+    api_base, upload_base, download_base = _BULK_ENDPOINTS.get(tld, _BULK_ENDPOINTS["com"])
+    return (
+        os.getenv("BULK_API_BASE", api_base),
+        os.getenv("BULK_UPLOAD_BASE", upload_base),
+        os.getenv("BULK_DOWNLOAD_BASE", download_base),
+    )
+
+
+def sdk_access_token():
+    """Returns a current access token from the initialized SDK (refreshing it through the store if needed)."""
+    token = Initializer.get_initializer().token
+    token.generate_token()
+    return token.get_access_token()
+
+
+# --- Input Streaming ---
+def _jsonl_columns(path):
+    """Union of the keys of every object in a JSONL file, in first-seen order (one streaming pass)."""
+    columns = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                columns.update(dict.fromkeys(json.loads(line)))
+    return list(columns)
+
+
+def iter_input_rows(path):
+    """
+    Yields (columns, row dict) from a .csv or .jsonl file, one row at a time.
+    For JSONL, the columns are the keys found in any object (a first pass over the
+    file), so fields that only appear in later rows are not dropped.
+    """
+    if str(path).lower().endswith(".jsonl"):
+        columns = _jsonl_columns(path)
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield columns, json.loads(line)
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.fieldnames, row
+
+
+def write_zipped_chunks(path, work_dir, rows_per_job=DEFAULT_ROWS_PER_JOB):
+    """
+    Streams the input into zipped CSV files of at most rows_per_job rows.
+
+    Returns:
+        list: [(zip_path, columns, row_count), ...]
+    """
+    chunks = []
+    zf = writer = member = None
+    columns = None
+
+    def _close_chunk():
+        member.close()
+        zf.close()
+
+    for columns_seen, row in iter_input_rows(path):
+        if columns is None:
+            columns = list(columns_seen)
+        if writer is None or chunks[-1][2] >= rows_per_job:
+            if writer is not None:
+                _close_chunk()
+            zip_path = os.path.join(work_dir, f"bulk-write-{len(chunks) + 1:04d}.zip")
+            zf = zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED)
+            member = io.TextIOWrapper(zf.open(f"leads-{len(chunks) + 1:04d}.csv", "w", force_zip64=True),
+                                      encoding="utf-8", newline="")
+            writer = csv.DictWriter(member, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+            chunks.append([zip_path, columns, 0])
+        writer.writerow({c: ("" if row.get(c) is None else row.get(c)) for c in columns})
+        chunks[-1][2] += 1
+    if writer is not None:
+        _close_chunk()
+    return [tuple(c) for c in chunks]
+
+
+# --- REST Client ---
+class BulkWriteClient:
+    """
+    Minimal Bulk Write REST client.
+
+    Args:
+        org_id (str): Zoho CRM org id (X-CRM-ORG header for uploads).
+        token_provider: Callable returning an OAuth access token. Defaults to the SDK's token.
+        api_base, upload_base, download_base (str, optional): Override default_endpoints().
+    """
+
+    def __init__(self, org_id, token_provider=None, api_base=None, upload_base=None, download_base=None):
+        default_api, default_upload, default_download = default_endpoints()
+        self.org_id = str(org_id)
+        self.token_provider = token_provider or sdk_access_token
+        self.api_base = (api_base or default_api).rstrip("/")
+        self.upload_base = (upload_base or default_upload).rstrip("/")
+        self.download_base = (download_base or default_download).rstrip("/")
+
+    def _request(self, method, url, body=None, headers=None, content_length=None):
+        all_headers = {"Authorization": f"Zoho-oauthtoken {self.token_provider()}", **(headers or {})}
+        if content_length is not None:
+            all_headers["Content-Length"] = str(content_length)
+        request = urllib.request.Request(url, data=body, method=method, headers=all_headers)
+        try:
+            return urllib.request.urlopen(request, timeout=300)
+        except urllib.error.HTTPError as e:
+            raise BulkWriteError(f"{method} {url} failed (HTTP {e.code}): {e.read()[:500]!r}")
+        except urllib.error.URLError as e:
+            raise BulkWriteError(f"{method} {url} failed: {e.reason}")
+
+    def _json(self, method, url, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        with self._request(method, url, body, {"Content-Type": "application/json"} if body else None) as resp:
+            return json.loads(resp.read() or b"{}")
+
+    def upload(self, zip_path):
+        """Uploads a zip file (streamed as multipart/form-data). Returns the file_id."""
+        boundary = uuid.uuid4().hex
+        head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; "
+                f"filename=\"{os.path.basename(zip_path)}\"\r\nContent-Type: application/zip\r\n\r\n").encode("utf-8")
+        tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        length = len(head) + os.path.getsize(zip_path) + len(tail)
+
+        def _body():
+            yield head
+            with open(zip_path, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+            yield tail
+
+        headers = {
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "feature": "bulk-write",
+            "X-CRM-ORG": self.org_id,
+        }
+        with self._request("POST", f"{self.upload_base}/crm/v8/upload", _body(), headers, content_length=length) as resp:
+            result = json.loads(resp.read() or b"{}")
+        file_id = (result.get("details") or {}).get("file_id")
+        if result.get("status") != "success" or not file_id:
+            raise BulkWriteError(f"Upload of {zip_path} failed: {result}")
+        return file_id
+
+    def create_job(self, file_id, columns, operation, find_by=None, module=MODULE, ignore_empty=True):
+        """Creates a Bulk Write job for an uploaded file. Returns the job id."""
+        resource = {
+            'type': 'data',
+            'module': {'api_name': module},
+            'file_id': file_id,
+            'field_mappings': [{'api_name': c, 'index': i} for i, c in enumerate(columns)],
+        }
+        if find_by:
+            resource['find_by'] = find_by
+        payload = {'operation': operation, 'ignore_empty': ignore_empty, 'resource': [resource]}
+        result = self._json("POST", f"{self.api_base}/crm/bulk/v8/write", payload)
+        job_id = (result.get("details") or {}).get("id")
+        if result.get("status") != "success" or not job_id:
+            raise BulkWriteError(f"Bulk Write job creation failed: {result}")
+        return str(job_id)
+
+    def job_status(self, job_id):
+        return self._json("GET", f"{self.api_base}/crm/bulk/v8/write/{job_id}")
+
+    def download_result(self, download_url, dest_path):
+        """Streams the result zip to dest_path."""
+        url = download_url if download_url.startswith("http") else f"{self.download_base}{download_url}"
+        with self._request("GET", url) as resp, open(dest_path, "wb") as f:
+            while True:
+                chunk = resp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+
+
+def wait_for_jobs(client, job_ids, poll_interval=DEFAULT_POLL_INTERVAL, timeout=DEFAULT_JOB_TIMEOUT):
+    """
+    Polls all jobs until each is COMPLETED or FAILED.
+
+    Returns:
+        dict: {job_id: final status document}
+    """
+    deadline = time.monotonic() + timeout
+    done = {}
+    while len(done) < len(job_ids):
+        for job_id in job_ids:
+            if job_id in done:
+                continue
+            status = client.job_status(job_id)
+            state = str(status.get("status", "")).upper()
+            if state in ("COMPLETED", "FAILED"):
+                done[job_id] = status
+                print(f"  Job {job_id}: {state}")
+                logger.info(f"Bulk Write job {job_id} finished with status {state}: {status.get('resource')}")
+        if len(done) < len(job_ids):
+            if time.monotonic() > deadline:
+                raise BulkWriteError(f"Timed out waiting for Bulk Write jobs: {sorted(set(job_ids) - set(done))}")
+            time.sleep(poll_interval)
+    return done
+
+
+def _find_column(fieldnames, *candidates):
+    lookup = {(name or "").strip().upper(): name for name in fieldnames or []}
+    for candidate in candidates:
+        if candidate in lookup:
+            return lookup[candidate]
+    return None
+
+
+def write_result_report(result_zips, report_path):
+    """
+    Stream-parses result zips into one report CSV (job, row, status, record_id, errors).
+
+    Args:
+        result_zips (list): [(job_id, zip_path), ...] in input order.
+
+    Returns:
+        dict: Row counts per status (e.g. {"ADDED": 10, "UPDATED": 5, "SKIPPED": 1}).
+    """
+    counts = {}
+    with open(report_path, "w", encoding="utf-8", newline="") as out:
+        report = csv.writer(out)
+        report.writerow(["job_id", "row", "status", "record_id", "errors"])
+        for job_id, zip_path in result_zips:
+            with zipfile.ZipFile(zip_path) as zf:
+                for name in zf.namelist():
+                    if not name.lower().endswith(".csv"):
+                        continue
+                    with io.TextIOWrapper(zf.open(name), encoding="utf-8-sig", newline="") as member:
+                        reader = csv.DictReader(member)
+                        status_col = _find_column(reader.fieldnames, "STATUS")
+                        id_col = _find_column(reader.fieldnames, "RECORD_ID", "ID")
+                        errors_col = _find_column(reader.fieldnames, "ERRORS")
+                        for row_number, row in enumerate(reader, start=1):
+                            status = (row.get(status_col) or "UNKNOWN") if status_col else "UNKNOWN"
+                            counts[status] = counts.get(status, 0) + 1
+                            report.writerow([job_id, row_number, status,
+                                             row.get(id_col, "") if id_col else "",
+                                             row.get(errors_col, "") if errors_col else ""])
+    return counts
+
+
+def bulk_write_leads(input_path, operation="upsert", find_by=None, org_id=None, report_filename=None,
+                     rows_per_job=DEFAULT_ROWS_PER_JOB, poll_interval=DEFAULT_POLL_INTERVAL,
+                     timeout=DEFAULT_JOB_TIMEOUT, client=None):
+    """
+    Runs a complete Bulk Write import/update/upsert of a local CSV or JSONL file.
+
+    Args:
+        input_path (str): CSV (header = API field names) or JSONL file.
+        operation (str): "insert", "update" or "upsert".
+        find_by (str, optional): Duplicate-check field for upsert (e.g. "Email"); "id" for update.
+        org_id (str, optional): Zoho org id; defaults to ZOHO_ORG_ID from .env.
+        report_filename (str, optional): Report CSV in output/ (default: <input stem>.bulk_report.csv).
+        rows_per_job (int): Rows per uploaded file / job.
+        poll_interval (float): Seconds between status checks.
+        timeout (float): Maximum seconds to wait for all jobs.
+        client (BulkWriteClient, optional): Pre-configured client (e.g. pointed at the stand-in).
+
+    Returns:
+        bool: True if every job completed and no row failed (SKIPPED rows are not failures).
+    """
+    if operation not in ("insert", "update", "upsert"):
+        print(f"❌ Error: Unsupported Bulk Write operation '{operation}'.")
+        return False
+    if operation == "update":
+        find_by = find_by or "id"
+    if operation == "upsert" and not find_by:
+        print("❌ Error: upsert needs a duplicate-check field (--find-by, e.g. Email).")
+        logger.error("Bulk Write upsert requested without find_by.")
+        return False
+    org_id = org_id or os.getenv("ZOHO_ORG_ID", "")
+    if client is None:
+        if not org_id:
+            print("❌ Error: Zoho org id is required for uploads. Provide --org-id or set ZOHO_ORG_ID in .env.")
+            logger.error("Bulk Write failed: missing org id.")
+            return False
+        client = BulkWriteClient(org_id)
+
+    print("=" * 60)
+    print(f"BULK WRITE - {operation.upper()} {input_path} (find_by={find_by or 'n/a'})")
+    print("=" * 60)
+    logger.info(f"Starting Bulk Write {operation} of {input_path}, find_by={find_by}, rows_per_job={rows_per_job}")
+    started = time.monotonic()
+
+    output_dir = PROJECT_ROOT / "output"
+    output_dir.mkdir(exist_ok=True)
+    stem = os.path.basename(str(input_path)).split(".")[0]
+    report_path = output_dir / (report_filename or f"{stem}.bulk_report.csv")
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="bulk-write-") as work_dir:
+            chunks = write_zipped_chunks(input_path, work_dir, rows_per_job)
+            if not chunks:
+                print("No rows found in the input file. Nothing to do.")
+                return True
+            missing = [c for c in ([find_by] if find_by else []) if c not in chunks[0][1]]
+            if missing:
+                print(f"❌ Error: The input has no '{missing[0]}' column needed to match records.")
+                return False
+
+            job_ids = []
+            for zip_path, columns, row_count in chunks:
+                file_id = client.upload(zip_path)
+                job_id = client.create_job(file_id, columns, operation, find_by)
+                job_ids.append(job_id)
+                print(f"  Uploaded {row_count} rows ({os.path.getsize(zip_path) // 1024} KiB zipped) -> job {job_id}")
+
+            print(f"Waiting for {len(job_ids)} Bulk Write job(s)...")
+            finished = wait_for_jobs(client, job_ids, poll_interval, timeout)
+
+            result_zips = []
+            for job_id in job_ids:
+                download_url = (finished[job_id].get("result") or {}).get("download_url")
+                if not download_url:
+                    logger.warning(f"Bulk Write job {job_id} has no result file: {finished[job_id]}")
+                    continue
+                result_path = os.path.join(work_dir, f"result-{job_id}.zip")
+                client.download_result(download_url, result_path)
+                result_zips.append((job_id, result_path))
+            counts = write_result_report(result_zips, report_path)
+    except (BulkWriteError, OSError, ValueError) as e:
+        print(f"❌ Bulk Write failed: {e}")
+        logger.error(f"Bulk Write of {input_path} failed: {e}", exc_info=True)
+        return False
+
+    failed_jobs = [j for j, s in finished.items() if str(s.get("status")).upper() != "COMPLETED"]
+    skipped_rows = sum(n for status, n in counts.items() if status.upper() == SKIPPED_STATUS)
+    failed_rows = sum(n for status, n in counts.items() if status.upper() not in OK_STATUSES | {SKIPPED_STATUS})
+    print(f"\nRESULTS: {counts} in {time.monotonic() - started:.1f}s ({len(failed_jobs)} failed jobs)")
+    if skipped_rows:
+        print(f"⚠️ {skipped_rows} row(s) were skipped by Zoho; see the errors column of the report.")
+    print(f"Per-row report written to {report_path}")
+    logger.info(f"Bulk Write finished: {counts}, failed jobs: {failed_jobs}, failed rows: {failed_rows}, "
+                f"skipped rows: {skipped_rows}, report: {report_path}")
+    return not failed_jobs and failed_rows == 0
+
+# --- End of src/api/leads/bulk_write.py ---
@@ -68,6 +68,15 @@ except Exception as e:
     logger.error(f"Error loading QUALIFICATION_CUSTOM_VIEW_ID from .env: {e}", exc_info=True)
     QUALIFICATION_CUSTOM_VIEW_ID = ""
 
+# Variables for the notification receiver / lead mirror
+NOTIFICATION_TOKEN = os.getenv("NOTIFICATION_TOKEN", "")
+NOTIFICATION_URL = os.getenv("NOTIFICATION_URL", "")
+try:
+    NOTIFICATION_CHANNEL_ID = int(os.getenv("NOTIFICATION_CHANNEL_ID", "0"))
+except ValueError:
+    logger.warning(f"Invalid NOTIFICATION_CHANNEL_ID '{os.getenv('NOTIFICATION_CHANNEL_ID')}' in .env. Defaulting to 0.")
+    NOTIFICATION_CHANNEL_ID = 0
+
 
 # --- Helper Functions ---
 def extract_field_value(record, field_name):
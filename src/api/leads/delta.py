@@ -0,0 +1,131 @@
+# src/api/leads/delta.py
+"""
+Change detection between qualification runs.
+
+Each run keeps a compact content-hash index (one "id<TAB>hash" line per lead, hash of
+the projected output fields). The next run streams its rows against the previous index
+in a single pass and writes only the added, changed and removed leads to a delta file:
+
+    {"change": "added",   "id": ..., "name": ..., ...}
+    {"change": "changed", "id": ..., "name": ..., ...}
+    {"change": "removed", "id": ...}
+
+Only the previous index (ids and 16-character hashes) is held in memory, never the
+previous run's output. Ids are written as integers (Zoho record ids) in every change,
+although the index stores them as text.
+"""
+import os
+import json
+import hashlib
+
+# --- Local Imports ---
+from src.core.initialize import logger
+
+HASH_DIGEST_SIZE = 8 # bytes; 16 hex characters per lead in the index
+
+
+def row_hash(row):
+    """
+    Stable hash of a lead row's projected fields. Enrichment lists (`related_*`, see
+    enrich.py) are left out: they are null whenever a fetch failed or the run deadline
+    hit, which must not make a lead look changed.
+    """
+    fields = {k: v for k, v in row.items() if not k.startswith("related_")}
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=HASH_DIGEST_SIZE).hexdigest()
+
+
+def normalize_id(lead_id):
+    """Record ids as int (as returned by the SDK); anything non-numeric is kept as is."""
+    if isinstance(lead_id, str) and lead_id.isdigit():
+        return int(lead_id)
+    return lead_id
+
+
+def load_index(index_path):
+    """Reads an index file into {id: hash}. A missing file yields an empty index."""
+    index = {}
+    if not os.path.exists(index_path):
+        return index
+    with open(index_path, "r", encoding="utf-8") as f:
+        for line in f:
+            lead_id, _, digest = line.rstrip("\n").partition("\t")
+            if lead_id and digest:
+                index[lead_id] = digest
+    return index
+
+
+class DeltaTracker:
+    """
+    Compares streamed rows with the previous run's index and writes the delta.
+
+    Call observe() for every row of the current run, then close(). After an incomplete
+    run (close(complete=False), e.g. an error or Zoho's 2000-record page limit) unseen
+    leads are not reported as removed and keep their previous entries in the new index,
+    so the next run neither loses them nor reports the leads seen now a second time.
+
+    Args:
+        index_path: Index file of the previous run (rewritten for the next run).
+        delta_path: Delta output file (.jsonl).
+    """
+
+    def __init__(self, index_path, delta_path):
+        self.index_path = str(index_path)
+        self.delta_path = str(delta_path)
+        self.previous = load_index(self.index_path)
+        self.baseline_size = len(self.previous)
+        self.counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+        self._seen = set()
+        self._new_index_path = f"{self.index_path}.tmp"
+        self._index = open(self._new_index_path, "w", encoding="utf-8")
+        self._delta = open(self.delta_path, "w", encoding="utf-8")
+
+    def _emit(self, change, row):
+        self.counts[change] += 1
+        entry = {'change': change, **row, 'id': normalize_id(row.get('id'))}
+        self._delta.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+
+    def observe(self, row):
+        """Records one row of the current run, writing it to the delta if added or changed."""
+        lead_id = str(row.get('id'))
+        if lead_id in self._seen: # Same lead returned on two pages
+            return
+        self._seen.add(lead_id)
+        digest = row_hash(row)
+        self._index.write(f"{lead_id}\t{digest}\n")
+        previous_digest = self.previous.pop(lead_id, None)
+        if previous_digest is None:
+            self._emit('added', row)
+        elif previous_digest != digest:
+            self._emit('changed', row)
+        else:
+            self.counts['unchanged'] += 1
+
+    def close(self, complete=True):
+        """
+        Finishes the delta and replaces the index. With complete=True, leads left in the
+        previous index are written as removed; otherwise they are carried over into the index.
+
+        Returns:
+            dict: Counts of added/changed/removed/unchanged leads.
+        """
+        try:
+            for lead_id, digest in self.previous.items():
+                if complete:
+                    self._emit('removed', {'id': lead_id})
+                else:
+                    self._index.write(f"{lead_id}\t{digest}\n")
+        finally:
+            self._index.close()
+            self._delta.close()
+        os.replace(self._new_index_path, self.index_path)
+        if complete:
+            logger.info(f"Delta vs previous run ({self.baseline_size} leads): {self.counts}. Index updated at {self.index_path}")
+        else:
+            logger.warning(f"Run incomplete: removed leads not reported; {len(self.previous)} unseen leads kept "
+                           f"in index {self.index_path}.")
+        self.previous = {}
+        self._seen = set()
+        return self.counts
+
+# --- End of src/api/leads/delta.py ---
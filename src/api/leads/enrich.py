@@ -0,0 +1,244 @@
+# src/api/leads/enrich.py
+"""
+Related-record enrichment for lead rows (`qualify --enrich notes,activities`).
+
+Rows are handed to RelatedEnricher.submit() as pages arrive. The related lists of
+each lead are fetched (get_related_records) on a bounded thread pool while the next
+page is still being read, and rows come back out in their original order with
+`related_<kind>` lists merged in. Notes are the most recent ones (newest first);
+activities are the open ones (not Completed/Closed). At most `window` rows wait for enrichment at a
+time, so the output stays a stream.
+
+Results are cached per lead and related list for the run; with a TTL they are also
+kept in a small .jsonl cache in zoho_data/ and reused by later runs. The cache file is
+rewritten with only the unexpired entries at the end of each run, so it stays small.
+
+Changes in related lists do not count as lead changes for `--delta` (see delta.row_hash).
+"""
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.related_records import (
+    RelatedRecordsOperations, GetRelatedRecordsParam, ResponseWrapper as RelatedResponseWrapper,
+    APIException as RelatedAPIException
+)
+from zohocrmsdk.src.com.zoho.crm.api.record import GetRecordsParam
+from zohocrmsdk.src.com.zoho.crm.api import ParameterMap, HeaderMap
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+
+# --- Local Imports ---
+from src.core.initialize import logger, DATA_DIR
+from .common import MODULE
+from .fetch import PageFetchError, describe_api_exception, record_to_fields
+
+# --- Configuration ---
+# --enrich name -> (related list API name, fields kept per related record)
+RELATED_LISTS = {
+    'notes': ("Notes", ["Note_Title", "Note_Content", "Created_Time"]),
+    'activities': ("Activities", ["Subject", "Activity_Type", "Status", "Due_Date", "Start_DateTime"]),
+}
+# Related list -> (sort_by, sort_order) requested from Zoho
+RELATED_SORT = {'notes': ("Created_Time", "desc")}
+# Related list -> (field, values) of records to drop; the page is fetched larger so `per_lead` remain
+RELATED_EXCLUDE = {'activities': ("Status", {"Completed", "Closed"})}
+EXCLUDE_FETCH_PAGE = 200 # Records fetched per lead for a filtered list (Zoho's maximum page size)
+DEFAULT_CONCURRENCY = 8
+DEFAULT_PER_LEAD = 10 # Related records kept per lead and list (one request each)
+DEFAULT_WINDOW = 400 # Rows that may wait for enrichment before the writer blocks
+DEFAULT_CACHE_PATH = DATA_DIR / "enrich_cache.jsonl"
+
+
+def parse_enrich_kinds(value):
+    """
+    Parses a comma-separated --enrich value, e.g. "notes,activities".
+
+    Raises:
+        ValueError: On an unknown related list name.
+    """
+    kinds = [k.strip().lower() for k in (value or "").split(",") if k.strip()]
+    unknown = [k for k in kinds if k not in RELATED_LISTS]
+    if unknown:
+        raise ValueError(f"Unknown --enrich list(s): {', '.join(unknown)}. Choose from: {', '.join(RELATED_LISTS)}")
+    return list(dict.fromkeys(kinds))
+
+
+def fetch_related(lead_id, kind, per_lead=DEFAULT_PER_LEAD):
+    """
+    Default fetcher: returns up to `per_lead` related records of one lead as {field: value} dicts,
+    ordered and filtered as set in RELATED_SORT / RELATED_EXCLUDE (newest notes, open activities).
+
+    Raises:
+        PageFetchError: If the request fails.
+    """
+    related_list, fields = RELATED_LISTS[kind]
+    exclude = RELATED_EXCLUDE.get(kind)
+    param_instance = ParameterMap()
+    param_instance.add(GetRelatedRecordsParam.fields, ",".join(fields))
+    param_instance.add(GetRelatedRecordsParam.per_page, max(per_lead, EXCLUDE_FETCH_PAGE) if exclude else per_lead)
+    param_instance.add(GetRelatedRecordsParam.page, 1)
+    if kind in RELATED_SORT:
+        sort_by, sort_order = RELATED_SORT[kind]
+        # GetRelatedRecordsParam has no sort constants; GetRecordsParam's send the same query parameters
+        param_instance.add(GetRecordsParam.sort_by, sort_by)
+        param_instance.add(GetRecordsParam.sort_order, sort_order)
+    context = f"get_related_records {related_list} of lead {lead_id}"
+    try:
+        response = RelatedRecordsOperations(related_list, MODULE).get_related_records(
+            int(lead_id), param_instance, HeaderMap()
+        )
+    except SDKException as ex:
+        raise PageFetchError(f"{context}: SDK error: {ex}")
+    if response is None:
+        raise PageFetchError(f"{context}: No response received.")
+    if response.get_status_code() == 204:
+        return []
+    response_object = response.get_object()
+    if isinstance(response_object, RelatedResponseWrapper):
+        items = [record_to_fields(r, fields) for r in response_object.get_data() or []]
+        if exclude:
+            field, values = exclude
+            items = [item for item in items if item.get(field) not in values]
+        return items[:per_lead]
+    if isinstance(response_object, RelatedAPIException):
+        raise PageFetchError(f"{context}: {describe_api_exception(response_object)}")
+    raise PageFetchError(f"{context}: Unexpected response object type {type(response_object)}")
+
+
+class RelatedRecordsCache:
+    """
+    Per-lead cache of related lists. In memory for the run; with ttl > 0 entries younger
+    than `ttl` seconds are loaded from `path`, and close() rewrites the file with the
+    entries that are still unexpired (loaded and new), dropping expired and replaced ones.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=0):
+        self.path = str(path)
+        self.ttl = ttl
+        self._entries = {} # (kind, lead_id) -> list
+        self._stored_at = {} # (kind, lead_id) -> time.time() of the fetch
+        self._changed = False
+        self._lock = threading.Lock()
+        if ttl > 0 and os.path.exists(self.path):
+            cutoff = time.time() - ttl
+            lines = 0
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get("at", 0) >= cutoff:
+                        key = (entry["kind"], str(entry["id"]))
+                        self._entries[key] = entry["items"]
+                        self._stored_at[key] = entry["at"]
+            self._changed = lines != len(self._entries) # Expired, replaced or torn lines to drop
+            logger.info(f"Loaded {len(self._entries)} cached related lists from {self.path}.")
+
+    def get(self, kind, lead_id):
+        with self._lock:
+            return self._entries.get((kind, str(lead_id)))
+
+    def put(self, kind, lead_id, items):
+        with self._lock:
+            self._entries[(kind, str(lead_id))] = items
+            self._stored_at[(kind, str(lead_id))] = time.time()
+            self._changed = True
+
+    def close(self):
+        """Persists the unexpired entries (only when a TTL is set and something changed)."""
+        if self.ttl <= 0 or not self._changed:
+            return
+        cutoff = time.time() - self.ttl
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for (kind, lead_id), items in self._entries.items():
+                    at = self._stored_at[(kind, lead_id)]
+                    if at >= cutoff:
+                        f.write(json.dumps({'kind': kind, 'id': lead_id, 'at': at, 'items': items},
+                                           ensure_ascii=False, default=str) + "\n")
+            os.replace(tmp_path, self.path)
+            self._changed = False
+
+
+class RelatedEnricher:
+    """
+    Order-preserving, bounded fan-out of related-list fetches for a stream of rows.
+
+    Args:
+        kinds (list): Keys of RELATED_LISTS to merge into each row as `related_<kind>`.
+        concurrency (int): Related-list requests in flight at once.
+        per_lead (int): Related records kept per lead and list.
+        window (int): Rows that may wait for enrichment before submit() blocks.
+        cache (RelatedRecordsCache, optional): Defaults to an in-memory cache for the run.
+        fetcher: Callable (lead_id, kind, per_lead) -> list of dicts. Defaults to fetch_related.
+    """
+
+    def __init__(self, kinds, concurrency=DEFAULT_CONCURRENCY, per_lead=DEFAULT_PER_LEAD,
+                 window=DEFAULT_WINDOW, cache=None, fetcher=None):
+        self.kinds = list(kinds)
+        self.per_lead = per_lead
+        self.window = max(1, window)
+        self.cache = cache or RelatedRecordsCache()
+        self.fetcher = fetcher or fetch_related
+        self.stats = {'fetched': 0, 'cached': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="zoho-enrich")
+        self._pending = deque() # (row, [futures]) in arrival order
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _related(self, lead_id, kind):
+        items = self.cache.get(kind, lead_id)
+        if items is not None:
+            self._count('cached')
+            return items
+        try:
+            items = self.fetcher(lead_id, kind, self.per_lead)
+        except Exception as e:
+            self._count('errors')
+            logger.error(f"Enrichment of lead {lead_id} with {kind} failed: {e}",
+                         exc_info=not isinstance(e, PageFetchError))
+            return None # Written as null; not cached so the next run retries
+        self.cache.put(kind, lead_id, items)
+        self._count('fetched')
+        return items
+
+    def _finish(self):
+        row, futures = self._pending.popleft()
+        for kind, future in zip(self.kinds, futures):
+            row[f"related_{kind}"] = future.result()
+        return row
+
+    def submit(self, row):
+        """
+        Queues a row for enrichment.
+
+        Returns:
+            list: Earlier rows (in order) whose enrichment has finished, ready to write.
+        """
+        futures = [self._pool.submit(self._related, row['id'], kind) for kind in self.kinds]
+        self._pending.append((row, futures))
+        ready = []
+        while self._pending and (len(self._pending) > self.window or all(f.done() for f in self._pending[0][1])):
+            ready.append(self._finish())
+        return ready
+
+    def drain(self):
+        """Yields every remaining row in order once enriched, then releases the pool and cache."""
+        try:
+            while self._pending:
+                yield self._finish()
+        finally:
+            self._pool.shutdown(wait=True)
+            self.cache.close()
+
+# --- End of src/api/leads/enrich.py ---
@@ -0,0 +1,381 @@
+# src/api/leads/export.py
+"""
+Sharded multi-process lead export.
+
+A large export is split into shards, each fetched by a separate process and written
+to its own part file in a work directory. The parts are merged, in shard order, into
+the final output once every shard is done.
+
+Shard strategies:
+    pages   -> contiguous page ranges of a Custom View (get_records + cvid).
+               Zoho serves at most 2000 records through `page`, so this covers
+               views up to that size.
+    created -> Created_Time windows searched with criteria (search_records).
+               Use windows small enough to stay under 2000 records each; a
+               window with more fails its shard instead of being cut short.
+
+Work directory protocol (also usable by several machines sharing the directory):
+    plan.json            the shard list, written by the coordinator
+    part-NNNNN.claim     created atomically by whoever runs the shard and holding its
+                         owner token; its mtime is refreshed after every page. A claim
+                         older than claim_timeout is considered abandoned and is taken
+                         over by atomically replacing it (os.replace) and reading it back.
+                         The owner token is checked again on every page and before the
+                         part is published, so a worker whose claim was taken over stops.
+    part-NNNNN.jsonl     the finished part, renamed into place on completion
+"""
+import os
+import json
+import time
+import uuid
+import socket
+import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.record import RecordOperations
+
+# --- Local Imports ---
+from src.core.initialize import logger, PROJECT_ROOT
+from .common import MODULE
+from .fetch import (
+    PageFetchError, fetch_view_page, search_page, lead_to_row,
+    MAX_PER_PAGE, MAX_PAGE_BASED_RECORDS
+)
+from .writers import JsonlWriter, open_writer, iter_jsonl
+
+# --- Configuration ---
+DEFAULT_WORK_DIR = PROJECT_ROOT / "output" / "export_work"
+DEFAULT_CLAIM_TIMEOUT = 1800 # seconds without progress before a claim is abandoned
+POLL_INTERVAL = 5 # seconds between checks for shards owned by other nodes
+CLAIM_SETTLE = 2.0 # seconds a taken-over claim must stay ours before the shard runs
+PLAN_FILE = "plan.json"
+
+
+# --- Shard Planning ---
+def plan_page_shards(cv_id, total_pages, pages_per_shard, per_page=MAX_PER_PAGE):
+    """
+    Splits pages 1..total_pages of a Custom View into contiguous page ranges.
+
+    Raises:
+        ValueError: If the pages reach past the first MAX_PAGE_BASED_RECORDS records,
+                    which Zoho does not serve through `page`.
+    """
+    if total_pages * per_page > MAX_PAGE_BASED_RECORDS:
+        raise ValueError(f"{total_pages} pages of {per_page} records exceed Zoho's {MAX_PAGE_BASED_RECORDS}-record "
+                         f"page limit; use --created-since to shard larger exports by Created_Time.")
+    shards = []
+    pages_per_shard = max(1, pages_per_shard)
+    for first_page in range(1, total_pages + 1, pages_per_shard):
+        shards.append({
+            'index': len(shards),
+            'kind': 'pages',
+            'cv_id': str(cv_id),
+            'first_page': first_page,
+            'last_page': min(first_page + pages_per_shard - 1, total_pages),
+            'per_page': per_page,
+        })
+    return shards
+
+
+def _format_zoho_datetime(value):
+    return value.isoformat(timespec="seconds") # e.g. 2025-01-01T00:00:00+00:00
+
+
+def plan_created_shards(since, until, window_hours, base_criteria=None, per_page=MAX_PER_PAGE):
+    """
+    Splits [since, until) into Created_Time windows, each searched with its own criteria.
+
+    Args:
+        since (datetime.datetime): Inclusive start (timezone-aware).
+        until (datetime.datetime): Exclusive end (timezone-aware).
+        window_hours (float): Size of each window.
+        base_criteria (str, optional): Extra criteria ANDed into every window,
+                                       e.g. "(Lead_Status:equals:Not Contacted)".
+    """
+    shards = []
+    step = datetime.timedelta(hours=window_hours)
+    start = since
+    while start < until:
+        end = min(start + step, until)
+        criteria = (f"((Created_Time:greater_equal:{_format_zoho_datetime(start)})"
+                    f"and(Created_Time:less_than:{_format_zoho_datetime(end)}))")
+        if base_criteria:
+            criteria = f"({criteria}and{base_criteria})"
+        shards.append({
+            'index': len(shards),
+            'kind': 'created',
+            'criteria': criteria,
+            'per_page': per_page,
+        })
+        start = end
+    return shards
+
+
+def _part_path(work_dir, index):
+    return os.path.join(work_dir, f"part-{index:05d}.jsonl")
+
+
+def _claim_path(work_dir, index):
+    return os.path.join(work_dir, f"part-{index:05d}.claim")
+
+
+def write_plan(work_dir, shards):
+    """Writes plan.json, or checks an existing one matches so an interrupted export can resume."""
+    os.makedirs(work_dir, exist_ok=True)
+    plan_path = os.path.join(work_dir, PLAN_FILE)
+    if os.path.exists(plan_path):
+        existing = load_plan(work_dir)
+        if existing != shards:
+            raise ValueError(f"{plan_path} holds a different export plan. Use another --work-dir or remove it.")
+        logger.info(f"Resuming export with existing plan in {work_dir}.")
+        return
+    tmp_path = plan_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(shards, f, indent=2)
+    os.replace(tmp_path, plan_path)
+
+
+def load_plan(work_dir):
+    with open(os.path.join(work_dir, PLAN_FILE), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# --- Shard Execution ---
+class ClaimLostError(RuntimeError):
+    """Raised in a running shard whose claim was taken over by another worker."""
+
+
+def _claim_owner(claim):
+    """Token written in a claim file, or None once it is gone."""
+    try:
+        with open(claim, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _try_claim(work_dir, index, claim_timeout):
+    """
+    Claims a shard. Re-takes claims whose owner stopped making progress.
+
+    A free shard is claimed by creating the claim file exclusively (O_EXCL). A stale
+    claim is replaced atomically; as several workers may find it stale at once, the
+    claim is read back after CLAIM_SETTLE seconds and only the last replacer keeps it.
+
+    Returns:
+        str or None: This worker's owner token, or None if the shard is claimed elsewhere.
+    """
+    claim = _claim_path(work_dir, index)
+    token = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    for _ in range(2):
+        try:
+            fd = os.open(claim, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                age = time.time() - os.path.getmtime(claim)
+            except FileNotFoundError:
+                continue # Owner just released it, try again
+            if age < claim_timeout:
+                return None
+            logger.warning(f"Export shard {index}: claim is {age:.0f}s old, taking it over.")
+            tmp_claim = f"{claim}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_claim, "w", encoding="utf-8") as f:
+                f.write(f"{token}\n")
+            os.replace(tmp_claim, claim)
+            time.sleep(CLAIM_SETTLE)
+            owner = _claim_owner(claim)
+            if owner != token:
+                logger.info(f"Export shard {index}: claim taken over by {owner or 'nobody'} first, leaving it.")
+                return None
+            return token
+        with os.fdopen(fd, "w") as f:
+            f.write(f"{token}\n")
+        return token
+    return None
+
+
+def _heartbeat(claim, token, index):
+    """Refreshes a claim's mtime after checking this worker still owns it."""
+    owner = _claim_owner(claim)
+    if owner != token:
+        raise ClaimLostError(f"Export shard {index}: claim was taken over by {owner or 'nobody'}; stopping.")
+    os.utime(claim)
+
+
+def _iter_shard_records(ops, shard, heartbeat):
+    if shard['kind'] == 'pages':
+        for page in range(shard['first_page'], shard['last_page'] + 1):
+            records, more_records = fetch_view_page(ops, shard['cv_id'], page, shard['per_page'])
+            heartbeat()
+            yield from records
+            if not more_records:
+                return
+    elif shard['kind'] == 'created':
+        page = 1
+        while True:
+            records, more_records = search_page(ops, shard['criteria'], page, shard['per_page'])
+            heartbeat()
+            yield from records
+            if not more_records:
+                return
+            if page * shard['per_page'] >= MAX_PAGE_BASED_RECORDS:
+                # Failing (instead of stopping) keeps a truncated window from counting as done
+                raise PageFetchError(f"Export shard {shard['index']} has more than {MAX_PAGE_BASED_RECORDS} records "
+                                     f"in its Created_Time window; re-run with a smaller --window-hours and a new --work-dir.")
+            page += 1
+    else:
+        raise ValueError(f"Unknown shard kind '{shard['kind']}'.")
+
+
+def run_shard(work_dir, shard, claim_timeout=DEFAULT_CLAIM_TIMEOUT):
+    """
+    Claims and runs one shard, writing its part file. Runs inside a worker process.
+
+    Returns:
+        int or None: Number of rows written, or None if the shard was done/claimed elsewhere.
+    """
+    index = shard['index']
+    part = _part_path(work_dir, index)
+    token = None if os.path.exists(part) else _try_claim(work_dir, index, claim_timeout)
+    if token is None:
+        return None
+
+    claim = _claim_path(work_dir, index)
+    tmp_part = f"{part}.{os.getpid()}.tmp"
+    ops = RecordOperations(MODULE)
+    started = time.monotonic()
+    try:
+        with JsonlWriter(tmp_part) as writer:
+            for record in _iter_shard_records(ops, shard, heartbeat=lambda: _heartbeat(claim, token, index)):
+                writer.write(lead_to_row(record))
+        _heartbeat(claim, token, index) # Only the current owner publishes the part
+        os.replace(tmp_part, part)
+        logger.info(f"Export shard {index} finished: {writer.count} rows in {time.monotonic() - started:.1f}s.")
+        return writer.count
+    except ClaimLostError as e:
+        logger.warning(str(e))
+        return None
+    finally:
+        if os.path.exists(tmp_part):
+            os.remove(tmp_part)
+        if _claim_owner(claim) == token: # Never release a claim another worker took over
+            try:
+                os.remove(claim)
+            except FileNotFoundError:
+                pass
+
+
+def work_shards(work_dir, processes, claim_timeout=DEFAULT_CLAIM_TIMEOUT):
+    """
+    Runs every unfinished, unclaimed shard of the plan on a local process pool.
+
+    Returns:
+        tuple: (rows written by this node, list of failed shard indexes)
+    """
+    shards = [s for s in load_plan(work_dir) if not os.path.exists(_part_path(work_dir, s['index']))]
+    rows_written = 0
+    failed = []
+    if not shards:
+        return rows_written, failed
+    with ProcessPoolExecutor(max_workers=max(1, processes)) as pool:
+        futures = {pool.submit(run_shard, work_dir, s, claim_timeout): s['index'] for s in shards}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                count = future.result()
+            except Exception as e: # PageFetchError or anything unexpected
+                failed.append(index)
+                print(f"❌ Shard {index} failed: {e}")
+                logger.error(f"Export shard {index} failed: {e}", exc_info=True)
+                continue
+            if count is not None:
+                rows_written += count
+                print(f"  Shard {index} done ({count} rows).")
+    return rows_written, failed
+
+
+def merge_parts(work_dir, output_path):
+    """Merges all part files, in shard order, into output_path. Returns the row count."""
+    shards = load_plan(work_dir)
+    with open_writer(output_path, source_label=f"sharded export ({len(shards)} shards)") as writer:
+        for shard in shards:
+            for row in iter_jsonl(_part_path(work_dir, shard['index'])):
+                writer.write(row)
+    return writer.count
+
+
+def export_leads_sharded(shards=None, output_filename="lead_export.jsonl", work_dir=None,
+                         processes=None, claim_timeout=DEFAULT_CLAIM_TIMEOUT, join=False):
+    """
+    Coordinates a sharded export.
+
+    Args:
+        shards (list, optional): Shard plan from plan_page_shards/plan_created_shards.
+                                 Not needed when joining an existing work directory.
+        output_filename (str): Final output in the project's output/ dir (.jsonl, .csv or .txt).
+        work_dir (str, optional): Shared work directory. Defaults to output/export_work.
+        processes (int, optional): Worker processes on this node. Defaults to os.cpu_count().
+        claim_timeout (int): Seconds without progress after which another node may re-take a shard.
+        join (bool): Only help run shards of an existing plan (another node merges).
+
+    Returns:
+        bool: True if the export (or this node's share of it) completed successfully.
+    """
+    work_dir = str(work_dir or DEFAULT_WORK_DIR)
+    processes = processes or os.cpu_count() or 1
+
+    print("=" * 60)
+    print(f"SHARDED LEAD EXPORT - Work dir: {work_dir}")
+    print("=" * 60)
+
+    try:
+        if join:
+            total_shards = len(load_plan(work_dir))
+        else:
+            write_plan(work_dir, shards)
+            total_shards = len(shards)
+    except (OSError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        logger.error(f"Sharded export could not load/write its plan: {e}")
+        return False
+
+    print(f"{total_shards} shards, {processes} local processes{' (joining)' if join else ''}.")
+    logger.info(f"Sharded export starting: {total_shards} shards, {processes} processes, join={join}, work_dir={work_dir}")
+    started = time.monotonic()
+    rows_written = 0
+
+    while True:
+        rows, failed = work_shards(work_dir, processes, claim_timeout)
+        rows_written += rows
+        if failed:
+            print(f"❌ {len(failed)} shard(s) failed: {sorted(failed)}. Re-run the same command to retry them.")
+            return False
+        missing = [s['index'] for s in load_plan(work_dir) if not os.path.exists(_part_path(work_dir, s['index']))]
+        if not missing:
+            break
+        if join:
+            print(f"No unclaimed shards left for this node ({len(missing)} still running elsewhere).")
+            return True
+        logger.debug(f"Waiting for {len(missing)} shards running on other nodes.")
+        time.sleep(POLL_INTERVAL)
+
+    elapsed = time.monotonic() - started
+    print(f"This node wrote {rows_written} rows in {elapsed:.1f}s.")
+    if join:
+        return True
+
+    output_dir = PROJECT_ROOT / "output"
+    output_dir.mkdir(exist_ok=True)
+    output_path = output_dir / output_filename
+    try:
+        total = merge_parts(work_dir, output_path)
+    except Exception as e:
+        print(f"❌ Error merging part files into {output_path}: {e}")
+        logger.error(f"Error merging export parts into {output_path}", exc_info=True)
+        return False
+    print(f"✅ Merged {total} rows from {total_shards} shards into {output_path}")
+    logger.info(f"Sharded export finished: {total} rows, {total_shards} shards, {time.monotonic() - started:.1f}s.")
+    return True
+
+# --- End of src/api/leads/export.py ---
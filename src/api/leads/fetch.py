@@ -0,0 +1,144 @@
+# src/api/leads/fetch.py
+"""
+Low-level page fetch helpers shared by the bulk read paths (export, search).
+
+Unlike qualify.py, which reports progress and errors to the console itself, these
+helpers return plain data and raise PageFetchError so callers running in worker
+processes or threads can decide how to report failures.
+"""
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.record import (
+    APIException, GetRecordsParam, SearchRecordsParam, ResponseWrapper
+)
+from zohocrmsdk.src.com.zoho.crm.api import ParameterMap, HeaderMap
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+from zohocrmsdk.src.com.zoho.crm.api.record import Info as RecordInfo
+
+# --- Local Imports ---
+from src.core.initialize import logger
+from .common import QUALIFY_FIELDS, extract_field_value
+
+# --- Configuration ---
+MAX_PER_PAGE = 200
+# Zoho only serves the first 2000 records of a listing/search through `page`
+MAX_PAGE_BASED_RECORDS = 2000
+
+
+class PageFetchError(RuntimeError):
+    """Raised when a page request fails or returns an unexpected response."""
+
+
+def describe_api_exception(ex):
+    """Formats an APIException's status/code/message/details for logs and errors."""
+    status_val = ex.get_status().get_value() if ex.get_status() else 'N/A'
+    code_val = ex.get_code().get_value() if ex.get_code() else 'N/A'
+    message_val = ex.get_message().get_value() if ex.get_message() else 'N/A'
+    details_val = ex.get_details()
+    return f"Code={code_val}, Status={status_val}, Msg={message_val}, Details={details_val}"
+
+
+def record_to_fields(record, fields=QUALIFY_FIELDS):
+    """Extracts the given API fields of a record into a plain {field: value} dict."""
+    values = {field: extract_field_value(record, field) for field in fields if field != "id"}
+    values["id"] = record.get_id()
+    return values
+
+
+def fields_to_row(values):
+    """
+    Projects {field: value} Lead data onto the qualification output row
+    (same shape as the rows written by qualify.py).
+    """
+    first_name = values.get("First_Name")
+    last_name = values.get("Last_Name")
+    notes = values.get("Additional_Relocation_Notes")
+    full_name = ' '.join(filter(None, [first_name, last_name]))
+    return {
+        'id': values.get("id"),
+        'name': full_name.strip() or 'N/A',
+        'email': values.get("Email") or 'N/A',
+        'status': values.get("Lead_Status") or 'N/A',
+        'notes': notes.strip() if notes else 'N/A'
+    }
+
+
+def lead_to_row(record):
+    """Projects a Lead record onto the qualification output row."""
+    return fields_to_row(record_to_fields(record))
+
+
+def read_records_response(response, context):
+    """
+    Unpacks a get_records/search_records response.
+
+    Args:
+        response: The APIResponse returned by the SDK call.
+        context (str): Short description of the request, used in error messages.
+
+    Returns:
+        tuple: (records list, more_records bool). A 204 yields ([], False).
+
+    Raises:
+        PageFetchError: On a missing response, an APIException or an unexpected object.
+    """
+    if response is None:
+        raise PageFetchError(f"{context}: No response received.")
+    status_code = response.get_status_code()
+    if status_code == 204:
+        return [], False
+    response_object = response.get_object()
+    if status_code == 200 and isinstance(response_object, ResponseWrapper):
+        records = response_object.get_data() or []
+        info = response_object.get_info()
+        more_records = isinstance(info, RecordInfo) and info.get_more_records() is True
+        return records, bool(records) and more_records
+    if isinstance(response_object, APIException):
+        raise PageFetchError(f"{context}: API error (HTTP {status_code}): {describe_api_exception(response_object)}")
+    raise PageFetchError(f"{context}: Unexpected response (HTTP {status_code}): {type(response_object)}")
+
+
+def fetch_view_page(ops, cv_id, page, per_page=MAX_PER_PAGE, fields=QUALIFY_FIELDS):
+    """Fetches one page of a Custom View. Returns (records, more_records)."""
+    param_instance = ParameterMap() # New map per request, see zoho_v8_guide.md Phase 7
+    param_instance.add(GetRecordsParam.cvid, cv_id)
+    param_instance.add(GetRecordsParam.fields, ",".join(fields))
+    param_instance.add(GetRecordsParam.per_page, per_page)
+    param_instance.add(GetRecordsParam.page, page)
+    context = f"get_records CV {cv_id} page {page}"
+    logger.debug(f"Fetching {context} (per_page={per_page}).")
+    try:
+        return read_records_response(ops.get_records(param_instance, HeaderMap()), context)
+    except SDKException as ex:
+        raise PageFetchError(f"{context}: SDK error: {ex}")
+
+
+def fetch_records_by_ids(ops, ids, fields=QUALIFY_FIELDS):
+    """Fetches up to 100 records by id in one get_records call. Returns the record list."""
+    param_instance = ParameterMap()
+    param_instance.add(GetRecordsParam.ids, ",".join(str(i) for i in ids))
+    param_instance.add(GetRecordsParam.fields, ",".join(fields))
+    context = f"get_records ids ({len(ids)} records)"
+    logger.debug(f"Fetching {context}.")
+    try:
+        records, _ = read_records_response(ops.get_records(param_instance, HeaderMap()), context)
+        return records
+    except SDKException as ex:
+        raise PageFetchError(f"{context}: SDK error: {ex}")
+
+
+def search_page(ops, criteria, page, per_page=MAX_PER_PAGE, fields=QUALIFY_FIELDS):
+    """Fetches one page of a criteria search. Returns (records, more_records)."""
+    param_instance = ParameterMap()
+    param_instance.add(SearchRecordsParam.criteria, criteria)
+    param_instance.add(SearchRecordsParam.fields, ",".join(fields))
+    param_instance.add(SearchRecordsParam.per_page, per_page)
+    param_instance.add(SearchRecordsParam.page, page)
+    context = f"search_records '{criteria}' page {page}"
+    logger.debug(f"Fetching {context} (per_page={per_page}).")
+    try:
+        return read_records_response(ops.search_records(param_instance, HeaderMap()), context)
+    except SDKException as ex:
+        raise PageFetchError(f"{context}: SDK error: {ex}")
+
+# --- End of src/api/leads/fetch.py ---
@@ -0,0 +1,200 @@
+# src/api/leads/mass_update.py
+"""
+Mass Update: set the same field values on every lead of a Custom View or id list
+with a handful of server-side jobs (RecordOperations.mass_update_records) instead
+of one GET+PUT per lead.
+
+Id lists are split into chunks of at most MAX_IDS_PER_JOB; each chunk becomes one
+job. Jobs are submitted and then polled concurrently until they complete.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.record import (
+    RecordOperations, Record, APIException, MassUpdateBodyWrapper, MassUpdateActionWrapper,
+    MassUpdateSuccessResponse, MassUpdateResponseWrapper, GetMassUpdateStatusParam
+)
+from zohocrmsdk.src.com.zoho.crm.api import ParameterMap
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+
+# --- Local Imports ---
+from src.core.initialize import logger
+from .common import MODULE
+from .fetch import describe_api_exception
+
+# --- Configuration ---
+MAX_IDS_PER_JOB = 50000 # Zoho's per-call limit for ids in a mass update
+DEFAULT_CONCURRENCY = 4
+DEFAULT_POLL_INTERVAL = 5.0
+DEFAULT_TIMEOUT = 3600
+
+
+class MassUpdateError(RuntimeError):
+    """Raised when a mass update job cannot be submitted or its status cannot be read."""
+
+
+def read_ids_file(path):
+    """Reads lead ids from a file: one per line, or the first column of a CSV. Non-numeric lines are skipped."""
+    ids = []
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            value = line.split(",")[0].strip().strip('"')
+            if value.isdigit():
+                ids.append(int(value))
+    return ids
+
+
+def submit_mass_update(ops, fields, cvid=None, ids=None):
+    """
+    Submits one mass update job.
+
+    Args:
+        ops: RecordOperations for the Leads module.
+        fields (dict): {API field name: value} to set on every targeted record.
+        cvid (str, optional): Custom View whose records are updated.
+        ids (list[int], optional): Record ids to update (at most MAX_IDS_PER_JOB).
+
+    Returns:
+        str: The job id.
+    """
+    record = Record()
+    for field, value in fields.items():
+        record.add_key_value(field, value)
+    body = MassUpdateBodyWrapper()
+    body.set_data([record])
+    if cvid:
+        body.set_cvid(str(cvid))
+    if ids:
+        body.set_ids([int(i) for i in ids])
+
+    context = f"mass_update_records ({'cvid ' + str(cvid) if cvid else f'{len(ids)} ids'})"
+    try:
+        response = ops.mass_update_records(body)
+    except SDKException as ex:
+        raise MassUpdateError(f"{context}: SDK error: {ex}")
+    if response is None:
+        raise MassUpdateError(f"{context}: No response received.")
+    response_object = response.get_object()
+    if isinstance(response_object, MassUpdateActionWrapper):
+        for action in response_object.get_data() or []:
+            if isinstance(action, MassUpdateSuccessResponse):
+                return str(action.get_details().get("job_id"))
+            if isinstance(action, APIException):
+                raise MassUpdateError(f"{context}: {describe_api_exception(action)}")
+        raise MassUpdateError(f"{context}: Empty action response.")
+    if isinstance(response_object, APIException):
+        raise MassUpdateError(f"{context}: {describe_api_exception(response_object)}")
+    raise MassUpdateError(f"{context}: Unexpected response object type {type(response_object)}")
+
+
+def get_mass_update_status(ops, job_id):
+    """
+    Reads a mass update job's status.
+
+    Returns:
+        dict: {'status', 'total', 'updated', 'not_updated', 'failed'}
+    """
+    param_instance = ParameterMap()
+    param_instance.add(GetMassUpdateStatusParam.job_id, job_id)
+    context = f"get_mass_update_status job {job_id}"
+    try:
+        response = ops.get_mass_update_status(param_instance)
+    except SDKException as ex:
+        raise MassUpdateError(f"{context}: SDK error: {ex}")
+    if response is None:
+        raise MassUpdateError(f"{context}: No response received.")
+    response_object = response.get_object()
+    if isinstance(response_object, MassUpdateResponseWrapper):
+        job = (response_object.get_data() or [None])[0]
+        if job is None:
+            raise MassUpdateError(f"{context}: No job data returned.")
+        status = job.get_status()
+        return {
+            'status': (status.get_value() if hasattr(status, 'get_value') else str(status or "")).upper(),
+            'total': job.get_total_count(),
+            'updated': job.get_updated_count(),
+            'not_updated': job.get_not_updated_count(),
+            'failed': job.get_failed_count(),
+        }
+    if isinstance(response_object, APIException):
+        raise MassUpdateError(f"{context}: {describe_api_exception(response_object)}")
+    raise MassUpdateError(f"{context}: Unexpected response object type {type(response_object)}")
+
+
+def _wait_for_job(ops, job_id, poll_interval, deadline):
+    while True:
+        status = get_mass_update_status(ops, job_id)
+        if status['status'] in ("COMPLETED", "FAILED"):
+            return status
+        if time.monotonic() > deadline:
+            raise MassUpdateError(f"Mass update job {job_id} still {status['status']} at timeout.")
+        time.sleep(poll_interval)
+
+
+def mass_update_leads(fields, cvid=None, ids=None, chunk_size=MAX_IDS_PER_JOB,
+                      concurrency=DEFAULT_CONCURRENCY, poll_interval=DEFAULT_POLL_INTERVAL,
+                      timeout=DEFAULT_TIMEOUT):
+    """
+    Sets the same field values on all leads of a Custom View or an id list.
+
+    Args:
+        fields (dict): {API field name: value}, e.g. {"Lead_Status": "Contacted"}.
+        cvid (str, optional): Custom View ID (one job for the whole view).
+        ids (list[int], optional): Lead ids, split into jobs of chunk_size ids.
+        chunk_size (int): Ids per job (capped at MAX_IDS_PER_JOB).
+        concurrency (int): Jobs submitted/polled in parallel.
+        poll_interval (float): Seconds between status checks of a job.
+        timeout (float): Maximum seconds to wait for all jobs.
+
+    Returns:
+        bool: True if every job completed without failed records.
+    """
+    if not fields:
+        print("❌ Error: At least one field to set is required.")
+        return False
+    if bool(cvid) == bool(ids):
+        print("❌ Error: Provide exactly one of a Custom View ID or a list of ids.")
+        logger.error("Mass update requires exactly one of cvid or ids.")
+        return False
+
+    chunk_size = max(1, min(chunk_size, MAX_IDS_PER_JOB))
+    targets = [{'cvid': cvid}] if cvid else [{'ids': ids[i:i + chunk_size]} for i in range(0, len(ids), chunk_size)]
+    target_label = f"Custom View {cvid}" if cvid else f"{len(ids)} ids in {len(targets)} job(s)"
+
+    print("=" * 60)
+    print(f"LEAD MASS UPDATE - {target_label}: {fields}")
+    print("=" * 60)
+    logger.info(f"Starting mass update of {target_label} with fields {list(fields)}")
+    ops = RecordOperations(MODULE)
+    started = time.monotonic()
+    deadline = started + timeout
+
+    def _run(target):
+        job_id = submit_mass_update(ops, fields, **target)
+        print(f"  Submitted job {job_id} ({'cvid' if cvid else str(len(target['ids'])) + ' ids'}).")
+        logger.info(f"Mass update job {job_id} submitted.")
+        status = _wait_for_job(ops, job_id, poll_interval, deadline)
+        print(f"  Job {job_id}: {status['status']} - updated {status['updated']}, "
+              f"not updated {status['not_updated']}, failed {status['failed']} of {status['total']}")
+        logger.info(f"Mass update job {job_id} finished: {status}")
+        return status
+
+    results, errors = [], []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for future in [pool.submit(_run, t) for t in targets]:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                errors.append(e)
+                print(f"❌ {e}")
+                logger.error(f"Mass update job failed: {e}", exc_info=not isinstance(e, MassUpdateError))
+
+    updated = sum(r['updated'] or 0 for r in results)
+    failed = sum(r['failed'] or 0 for r in results)
+    print(f"\nRESULTS: {updated} leads updated, {failed} failed, {len(errors)} job error(s) "
+          f"with {len(targets)} job(s) in {time.monotonic() - started:.1f}s")
+    logger.info(f"Mass update finished: updated={updated}, failed={failed}, job_errors={len(errors)}")
+    return not errors and failed == 0 and all(r['status'] == "COMPLETED" for r in results)
+
+# --- End of src/api/leads/mass_update.py ---
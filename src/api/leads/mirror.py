@@ -0,0 +1,145 @@
+# src/api/leads/mirror.py
+"""
+Local lead mirror: a small SQLite store of Lead fields kept up to date by
+Zoho CRM notifications (see notifications.py), so queries read fresh data
+without polling Custom Views.
+
+Each lead is stored as its QUALIFY_FIELDS values ({API field name: value}).
+
+`mirror sync` seeds the store from one Custom View, but the notification channel
+watches every lead of the module. Between syncs the mirror therefore also holds leads
+created or edited outside the view, and keeps leads that left the view; each sync
+replaces the contents with the view's current leads again.
+"""
+import json
+import time
+import sqlite3
+import threading
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.record import RecordOperations
+
+# --- Local Imports ---
+from src.core.initialize import logger, DATA_DIR
+from .common import MODULE
+from .fetch import fetch_view_page, record_to_fields, fields_to_row, MAX_PER_PAGE, MAX_PAGE_BASED_RECORDS
+
+# --- Configuration ---
+DEFAULT_MIRROR_PATH = DATA_DIR / "lead_mirror.sqlite3"
+
+
+class LeadMirror:
+    """
+    Thread-safe SQLite store of lead field values keyed by lead id.
+
+    Args:
+        path: SQLite database file (created if missing). Defaults to zoho_data/lead_mirror.sqlite3.
+    """
+
+    def __init__(self, path=DEFAULT_MIRROR_PATH):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS leads ("
+            " id TEXT PRIMARY KEY,"
+            " data TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def upsert(self, values, merge=False):
+        """
+        Stores one lead. With merge=True, only the given fields are changed
+        (used for partial values delivered with a notification).
+        """
+        lead_id = str(values["id"])
+        with self._lock:
+            if merge:
+                row = self._conn.execute("SELECT data FROM leads WHERE id = ?", (lead_id,)).fetchone()
+                if row is not None:
+                    values = {**json.loads(row[0]), **values}
+            values = {**values, "id": lead_id}
+            self._conn.execute(
+                "INSERT INTO leads (id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (lead_id, json.dumps(values, ensure_ascii=False, default=str), time.time())
+            )
+            self._conn.commit()
+
+    def delete(self, lead_ids):
+        """Removes leads by id. Returns the number of rows deleted."""
+        with self._lock:
+            cursor = self._conn.executemany("DELETE FROM leads WHERE id = ?", [(str(i),) for i in lead_ids])
+            self._conn.commit()
+            return cursor.rowcount
+
+    def delete_except(self, lead_ids):
+        """Removes every lead whose id is not in lead_ids. Returns the number of rows deleted."""
+        keep = {str(i) for i in lead_ids}
+        with self._lock:
+            stale = [(r[0],) for r in self._conn.execute("SELECT id FROM leads") if r[0] not in keep]
+            self._conn.executemany("DELETE FROM leads WHERE id = ?", stale)
+            self._conn.commit()
+        return len(stale)
+
+    def get(self, lead_id):
+        """Returns the stored {field: value} dict for a lead, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM leads WHERE id = ?", (str(lead_id),)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+
+    def iter_rows(self, status=None):
+        """Yields output rows (same shape as qualify) ordered by id, optionally filtered by Lead_Status."""
+        with self._lock:
+            data = [r[0] for r in self._conn.execute("SELECT data FROM leads ORDER BY id")]
+        for raw in data:
+            values = json.loads(raw)
+            if status is None or values.get("Lead_Status") == status:
+                yield fields_to_row(values)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def sync_mirror_from_custom_view(mirror, cv_id):
+    """
+    Seeds (or fully refreshes) the mirror from a Custom View: every lead of the view is
+    stored and, once the whole view was read, leads not seen in it are removed.
+    Notifications keep the mirror current afterwards.
+
+    Zoho serves only the first MAX_PAGE_BASED_RECORDS records of a view through `page`.
+    A larger view is stored up to that limit with a warning, and nothing is removed.
+
+    Returns:
+        int: The number of leads stored.
+    """
+    ops = RecordOperations(MODULE)
+    max_page = MAX_PAGE_BASED_RECORDS // MAX_PER_PAGE
+    page = 1
+    seen = set()
+    more_records = True
+    while more_records:
+        if page > max_page:
+            print(f"⚠️ Custom View {cv_id} has more than {MAX_PAGE_BASED_RECORDS} leads; only the first "
+                  f"{MAX_PAGE_BASED_RECORDS} were synced and no leads were removed from the mirror.")
+            logger.warning(f"Mirror sync of CV {cv_id} stopped at the {MAX_PAGE_BASED_RECORDS}-record page limit; sweep skipped.")
+            return len(seen)
+        records, more_records = fetch_view_page(ops, cv_id, page)
+        for record in records:
+            values = record_to_fields(record)
+            mirror.upsert(values)
+            seen.add(str(values["id"]))
+        logger.info(f"Mirror sync: stored page {page} of CV {cv_id} ({len(seen)} leads so far).")
+        page += 1
+    removed = mirror.delete_except(seen)
+    logger.info(f"Mirror sync of CV {cv_id} complete: {len(seen)} leads stored, {removed} no longer in the view removed.")
+    return len(seen)
+
+# --- End of src/api/leads/mirror.py ---
@@ -0,0 +1,274 @@
+# src/api/leads/notifications.py
+"""
+Zoho CRM notification channel for Leads and a local receiver that applies the
+callbacks to the lead mirror (mirror.py).
+
+Zoho POSTs a JSON callback for every create/edit/delete, e.g.:
+    {"module": "Leads", "operation": "update", "ids": ["1649349000440877054"],
+     "channel_id": "1000000068001", "token": "...", "affected_fields": [...],
+     "affected_values": [{"record_id": "1649349000440877054", "values": {"Lead_Status": "Contacted"}}]}
+
+Deletes remove the lead. Updates that carry the changed values are merged directly;
+everything else is re-fetched by id (100 ids per get_records call). Each callback is
+applied, one at a time in arrival order, before it is acknowledged: a callback that
+cannot be applied (e.g. the re-fetch fails) is answered with HTTP 500 instead of being
+lost after a 200. Incoming callbacks can be recorded to a .jsonl file and replayed
+later against a local receiver for testing.
+
+The channel covers every lead of the module, not only those of the Custom View the
+mirror was seeded from (see mirror.py).
+"""
+import hmac
+import json
+import datetime
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.notifications import (
+    NotificationsOperations, BodyWrapper as NotificationBodyWrapper, Notification,
+    ActionWrapper as NotificationActionWrapper, SuccessResponse as NotificationSuccessResponse,
+    APIException as NotificationAPIException
+)
+from zohocrmsdk.src.com.zoho.crm.api.record import RecordOperations
+
+# --- Local Imports ---
+from src.core.initialize import logger
+from .common import MODULE
+from .fetch import fetch_records_by_ids, record_to_fields, describe_api_exception
+
+# --- Configuration ---
+LEAD_EVENTS = [f"{MODULE}.create", f"{MODULE}.edit", f"{MODULE}.delete"]
+DEFAULT_RECEIVER_HOST = "127.0.0.1"
+DEFAULT_RECEIVER_PORT = 8766
+RECEIVER_PATH = "/notifications"
+MAX_CHANNEL_EXPIRY_HOURS = 24 * 7 # Zoho allows channels of at most one week
+IDS_PER_FETCH = 100
+
+
+# --- Channel Registration ---
+def register_lead_channel(notify_url, token, channel_id, expiry_hours=24, renew=False):
+    """
+    Enables (or with renew=True, updates/extends) a notification channel for Leads
+    create/edit/delete events.
+
+    Args:
+        notify_url (str): Public URL Zoho will POST callbacks to (forwarded to the receiver).
+        token (str): Shared secret echoed back in every callback; the receiver checks it.
+        channel_id (int): Any unique number identifying this channel.
+        expiry_hours (float): Channel lifetime, at most one week. Re-run with renew=True to extend.
+        renew (bool): Update an existing channel instead of enabling a new one.
+
+    Returns:
+        bool: True if Zoho accepted the channel.
+    """
+    expiry_hours = min(expiry_hours, MAX_CHANNEL_EXPIRY_HOURS)
+    notification = Notification()
+    notification.set_channel_id(int(channel_id))
+    notification.set_events(LEAD_EVENTS)
+    notification.set_channel_expiry(datetime.datetime.now().astimezone() + datetime.timedelta(hours=expiry_hours))
+    notification.set_token(token)
+    notification.set_notify_url(notify_url)
+    notification.set_return_affected_field_values(True)
+    body = NotificationBodyWrapper()
+    body.set_watch([notification])
+
+    action = "Renewing" if renew else "Enabling"
+    print(f"{action} notification channel {channel_id} for {', '.join(LEAD_EVENTS)} -> {notify_url} ({expiry_hours}h)...")
+    logger.info(f"{action} notification channel {channel_id} for {LEAD_EVENTS} -> {notify_url}, expiry {expiry_hours}h.")
+    try:
+        ops = NotificationsOperations()
+        response = ops.update_notifications(body) if renew else ops.enable_notifications(body)
+        if response is None:
+            print("❌ No response received while registering the notification channel.")
+            logger.error("Notification channel registration failed: No response received.")
+            return False
+        response_object = response.get_object()
+        if isinstance(response_object, NotificationActionWrapper):
+            results = response_object.get_watch() or []
+            ok = bool(results) and all(isinstance(r, NotificationSuccessResponse) for r in results)
+            for r in results:
+                if isinstance(r, NotificationAPIException):
+                    print(f"❌ Channel registration error: {describe_api_exception(r)}")
+                    logger.error(f"Notification channel {channel_id} registration error: {describe_api_exception(r)}")
+            if ok:
+                print(f"✅ Notification channel {channel_id} active for {expiry_hours}h.")
+                logger.info(f"Notification channel {channel_id} registered.")
+            return ok
+        if isinstance(response_object, NotificationAPIException):
+            print(f"❌ API Error while registering channel: {describe_api_exception(response_object)}")
+            logger.error(f"Notification channel {channel_id} registration failed: {describe_api_exception(response_object)}")
+            return False
+        print(f"❌ Unexpected response object type: {type(response_object)}")
+        logger.error(f"Notification channel {channel_id} registration: unexpected response {type(response_object)}")
+        return False
+    except Exception as e:
+        print(f"❌ An unexpected error occurred while registering the channel: {e}")
+        logger.error(f"Notification channel {channel_id} registration failed", exc_info=True)
+        return False
+
+
+def fetch_lead_fields(ids):
+    """Default fetcher for the applier: returns [{field: value}, ...] for the given lead ids."""
+    ops = RecordOperations(MODULE)
+    fetched = []
+    for start in range(0, len(ids), IDS_PER_FETCH):
+        fetched.extend(record_to_fields(r) for r in fetch_records_by_ids(ops, ids[start:start + IDS_PER_FETCH]))
+    return fetched
+
+
+# --- Applying Callbacks ---
+class NotificationApplier:
+    """
+    Applies notification payloads to a LeadMirror.
+
+    Args:
+        mirror: The LeadMirror to update.
+        fetcher: Callable taking a list of lead ids and returning their {field: value} dicts.
+                 Defaults to fetch_lead_fields (get_records by ids).
+    """
+
+    def __init__(self, mirror, fetcher=None):
+        self.mirror = mirror
+        self.fetcher = fetcher or fetch_lead_fields
+        self.counts = {'upserted': 0, 'merged': 0, 'deleted': 0, 'ignored': 0}
+
+    def apply(self, payload):
+        module = payload.get("module")
+        operation = payload.get("operation")
+        ids = [str(i) for i in payload.get("ids") or []]
+        if module != MODULE or not ids:
+            self.counts['ignored'] += 1
+            logger.debug(f"Ignoring notification for module={module}, operation={operation}, ids={len(ids)}.")
+            return
+
+        if operation == "delete":
+            self.counts['deleted'] += self.mirror.delete(ids)
+            return
+
+        to_fetch = list(ids)
+        if operation == "update":
+            # Merge delivered values for leads we already hold; fetch anything else
+            affected = {str(v.get("record_id")): v.get("values") or {} for v in payload.get("affected_values") or []}
+            to_fetch = []
+            for lead_id in ids:
+                if lead_id in affected and self.mirror.get(lead_id) is not None:
+                    self.mirror.upsert({**affected[lead_id], "id": lead_id}, merge=True)
+                    self.counts['merged'] += 1
+                else:
+                    to_fetch.append(lead_id)
+        if to_fetch:
+            for values in self.fetcher(to_fetch):
+                self.mirror.upsert(values)
+                self.counts['upserted'] += 1
+
+
+# --- Receiver ---
+class NotificationReceiver:
+    """
+    Lightweight HTTP endpoint for Zoho notification callbacks.
+
+    Args:
+        applier: NotificationApplier used to apply accepted callbacks.
+        token (str, optional): Expected callback token; callbacks with another token get 403.
+        host (str), port (int): Address to bind (port 0 picks a free port).
+        record_path (str, optional): Append every accepted callback to this .jsonl file.
+    """
+
+    def __init__(self, applier, token=None, host=DEFAULT_RECEIVER_HOST, port=DEFAULT_RECEIVER_PORT, record_path=None):
+        self.applier = applier
+        self.token = token
+        self.host = host
+        self.port = port
+        self.record_path = record_path
+        self.received = 0
+        self.failed = 0
+        self._record_lock = threading.Lock()
+        self._apply_lock = threading.Lock() # One callback at a time, in arrival order
+        self._httpd = None
+
+    def _token_matches(self, token):
+        return isinstance(token, str) and hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8"))
+
+    def accept(self, payload):
+        """Validates, records and applies one callback. Returns an HTTP status code."""
+        if not isinstance(payload, dict):
+            return 400
+        if self.token and not self._token_matches(payload.get("token")):
+            logger.warning(f"Rejected notification with invalid token for channel {payload.get('channel_id')}.")
+            return 403
+        if self.record_path:
+            with self._record_lock, open(self.record_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        with self._apply_lock:
+            try:
+                self.applier.apply(payload)
+            except Exception:
+                self.failed += 1
+                logger.error(f"Failed to apply notification for ids {payload.get('ids')}", exc_info=True)
+                return 500
+            self.received += 1
+        return 200
+
+    def start(self):
+        receiver = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                logger.debug(f"Notification receiver {self.address_string()} - {format % args}")
+
+            def do_POST(self):
+                if self.path.split("?")[0] != RECEIVER_PATH:
+                    status = 404
+                else:
+                    try:
+                        length = int(self.headers.get("Content-Length", 0))
+                        status = receiver.accept(json.loads(self.rfile.read(length) or b"null"))
+                    except ValueError:
+                        status = 400
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _Handler)
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        logger.info(f"Notification receiver listening on http://{self.host}:{self.port}{RECEIVER_PATH}")
+
+    def serve_forever(self):
+        if self._httpd is None:
+            self.start()
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        if self._httpd is not None:
+            self._httpd.server_close()
+
+
+def replay_notifications(path, url):
+    """
+    POSTs recorded callbacks (one JSON payload per line) to a receiver, in order.
+
+    Returns:
+        tuple: (sent, failed) counts.
+    """
+    sent = failed = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            request = urllib.request.Request(url, data=line.strip().encode("utf-8"), method="POST",
+                                             headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(request, timeout=30):
+                    sent += 1
+            except Exception as e:
+                failed += 1
+                logger.error(f"Replaying notification to {url} failed: {e}")
+    return sent, failed
+
+# --- End of src/api/leads/notifications.py ---
@@ -7,24 +7,60 @@ from zohocrmsdk.src.com.zoho.crm.api.record import (
     RecordOperations, APIException, GetRecordsParam, ResponseWrapper, BodyWrapper # Import APIException
 )
 from zohocrmsdk.src.com.zoho.crm.api import ParameterMap, HeaderMap
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
 from zohocrmsdk.src.com.zoho.crm.api.record import Info as RecordInfo
 
 # --- Local Imports ---
 from src.core.initialize import logger, PROJECT_ROOT
+from src.core.deadline import CallPolicy, DeadlineExceeded
+from src.core.http_compression import transfer_snapshot, transfer_summary
 from .common import (
-    MODULE, QUALIFY_FIELDS, extract_field_value, QUALIFICATION_CUSTOM_VIEW_ID
+    MODULE, QUALIFY_FIELDS, QUALIFICATION_CUSTOM_VIEW_ID
 )
+from .fetch import lead_to_row, MAX_PER_PAGE, MAX_PAGE_BASED_RECORDS
+from .writers import open_writer
+from .delta import DeltaTracker
+from .enrich import RelatedEnricher, RelatedRecordsCache, fetch_related, DEFAULT_CONCURRENCY as ENRICH_CONCURRENCY
 
 
-def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qualification_cv_results.txt"):
+def _delta_paths(output_path, index_filename=None):
+    """Default index/delta files sit next to the output: <stem>.index.tsv and <stem>.delta.jsonl."""
+    stem = output_path.name.split(".")[0]
+    index_path = output_path.parent / (index_filename or f"{stem}.index.tsv")
+    return index_path, output_path.parent / f"{stem}.delta.jsonl"
+
+
+def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qualification_cv_results.txt",
+                                   delta=False, index_filename=None, enrich=None,
+                                   enrich_concurrency=ENRICH_CONCURRENCY, enrich_cache_ttl=0,
+                                   call_timeout=None, run_timeout=None, hedge=False, compression_level=None):
     """
     Fetches leads from a specified Zoho CRM Custom View, extracts details,
-    and writes them to a file. Handles pagination up to Zoho's limit for CV fetches.
+    and streams them to a file. Handles pagination up to Zoho's limit for CV fetches.
 
     Args:
         custom_view_id (str, optional): The ID of the Custom View. If None, uses
                                         QUALIFICATION_CUSTOM_VIEW_ID from common.py/.env.
-        output_filename (str): The name for the output text file (created in project's output/ dir).
+        output_filename (str): The name for the output file (created in project's output/ dir).
+                               The format follows the extension (.txt report, .jsonl, .csv).
+        delta (bool): Also write only the leads added, changed or removed since the previous
+                      delta run to <stem>.delta.jsonl, using the hash index <stem>.index.tsv.
+        index_filename (str, optional): Index filename in output/ to compare against and update
+                                        instead of the default <stem>.index.tsv.
+        enrich (list, optional): Related lists to merge into each row (keys of enrich.RELATED_LISTS,
+                                 e.g. ["notes", "activities"]), fetched concurrently as pages stream.
+        enrich_concurrency (int): Related-list requests in flight at once.
+        enrich_cache_ttl (float): Reuse related lists fetched by earlier runs within this many
+                                  seconds (0 = cache for this run only).
+        call_timeout (float, optional): Seconds to wait for any single API call.
+        run_timeout (float, optional): Deadline for the whole run; requests still open when it
+                                       passes time out and the run stops with what it has.
+        hedge (bool): Re-issue page GETs that are slower than the recent p95; first answer wins.
+        compression_level (int, optional): Level for a compressed output file (.jsonl.gz, .csv.zst, ...).
+
+    Returns:
+        bool: True if every page was fetched (up to Zoho's 2000-record page limit, which is
+              reported but not an error) and the output (and delta) written; False otherwise.
     """
     cv_id_to_use = custom_view_id or QUALIFICATION_CUSTOM_VIEW_ID
 
@@ -32,7 +68,7 @@ def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qu
         error_msg = "Custom View ID is required for qualification. Provide --cvid or set QUALIFICATION_CUSTOM_VIEW_ID in .env."
         print(f"❌ Error: {error_msg}")
         logger.error(f"Qualification failed: {error_msg}")
-        return # Stop execution
+        return False # Stop execution
 
     print("=" * 60)
     print(f"LEAD QUALIFICATION PROCESS - Custom View ID: {cv_id_to_use}")
@@ -40,18 +76,55 @@ def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qu
     logger.info(f"Starting qualification process for leads from Custom View ID: {cv_id_to_use}")
 
     ops = RecordOperations(MODULE) # Pass the module name
-    qualified_leads_cv = []
+    policy = CallPolicy(call_timeout=call_timeout, run_timeout=run_timeout, hedge=hedge)
+    transfer_start = transfer_snapshot()
     page = 1
     more_records = True
+    run_complete = True # Cleared when pagination stops on an error
+    page_limit_reached = False # Zoho serves only the first MAX_PAGE_BASED_RECORDS leads through `page`
+    max_page = MAX_PAGE_BASED_RECORDS // MAX_PER_PAGE
+    outputs_written = True # Cleared when the results or the delta could not be written
     records_processed = 0
 
+    # --- Open Output (rows are written as pages arrive) ---
+    output_dir = PROJECT_ROOT / "output"
+    output_path = output_dir / output_filename
+    tracker = None
+    enricher = None
+    try:
+        output_dir.mkdir(exist_ok=True)
+        writer = open_writer(output_path, source_label=f"Custom View ID {cv_id_to_use}",
+                             extra_fields=[f"related_{kind}" for kind in enrich or []],
+                             compression_level=compression_level)
+        if delta:
+            index_path, delta_path = _delta_paths(output_path, index_filename)
+            tracker = DeltaTracker(index_path, delta_path)
+            logger.info(f"Change detection enabled: index {index_path} ({tracker.baseline_size} leads), delta {delta_path}")
+        if enrich:
+            enricher = RelatedEnricher(
+                enrich, concurrency=enrich_concurrency, cache=RelatedRecordsCache(ttl=enrich_cache_ttl),
+                fetcher=lambda lead_id, kind, per_lead: policy.call(
+                    fetch_related, lead_id, kind, per_lead, label=f"{kind} of lead {lead_id}", idempotent=True
+                )
+            )
+            logger.info(f"Enrichment enabled: {', '.join(enrich)} with {enrich_concurrency} concurrent requests")
+    except Exception as e:
+        print(f"❌ Error opening output file {output_filename}: {e}")
+        logger.error(f"Error opening output file {output_path}: {e}", exc_info=True)
+        return False
+
+    def _emit(row):
+        writer.write(row)
+        if tracker is not None:
+            tracker.observe(row)
+
     print("Starting data retrieval from Custom View...")
 
     while more_records:
         param_instance = ParameterMap()
         param_instance.add(GetRecordsParam.cvid, cv_id_to_use)
         param_instance.add(GetRecordsParam.fields, ",".join(QUALIFY_FIELDS))
-        param_instance.add(GetRecordsParam.per_page, 200)
+        param_instance.add(GetRecordsParam.per_page, MAX_PER_PAGE)
         param_instance.add(GetRecordsParam.page, page)
 
         print(f"Fetching page {page}...")
@@ -59,7 +132,8 @@ def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qu
 
         try:
             # Execute the request
-            response = ops.get_records(param_instance, HeaderMap())
+            response = policy.call(ops.get_records, param_instance, HeaderMap(),
+                                   label=f"get_records page {page}", idempotent=True)
 
             if response is not None:
                 status_code = response.get_status_code()
@@ -87,37 +161,38 @@ def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qu
                                 print("API indicates more records exist, but current page is empty. Stopping.")
                                 logger.warning(f"Empty data on page {page} for CV {cv_id_to_use}, but info.get_more_records()=True. Stopping loop.")
                                 more_records = False
+                                run_complete = False
                         else:
                             current_page_count = len(records)
                             records_processed += current_page_count
                             print(f"Processing {current_page_count} records from page {page} (Total processed: {records_processed})...")
                             for index, record in enumerate(records):
                                 try:
-                                    lead_id = record.get_id()
-                                    first_name = extract_field_value(record, "First_Name")
-                                    last_name = extract_field_value(record, "Last_Name")
-                                    email = extract_field_value(record, "Email")
-                                    notes = extract_field_value(record, "Additional_Relocation_Notes")
-                                    status = extract_field_value(record, "Lead_Status")
+                                    row = lead_to_row(record)
                                     if index < 5:
-                                        logger.debug(f"CV Record {index+1}/{current_page_count} - ID: {lead_id}, Status: '{status}', Email: '{email}'")
-                                    full_name = ' '.join(filter(None, [first_name, last_name]))
-                                    qualified_leads_cv.append({
-                                        'id': lead_id,
-                                        'name': full_name.strip() or 'N/A',
-                                        'email': email or 'N/A',
-                                        'status': status or 'N/A',
-                                        'notes': notes.strip() if notes else 'N/A'
-                                    })
+                                        logger.debug(f"CV Record {index+1}/{current_page_count} - ID: {row['id']}, Status: '{row['status']}', Email: '{row['email']}'")
+                                    if enricher is None:
+                                        _emit(row)
+                                    else: # Rows come back in order once their related lists arrive
+                                        for ready_row in enricher.submit(row):
+                                            _emit(ready_row)
                                 except Exception as inner_ex:
                                     lead_id_str = str(getattr(record, 'id', 'UNKNOWN_ID'))
                                     print(f"Error processing individual record {lead_id_str} from CV: {inner_ex}")
                                     logger.error(f"Error processing individual record {lead_id_str} from CV {cv_id_to_use} on page {page}", exc_info=True)
+                                    run_complete = False # A skipped lead must not be reported as removed
 
                             if info is not None and isinstance(info, RecordInfo) and info.get_more_records() is True:
-                                page += 1
-                                more_records = True
-                                logger.info("More records indicated by API, proceeding to next page.")
+                                if page >= max_page: # The next page would fail with Zoho's page-limit error
+                                    print(f"⚠️ Custom View {cv_id_to_use} has more than {MAX_PAGE_BASED_RECORDS} leads; "
+                                          f"only the first {MAX_PAGE_BASED_RECORDS} can be fetched page by page.")
+                                    logger.warning(f"Qualification of CV {cv_id_to_use} stopped at the {MAX_PAGE_BASED_RECORDS}-record page limit.")
+                                    more_records = False
+                                    page_limit_reached = True
+                                else:
+                                    page += 1
+                                    more_records = True
+                                    logger.info("More records indicated by API, proceeding to next page.")
                             else:
                                 print("No more records indicated by API after processing page.")
                                 logger.info("No more records indicated by API info object.")
@@ -128,6 +203,7 @@ def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qu
                         print(f"⚠️ Unexpected response object type for get_records (Status 200): {type(response_object)}")
                         logger.warning(f"Unexpected response object type for get_records page {page} (Status 200): {type(response_object)}")
                         more_records = False
+                        run_complete = False
                 else: # Handle other non-200, non-204 status codes
                     error_message = f"Unexpected HTTP status code {status_code} received."
                     try: # Try to log APIException details if available
@@ -146,56 +222,82 @@ def qualify_leads_from_custom_view(custom_view_id=None, output_filename="lead_qu
                         logger.error(f"Could not parse error response object for status {status_code}: {log_ex}")
                     print(f"❌ {error_message}")
                     more_records = False
+                    run_complete = False
             else: # response is None
                 print("❌ API call failed: No response received.")
                 logger.error(f"API call failed for get_records page {page}: No response received.")
                 more_records = False
+                run_complete = False
 
-        # --- Specific APIException Catch ---
-        except APIException as ex:
-            status_val = ex.get_status().get_value() if ex.get_status() else 'N/A'
-            code_val = ex.get_code().get_value() if ex.get_code() else 'N/A'
-            message_val = ex.get_message().get_value() if ex.get_message() else 'N/A'
-            details_val = ex.get_details()
-            print(f"❌ A Zoho APIException occurred during pagination: Status={status_val}, Code={code_val}, Message={message_val}")
-            logger.error(f"Zoho APIException during get_records page {page} for CV {cv_id_to_use}: Status={status_val}, Code={code_val}, Msg={message_val}, Details={details_val}", exc_info=True)
-            more_records = False # Stop on API error
+        # --- Timeout Catch ---
+        except DeadlineExceeded as e:
+            print(f"❌ {e} Stopping with the leads fetched so far.")
+            logger.error(f"Deadline exceeded for CV {cv_id_to_use}: {e}")
+            more_records = False
+            run_complete = False
+        # --- Specific SDKException Catch ---
+        except SDKException as ex:
+            print(f"❌ A Zoho SDKException occurred during pagination: {ex}")
+            logger.error(f"Zoho SDKException during get_records page {page} for CV {cv_id_to_use}: {ex}", exc_info=True)
+            more_records = False # Stop on SDK error
+            run_complete = False
         # --- General Exception Catch ---
         except Exception as e:
             print(f"❌ An unexpected error occurred during pagination: {e}")
             logger.error(f"Unexpected error during get_records page {page} for CV {cv_id_to_use}", exc_info=True)
             more_records = False # Stop on other errors
+            run_complete = False
+
+    if enricher is not None:
+        try:
+            for row in enricher.drain():
+                _emit(row)
+            print(f"Enrichment: {enricher.stats['fetched']} related lists fetched, {enricher.stats['cached']} from cache, "
+                  f"{enricher.stats['errors']} failed.")
+            logger.info(f"Enrichment finished for CV {cv_id_to_use}: {enricher.stats}")
+            if enricher.stats['errors']:
+                print("⚠️ Some related lists could not be fetched; they are written as empty (null) values.")
+        except Exception as e:
+            print(f"❌ Error finishing enrichment: {e}")
+            logger.error(f"Error finishing enrichment for CV {cv_id_to_use}: {e}", exc_info=True)
+            run_complete = False
 
-    # --- Process and Write Results ---
+    # --- Finish Writing Results ---
     print("\n" + "=" * 60)
-    print(f"RESULTS: Found {len(qualified_leads_cv)} Leads from Custom View {cv_id_to_use} (Processed {records_processed} total records)")
+    print(f"RESULTS: Found {writer.count} Leads from Custom View {cv_id_to_use} (Processed {records_processed} total records)")
     print("=" * 60 + "\n")
-    output_dir = PROJECT_ROOT / "output"
     try:
-        output_dir.mkdir(exist_ok=True)
-        output_path = output_dir / output_filename
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(f"RESULTS: Found {len(qualified_leads_cv)} Leads from Custom View ID {cv_id_to_use}\n")
-            f.write(f"(Processed {records_processed} total records across fetched pages)\n")
-            f.write("=" * 60 + "\n\n")
-            if qualified_leads_cv:
-                print(f"Writing {len(qualified_leads_cv)} qualified leads to {output_path}...")
-                for lead in qualified_leads_cv:
-                    f.write(f"Lead ID: {lead.get('id', 'N/A')}\n")
-                    f.write(f"Name:    {lead.get('name', 'N/A')}\n")
-                    f.write(f"Email:   {lead.get('email', 'N/A')}\n")
-                    f.write(f"Status:  {lead.get('status', 'N/A')}\n")
-                    f.write(f"Notes:   {lead.get('notes', 'N/A')}\n")
-                    f.write("-" * 80 + "\n")
-            else:
-                f.write("No leads found or processed successfully from this Custom View.\n")
-                print("  No leads were found or processed successfully from the Custom View.")
+        if hasattr(writer, 'records_processed'):
+            writer.records_processed = records_processed
+        writer.close()
+        if not writer.count:
+            print("  No leads were found or processed successfully from the Custom View.")
         print(f"Results successfully written to {output_path}")
         logger.info(f"Results successfully written to {output_path}")
     except Exception as e:
         print(f"❌ Error writing results to file {output_filename}: {e}")
         logger.error(f"Error writing results to file {output_path}: {e}", exc_info=True)
+        outputs_written = False
+    if tracker is not None:
+        try:
+            all_seen = run_complete and not page_limit_reached
+            counts = tracker.close(complete=all_seen)
+            print(f"Changes since previous run: {counts['added']} added, {counts['changed']} changed, "
+                  f"{counts['removed'] if all_seen else 'n/a'} removed -> {tracker.delta_path}")
+            if not all_seen:
+                print("⚠️ Not every lead of the view was read: removed leads are not reported, and unseen leads "
+                      "keep their previous index entries.")
+        except Exception as e:
+            print(f"❌ Error writing change delta: {e}")
+            logger.error(f"Error finishing change delta for CV {cv_id_to_use}: {e}", exc_info=True)
+            outputs_written = False
+    if policy.stats['hedged'] or policy.stats['timeouts']:
+        print(f"Call policy: {policy.stats['calls']} calls, {policy.stats['hedged']} hedged "
+              f"({policy.stats['hedge_wins']} won by the hedge), {policy.stats['timeouts']} timed out.")
+    logger.info(f"Call policy stats for CV {cv_id_to_use}: {policy.stats}")
+    logger.info(f"HTTP transfer for CV {cv_id_to_use}: {transfer_summary(since=transfer_start)}")
     print("--- Custom View Qualification Process Finished ---")
     logger.info(f"Custom View qualification process finished for CV ID: {cv_id_to_use}.")
+    return run_complete and outputs_written
 
 # --- End of src/api/leads/qualify.py ---
\ No newline at end of file
@@ -0,0 +1,210 @@
+# src/api/leads/search.py
+"""
+Server-side criteria search for Leads (RecordOperations.search_records).
+
+An alternative to Custom View filtering for ad-hoc filters: conditions given on the
+command line are turned into a Zoho criteria expression, so only matching records are
+transferred and nobody has to build a Custom View in the UI first.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.record import RecordOperations, RecordCountParam
+from zohocrmsdk.src.com.zoho.crm.api import ParameterMap
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+
+# --- Local Imports ---
+from src.core.initialize import logger, PROJECT_ROOT
+from .common import MODULE
+from .fetch import search_page, lead_to_row, PageFetchError, MAX_PER_PAGE, MAX_PAGE_BASED_RECORDS
+from .writers import open_writer
+
+# --- Configuration ---
+DEFAULT_CONCURRENCY = 4
+# Operators accepted by the Zoho search criteria syntax
+CRITERIA_OPERATORS = {
+    "equals", "not_equal", "starts_with", "in", "not_in",
+    "greater_than", "greater_equal", "less_than", "less_equal", "between",
+}
+# Shorthand forms for `--where`; the earliest one in a condition splits it, longest first
+SHORTHAND_OPERATORS = [
+    (">=", "greater_equal"), ("<=", "less_equal"), ("!=", "not_equal"),
+    ("^=", "starts_with"), (">", "greater_than"), ("<", "less_than"), ("=", "equals"),
+]
+
+
+def escape_criteria_value(value):
+    """Escapes characters that have a meaning inside a criteria value."""
+    for ch in ("(", ")", ","):
+        value = value.replace(ch, "\\" + ch)
+    return value
+
+
+def parse_condition(text):
+    """
+    Parses one --where condition into a criteria term.
+
+    Accepts the Zoho form "Field:operator:value" (e.g. "Lead_Status:equals:Not Contacted",
+    "Created_Time:between:2025-01-01T00:00:00+00:00,2025-02-01T00:00:00+00:00") or a
+    shorthand "Field=value", "Field!=value", "Field^=value" (starts with), "Field>=value", etc.
+    Values of `in`, `not_in` and `between` keep their commas as list separators.
+
+    Raises:
+        ValueError: If the condition cannot be parsed or the operator is unknown.
+    """
+    field, operator, value = None, None, None
+    parts = text.split(":", 2)
+    if len(parts) == 3 and parts[1] in CRITERIA_OPERATORS:
+        field, operator, value = parts
+    else:
+        # Split at the earliest operator, so "Description=a<b" compares Description
+        matches = [(text.find(symbol), -len(symbol), symbol, name)
+                   for symbol, name in SHORTHAND_OPERATORS if text.find(symbol) > 0]
+        if matches:
+            position, _, symbol, name = min(matches)
+            field_part = text[:position]
+            if ":" not in field_part:
+                field, operator, value = field_part, name, text[position + len(symbol):]
+    if not field or operator is None:
+        raise ValueError(f"Cannot parse condition '{text}'. Use Field:operator:value or Field=value.")
+    field, value = field.strip(), value.strip()
+    if operator in ("in", "not_in", "between"):
+        value = ",".join(escape_criteria_value(v.strip()) for v in value.split(","))
+    else:
+        value = escape_criteria_value(value)
+    return f"({field}:{operator}:{value})"
+
+
+def build_criteria(conditions, match="and"):
+    """
+    Combines --where conditions into one criteria expression.
+
+    Args:
+        conditions (list[str]): Conditions accepted by parse_condition.
+        match (str): "and" (all conditions) or "or" (any condition).
+
+    Returns:
+        str: e.g. "((Lead_Status:equals:Not Contacted)and(Email:starts_with:info))"
+    """
+    if match not in ("and", "or"):
+        raise ValueError(f"match must be 'and' or 'or', not '{match}'.")
+    terms = [parse_condition(c) for c in conditions]
+    if not terms:
+        raise ValueError("At least one condition is required.")
+    if len(terms) == 1:
+        return terms[0]
+    return "(" + match.join(terms) + ")"
+
+
+def count_matches(ops, criteria):
+    """
+    Number of leads matching `criteria` (record_count, one API call).
+
+    Returns:
+        int or None: The count, or None if it could not be read.
+    """
+    param_instance = ParameterMap()
+    param_instance.add(RecordCountParam.criteria, criteria)
+    try:
+        response = ops.record_count(param_instance)
+        count = response.get_object().get_count() if response is not None else None
+    except (SDKException, AttributeError) as e:
+        logger.warning(f"Could not count matches of '{criteria}', fetching pages one at a time: {e}")
+        return None
+    return count if isinstance(count, int) else None
+
+
+def iter_search_pages(criteria, per_page=MAX_PER_PAGE, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Yields (records, more_records) for each page of a search, in order.
+
+    The first page is fetched alone. When more pages exist, the matches are counted
+    once and exactly the pages holding them (up to Zoho's 2000-record limit for
+    page-based access) are requested `concurrency` at a time, so no credits are spent
+    on pages past the end. Without a count, pages are fetched one after another.
+    more_records of the last page yielded is True when the limit cut the search short.
+
+    Raises:
+        PageFetchError: If a page request fails.
+    """
+    ops = RecordOperations(MODULE)
+    max_page = max(1, MAX_PAGE_BASED_RECORDS // per_page)
+    records, more_records = search_page(ops, criteria, 1, per_page)
+    yield records, more_records
+    if not more_records or max_page == 1:
+        return
+    page = 2
+    total = count_matches(ops, criteria) if concurrency > 1 else None
+    if total is not None:
+        last_page = min(max_page, -(-total // per_page))
+        logger.debug(f"Search '{criteria}' has {total} matches; fetching pages 2-{last_page}.")
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            while more_records and page <= last_page:
+                window = range(page, min(page + concurrency, last_page + 1))
+                futures = [pool.submit(search_page, ops, criteria, p, per_page) for p in window]
+                for future in futures:
+                    records, more_records = future.result()
+                    yield records, more_records
+                    page += 1
+                    if not more_records:
+                        return # Fewer matches than counted (records deleted meanwhile)
+    # No count, or more matches than counted: one page at a time
+    while more_records and page <= max_page:
+        records, more_records = search_page(ops, criteria, page, per_page)
+        yield records, more_records
+        page += 1
+
+
+def search_leads(criteria, output_filename="lead_search_results.txt", per_page=MAX_PER_PAGE,
+                 concurrency=DEFAULT_CONCURRENCY):
+    """
+    Searches Leads with a criteria expression and streams the matches to a file.
+
+    Args:
+        criteria (str): Zoho criteria expression (see build_criteria).
+        output_filename (str): Output file in the project's output/ dir (.txt report, .jsonl, .csv).
+        per_page (int): Records per page (max 200).
+        concurrency (int): Pages requested in parallel after the first one.
+
+    Returns:
+        bool: True if every match was written; False on errors or when Zoho's
+              2000-record search limit left matches out.
+    """
+    print("=" * 60)
+    print(f"LEAD SEARCH - Criteria: {criteria}")
+    print("=" * 60)
+    logger.info(f"Starting lead search with criteria {criteria} (concurrency={concurrency}).")
+
+    output_dir = PROJECT_ROOT / "output"
+    output_path = output_dir / output_filename
+    started = time.monotonic()
+    success = True
+    truncated = False
+    try:
+        output_dir.mkdir(exist_ok=True)
+        with open_writer(output_path, source_label=f"search {criteria}") as writer:
+            for page, (records, truncated) in enumerate(iter_search_pages(criteria, per_page, concurrency), start=1):
+                if records:
+                    print(f"Processing {len(records)} records from page {page} (Total: {writer.count + len(records)})...")
+                for record in records:
+                    writer.write(lead_to_row(record))
+    except PageFetchError as e:
+        print(f"❌ Search stopped: {e}")
+        logger.error(f"Lead search failed: {e}")
+        success = False
+    except Exception as e:
+        print(f"❌ An unexpected error occurred during search: {e}")
+        logger.error(f"Unexpected error during lead search for criteria {criteria}", exc_info=True)
+        return False
+
+    if success and truncated:
+        print(f"⚠️ More than {MAX_PAGE_BASED_RECORDS} leads match; only the first {writer.count} were written. Narrow the criteria.")
+        logger.warning(f"Search '{criteria}' has more than {MAX_PAGE_BASED_RECORDS} matches; result truncated.")
+        success = False
+    print(f"\nRESULTS: Found {writer.count} Leads matching {criteria} in {time.monotonic() - started:.1f}s")
+    print(f"Results written to {output_path}")
+    logger.info(f"Lead search finished: {writer.count} leads written to {output_path} (success={success}).")
+    return success
+
+# --- End of src/api/leads/search.py ---
@@ -6,14 +6,17 @@ from zohocrmsdk.src.com.zoho.crm.api.record import (
     ActionWrapper, GetRecordParam, Field, ResponseWrapper
 )
 from zohocrmsdk.src.com.zoho.crm.api import ParameterMap, HeaderMap
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
 
 # Import logger from the corrected location
 from src.core.initialize import logger
+from src.core.deadline import CallPolicy, DeadlineExceeded
 # Import constants needed
 from .common import MODULE, UPDATE_REQ_FIELDS
 
 
-def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
+def update_single_lead_mobile(target_lead_id: int, new_mobile: str, call_timeout: float = None,
+                              run_timeout: float = None, hedge: bool = False) -> bool:
     """Updates the Mobile field for a single lead ID.
 
     Includes a workaround for potential mandatory field requirements during updates
@@ -22,6 +25,10 @@ def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
     Args:
         target_lead_id: The Zoho CRM ID of the lead to update.
         new_mobile: The new mobile number string.
+        call_timeout: Seconds to wait for each API call (None = no limit).
+        run_timeout: Deadline for the fetch and the update together (None = no limit).
+        hedge: Re-issue the (idempotent) fetch if it is slower than the recent p95.
+                The update itself is never sent twice.
 
     Returns:
         True if the update was successful, False otherwise.
@@ -38,6 +45,7 @@ def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
     print(f"\n--- Starting Update Process for Lead ID: {target_lead_id} ---")
     logger.info(f"Attempting update for Lead ID: {target_lead_id} with new mobile.")
     ops = RecordOperations(MODULE) # Pass module name
+    policy = CallPolicy(call_timeout=call_timeout, run_timeout=run_timeout, hedge=hedge)
     fetched_record_data = None # Define scope outside try block
 
     # ---- 1 · Fetch potentially required fields ----
@@ -46,7 +54,8 @@ def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
         fetch_params = ParameterMap()
         fetch_params.add(GetRecordParam.fields, ",".join(UPDATE_REQ_FIELDS))
         header_instance = HeaderMap()
-        resp = ops.get_record(target_lead_id, fetch_params, header_instance)
+        resp = policy.call(ops.get_record, target_lead_id, fetch_params, header_instance,
+                           label=f"get_record {target_lead_id}", idempotent=True)
 
         if resp is not None:
             status_code = resp.get_status_code()
@@ -93,14 +102,15 @@ def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
             logger.error(f"Fetch for update workaround failed for {target_lead_id}: No response received.")
             return False # Fail early
 
-    # --- Specific APIException Catch for Fetch ---
-    except APIException as ex:
-        status_val = ex.get_status().get_value() if ex.get_status() else 'N/A'
-        code_val = ex.get_code().get_value() if ex.get_code() else 'N/A'
-        message_val = ex.get_message().get_value() if ex.get_message() else 'N/A'
-        details_val = ex.get_details()
-        print(f"❌ A Zoho APIException occurred during fetch: Status={status_val}, Code={code_val}, Message={message_val}")
-        logger.error(f"Fetch process failed for {target_lead_id} (SDK APIException): Status={status_val}, Code={code_val}, Msg={message_val}, Details={details_val}", exc_info=True)
+    # --- Timeout Catch for Fetch ---
+    except DeadlineExceeded as e:
+        print(f"❌ Fetch timed out: {e}")
+        logger.error(f"Fetch for update workaround timed out for {target_lead_id}: {e}")
+        return False
+    # --- Specific SDKException Catch for Fetch ---
+    except SDKException as ex:
+        print(f"❌ A Zoho SDKException occurred during fetch: {ex}")
+        logger.error(f"Fetch process failed for {target_lead_id} (SDKException): {ex}", exc_info=True)
         return False
     # --- General Exception Catch for Fetch ---
     except Exception as e:
@@ -163,7 +173,8 @@ def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
     try:
         print("Sending update request to Zoho...")
         header_instance = HeaderMap() # Re-declare or use the one from fetch
-        update_response = ops.update_record(target_lead_id, body, header_instance)
+        update_response = policy.call(ops.update_record, target_lead_id, body, header_instance,
+                                      label=f"update_record {target_lead_id}")
 
         # Process Response
         if update_response is not None:
@@ -217,14 +228,15 @@ def update_single_lead_mobile(target_lead_id: int, new_mobile: str) -> bool:
             logger.error(f"Update failed for {target_lead_id}: No response received from server.")
             return False
 
-    # --- Specific APIException Catch for Update ---
-    except APIException as ex:
-         status_val = ex.get_status().get_value() if ex.get_status() else 'N/A'
-         code_val = ex.get_code().get_value() if ex.get_code() else 'N/A'
-         message_val = ex.get_message().get_value() if ex.get_message() else 'N/A'
-         details_val = ex.get_details()
-         print(f"❌ A Zoho APIException occurred during update: Status={status_val}, Code={code_val}, Message={message_val}")
-         logger.error(f"Update process failed for {target_lead_id} (SDK APIException): Status={status_val}, Code={code_val}, Msg={message_val}, Details={details_val}", exc_info=True)
+    # --- Timeout Catch for Update ---
+    except DeadlineExceeded as e:
+         print(f"❌ Update timed out: {e} The update may still have been applied; check the lead before retrying.")
+         logger.error(f"Update for {target_lead_id} timed out, outcome unknown: {e}")
+         return False
+    # --- Specific SDKException Catch for Update ---
+    except SDKException as ex:
+         print(f"❌ A Zoho SDKException occurred during update: {ex}")
+         logger.error(f"Update process failed for {target_lead_id} (SDKException): {ex}", exc_info=True)
          return False
     # --- General Exception Catch for Update ---
     except Exception as e:
@@ -0,0 +1,399 @@
+# src/api/leads/write_behind.py
+"""
+Write-behind queue for lead field updates.
+
+Updates are accepted immediately, merged per lead id (last write wins per field) and
+flushed later as batched update_records calls of up to 100 records, either when a
+full batch is pending or after `max_delay` seconds. Several updates to the same lead
+within the window therefore cost a single record in a single call, instead of one
+GET+PUT each as with update_single_lead_mobile.
+
+Every accepted update is appended to a journal file before enqueue() returns, and the
+journal is compacted to the still-pending updates after each successful flush, so a
+crash loses nothing: the next queue opened on the same journal picks the updates up.
+A crash between a successful API call and the compaction only re-sends those updates.
+
+A queue holds an exclusive lock on its journal (a `.lock` file next to it) for its
+whole lifetime, so a second process cannot compact away entries the owner just
+appended. Opening a journal that another queue owns raises JournalLockedError; send
+the update to the owner instead (e.g. `cli.py submit queue-update ...` when the
+worker server holds the queue).
+"""
+import os
+import json
+import time
+import threading
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Zoho SDK Imports ---
+from zohocrmsdk.src.com.zoho.crm.api.record import (
+    RecordOperations, BodyWrapper, Record, APIException, SuccessResponse, ActionWrapper
+)
+from zohocrmsdk.src.com.zoho.crm.api import HeaderMap
+
+# --- Local Imports ---
+from src.core.initialize import logger, DATA_DIR
+from .common import MODULE, UPDATE_REQ_FIELDS
+from .fetch import fetch_records_by_ids, describe_api_exception
+
+# --- Configuration ---
+MAX_BATCH_SIZE = 100 # update_records limit
+DEFAULT_MAX_DELAY = 5.0 # seconds an update may wait before a time-triggered flush
+DEFAULT_JOURNAL_PATH = DATA_DIR / "update_queue.journal.jsonl"
+
+
+class JournalLockedError(RuntimeError):
+    """Raised when another queue (usually another process) owns the journal."""
+
+
+def _lock_journal(journal_path):
+    """Takes the exclusive, non-blocking lock for a journal. Returns the open lock file."""
+    lock_path = f"{journal_path}.lock"
+    lock_file = open(lock_path, "a+", encoding="utf-8")
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.seek(0)
+        owner = lock_file.read().strip() or "unknown"
+        lock_file.close()
+        raise JournalLockedError(f"Update journal {journal_path} is in use by another queue (pid {owner}).")
+    lock_file.seek(0)
+    lock_file.truncate()
+    lock_file.write(f"{os.getpid()}\n")
+    lock_file.flush()
+    return lock_file
+
+
+def _unlock_journal(lock_file):
+    # Closing the file releases the lock; the .lock file itself stays for the next owner
+    lock_file.close()
+
+
+def send_update_batch(updates, include_required_fields=True):
+    """
+    Default sender: pushes one batch with update_records.
+
+    Applies the same mandatory-field workaround as update.py: the current values of
+    UPDATE_REQ_FIELDS are fetched for the whole batch (one get_records call) and sent
+    along with the changes.
+
+    Args:
+        updates (dict): {lead_id: {field: value}} with at most 100 leads.
+
+    Returns:
+        dict: {lead_id: None on success or an error message}. Leads missing from the
+              result were not processed and stay queued.
+
+    Raises:
+        Exception: If the call itself fails; the whole batch stays queued.
+    """
+    ops = RecordOperations(MODULE)
+    ids = list(updates)
+    required = {}
+    if include_required_fields:
+        for record in fetch_records_by_ids(ops, ids, fields=UPDATE_REQ_FIELDS):
+            required[str(record.get_id())] = {
+                f: record.get_key_value(f) for f in UPDATE_REQ_FIELDS if record.get_key_value(f) is not None
+            }
+
+    records = []
+    for lead_id in ids:
+        record = Record()
+        record.set_id(int(lead_id))
+        for field, value in {**required.get(lead_id, {}), **updates[lead_id]}.items():
+            record.add_key_value(field, value)
+        records.append(record)
+    body = BodyWrapper()
+    body.set_data(records)
+    body.set_trigger(["workflow", "blueprint"])
+
+    response = ops.update_records(body, HeaderMap())
+    if response is None:
+        raise RuntimeError("update_records: No response received.")
+    response_object = response.get_object()
+    if isinstance(response_object, APIException):
+        raise RuntimeError(f"update_records failed: {describe_api_exception(response_object)}")
+    if not isinstance(response_object, ActionWrapper):
+        raise RuntimeError(f"update_records: Unexpected response object type {type(response_object)}")
+
+    results = {}
+    # Action responses come back in request order
+    for lead_id, action_response in zip(ids, response_object.get_data() or []):
+        if isinstance(action_response, SuccessResponse):
+            results[lead_id] = None
+        elif isinstance(action_response, APIException):
+            results[lead_id] = describe_api_exception(action_response)
+        else:
+            results[lead_id] = f"Unexpected action response type {type(action_response)}"
+    return results
+
+
+class LeadUpdateQueue:
+    """
+    Coalescing, journaled write-behind queue for lead updates.
+
+    Args:
+        journal_path: Journal file (created if missing; pending updates in it are restored).
+        batch_size (int): Records per update_records call (max 100); also the size trigger.
+        max_delay (float): Seconds before pending updates are flushed regardless of size.
+        sender: Callable taking {lead_id: {field: value}} and returning {lead_id: error or None}.
+                Defaults to send_update_batch.
+        fsync (bool): fsync the journal on every enqueue (durable across power loss).
+
+    Raises:
+        JournalLockedError: If another queue holds the journal.
+    """
+
+    def __init__(self, journal_path=DEFAULT_JOURNAL_PATH, batch_size=MAX_BATCH_SIZE,
+                 max_delay=DEFAULT_MAX_DELAY, sender=None, fsync=True):
+        self.journal_path = str(journal_path)
+        self.failed_path = f"{os.path.splitext(self.journal_path)[0]}.failed.jsonl"
+        self.batch_size = max(1, min(int(batch_size), MAX_BATCH_SIZE))
+        self.max_delay = max_delay
+        self.sender = sender or send_update_batch
+        self.fsync = fsync
+        self.stats = {'enqueued': 0, 'sent': 0, 'failed': 0, 'calls': 0}
+        self._pending = {} # lead_id -> {field: value}; dicts keep insertion (arrival) order
+        self._oldest = None # monotonic time of the oldest pending update
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._closing = False
+        self._closed = False
+        self._journal_lock = _lock_journal(self.journal_path)
+        try:
+            self._restore_journal()
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        except BaseException:
+            _unlock_journal(self._journal_lock)
+            raise
+
+    # --- Journal ---
+    def _restore_journal(self):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping torn line in update journal {self.journal_path}.")
+                    continue
+                self._merge(str(entry["id"]), entry["fields"])
+        if self._pending:
+            logger.info(f"Restored {len(self._pending)} pending lead updates from {self.journal_path}.")
+
+    def _append_journal(self, lead_id, fields):
+        self._journal.write(json.dumps({'id': lead_id, 'fields': fields}, ensure_ascii=False, default=str) + "\n")
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+
+    def _compact_journal(self):
+        """Rewrites the journal with only the updates still pending."""
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for lead_id, fields in self._pending.items():
+                f.write(json.dumps({'id': lead_id, 'fields': fields}, ensure_ascii=False, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal.close()
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+
+    # --- Queueing ---
+    def _merge(self, lead_id, fields):
+        if lead_id not in self._pending and self._oldest is None:
+            self._oldest = time.monotonic()
+        self._pending.setdefault(lead_id, {}).update(fields)
+
+    def enqueue(self, lead_id, fields):
+        """
+        Queues field changes for a lead. Returns once the change is journaled.
+
+        Args:
+            lead_id: Zoho CRM ID of the lead.
+            fields (dict): {API field name: new value}, e.g. {"Mobile": "+15551234567"}.
+        """
+        if not fields:
+            raise ValueError("At least one field is required.")
+        lead_id = str(int(lead_id))
+        with self._lock:
+            if self._closing:
+                raise RuntimeError("Update queue is closed.")
+            self._append_journal(lead_id, fields)
+            self._merge(lead_id, fields)
+            self.stats['enqueued'] += 1
+            self._wakeup.notify() # Flusher re-evaluates the size and time triggers
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    # --- Flushing ---
+    def _take_batch(self):
+        with self._lock:
+            ids = list(self._pending)[:self.batch_size]
+            batch = {lead_id: self._pending.pop(lead_id) for lead_id in ids}
+            if not self._pending:
+                self._oldest = None
+            return batch
+
+    def _record_failures(self, failures):
+        with open(self.failed_path, "a", encoding="utf-8") as f:
+            for lead_id, (fields, error) in failures.items():
+                f.write(json.dumps({'id': lead_id, 'fields': fields, 'error': error}, ensure_ascii=False, default=str) + "\n")
+
+    def flush(self, max_batches=None):
+        """
+        Sends pending updates in batches until the queue is empty (or max_batches were sent).
+
+        Returns:
+            bool: True if every attempted batch call succeeded. Records rejected by Zoho
+                  are not retried; they are logged and appended to <journal>.failed.jsonl.
+        """
+        with self._flush_lock:
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                batch = self._take_batch()
+                if not batch:
+                    return True
+                batches += 1
+                try:
+                    results = self.sender(batch)
+                except Exception as e:
+                    # Put the batch back; newer values for the same fields win
+                    with self._lock:
+                        for lead_id, fields in batch.items():
+                            self._pending[lead_id] = {**fields, **self._pending.get(lead_id, {})}
+                        if self._oldest is None:
+                            self._oldest = time.monotonic()
+                    logger.error(f"Update queue flush of {len(batch)} leads failed, will retry: {e}", exc_info=True)
+                    return False
+                failures = {i: (batch[i], err) for i, err in results.items() if err is not None}
+                unprocessed = {i: f for i, f in batch.items() if i not in results}
+                with self._lock:
+                    self.stats['calls'] += 1
+                    self.stats['sent'] += len(results) - len(failures)
+                    self.stats['failed'] += len(failures)
+                    for lead_id, fields in unprocessed.items():
+                        self._pending[lead_id] = {**fields, **self._pending.get(lead_id, {})}
+                    self._compact_journal()
+                if failures:
+                    self._record_failures(failures)
+                    for lead_id, (_, error) in failures.items():
+                        logger.error(f"Queued update for lead {lead_id} rejected: {error}")
+                logger.info(f"Update queue flushed {len(batch)} leads in one call "
+                            f"({len(failures)} rejected, {len(unprocessed)} requeued, {self.pending_count()} pending).")
+            return True
+
+    def _flush_loop(self):
+        while True:
+            with self._lock:
+                while not self._closing:
+                    if len(self._pending) >= self.batch_size:
+                        break
+                    if self._oldest is not None:
+                        remaining = self.max_delay - (time.monotonic() - self._oldest)
+                        if remaining <= 0:
+                            break
+                        self._wakeup.wait(timeout=remaining)
+                    else:
+                        self._wakeup.wait()
+                if self._closing:
+                    return
+            if not self.flush(max_batches=1):
+                time.sleep(min(self.max_delay, 30)) # Back off before retrying a failed call
+
+    def start(self):
+        """Starts the background flusher (size and time triggers)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flush_loop, name="zoho-update-queue", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self, flush=True):
+        """Stops the flusher and, by default, sends everything still pending."""
+        with self._lock:
+            self._closing = True
+            self._wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=30)
+            self._thread = None
+        ok = self.flush() if flush else True
+        with self._lock:
+            if not self._closed:
+                self._journal.close()
+                _unlock_journal(self._journal_lock)
+                self._closed = True
+        return ok
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# --- Process-wide Queue ---
+_default_queue = None
+_default_queue_kwargs = None
+_default_queue_lock = threading.Lock()
+
+
+def _normalize_queue_kwargs(kwargs):
+    kwargs = dict(kwargs)
+    kwargs['journal_path'] = os.path.abspath(str(kwargs.get('journal_path', DEFAULT_JOURNAL_PATH)))
+    return kwargs
+
+
+def get_update_queue(**kwargs):
+    """
+    Returns the process-wide queue, creating and starting it on first use. Inside the
+    worker server (`cli.py serve`) it lives across jobs, which is what lets bursts of
+    submitted updates coalesce.
+
+    Raises:
+        ValueError: If the queue already exists with a different journal or settings.
+        JournalLockedError: If another process owns the journal.
+    """
+    global _default_queue, _default_queue_kwargs
+    requested = _normalize_queue_kwargs(kwargs)
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = LeadUpdateQueue(**kwargs).start()
+            _default_queue_kwargs = requested
+        elif requested != _default_queue_kwargs:
+            raise ValueError(f"The update queue is already open with {_default_queue_kwargs}; "
+                             f"it cannot be reused with {requested}.")
+        return _default_queue
+
+
+def existing_update_queue(journal_path=DEFAULT_JOURNAL_PATH):
+    """Returns the process-wide queue if it is open on journal_path, else None."""
+    with _default_queue_lock:
+        if _default_queue is not None and _default_queue_kwargs['journal_path'] == os.path.abspath(str(journal_path)):
+            return _default_queue
+        return None
+
+
+def close_update_queue():
+    """Flushes and closes the process-wide queue, if one was created."""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is not None:
+            _default_queue.close()
+            _default_queue = None
+
+# --- End of src/api/leads/write_behind.py ---
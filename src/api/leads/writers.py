@@ -0,0 +1,218 @@
+# src/api/leads/writers.py
+"""
+Streaming output writers for lead rows (the dicts produced by fetch.lead_to_row).
+
+The format is picked from the output file extension:
+    .txt   -> the human-readable qualification report (default, as before)
+    .jsonl -> one JSON object per line
+    .csv   -> header row plus one line per lead
+Rows are written as they arrive, so large exports never sit in memory.
+Enriched rows carry extra `related_<kind>` lists (see enrich.py); CSV writes them as
+JSON cells and the text report lists them under each lead.
+
+A trailing .gz or .zst compresses the file as it is written, e.g. leads.jsonl.gz or
+leads.csv.zst. gzip is built in; zstd needs the optional `zstandard` package.
+"""
+import io
+import os
+import csv
+import gzip
+import json
+import shutil
+import tempfile
+
+# Columns of a lead row, in output order
+ROW_FIELDS = ["id", "name", "email", "status", "notes"]
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+DEFAULT_COMPRESSION_LEVELS = {"gzip": 6, "zstd": 3}
+COMPRESSION_LEVEL_RANGES = {"gzip": (0, 9), "zstd": (1, 22)}
+
+
+def split_compression(path):
+    """Returns (path without the compression suffix, "gzip" | "zstd" | None)."""
+    name = str(path)
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)], compression
+    return name, None
+
+
+def check_compression_level(path, compression_level):
+    """
+    Returns the level to use for `path`: compression_level, or the default for its suffix when None
+    (None for an uncompressed path).
+
+    Raises:
+        ValueError: If a level is given for a path without a .gz/.zst suffix (it would have no
+                    effect), or is outside the range of the path's compression (gzip 0-9, zstd 1-22).
+    """
+    _, compression = split_compression(path)
+    if compression is None:
+        if compression_level is not None:
+            raise ValueError(f"A compression level was given, but {path} is not compressed; "
+                             f"add .gz or .zst to the output name or drop the level.")
+        return None
+    if compression_level is None:
+        return DEFAULT_COMPRESSION_LEVELS[compression]
+    low, high = COMPRESSION_LEVEL_RANGES[compression]
+    if not low <= compression_level <= high:
+        raise ValueError(f"Compression level {compression_level} is out of range for {compression} ({low}-{high}).")
+    return compression_level
+
+
+def open_text(path, mode="w", compression_level=None, newline=None):
+    """
+    Opens a UTF-8 text file for streaming, compressing/decompressing by the .gz/.zst suffix.
+
+    Args:
+        mode (str): "w" or "r".
+        compression_level (int, optional): gzip 0-9 (default 6) or zstd 1-22 (default 3).
+
+    Raises:
+        ValueError: If compression_level is out of range (see check_compression_level).
+    """
+    _, compression = split_compression(path)
+    if compression is None:
+        return open(path, mode, encoding="utf-8", newline=newline)
+    level = check_compression_level(path, compression_level)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", compresslevel=level, encoding="utf-8", newline=newline)
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("Writing or reading .zst files needs the optional 'zstandard' package (pip install zstandard).")
+    if mode == "w":
+        stream = zstandard.ZstdCompressor(level=level).stream_writer(open(path, "wb"))
+    else:
+        stream = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"))
+    return io.TextIOWrapper(stream, encoding="utf-8", newline=newline)
+
+
+class _RowWriter:
+    """
+    Common context-manager and counting behaviour for all writers. Subclasses implement
+    _write(row) and open their output stream as self._f, which close() closes.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._f = None
+
+    def write(self, row):
+        self._write(row)
+        self.count += 1
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class JsonlWriter(_RowWriter):
+
+    def __init__(self, path, compression_level=None):
+        super().__init__(path)
+        self._f = open_text(path, "w", compression_level)
+
+    def _write(self, row):
+        self._f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+
+
+class CsvWriter(_RowWriter):
+
+    def __init__(self, path, fields=None, compression_level=None):
+        super().__init__(path)
+        self._f = open_text(path, "w", compression_level, newline="")
+        self._writer = csv.DictWriter(self._f, fieldnames=fields or ROW_FIELDS, extrasaction="ignore")
+        self._writer.writeheader()
+
+    def _write(self, row):
+        self._writer.writerow({k: json.dumps(v, ensure_ascii=False, default=str) if isinstance(v, (list, dict)) else v
+                               for k, v in row.items()})
+
+
+class TextReportWriter(_RowWriter):
+    """
+    The original qualification report. The summary header needs the final count,
+    so rows are streamed to a temporary file next to the output and the header is
+    prepended on close.
+
+    Args:
+        path: Output file path.
+        source_label (str): Where the leads came from, e.g. "Custom View ID 123".
+        compression_level (int, optional): Level for a .gz/.zst output path.
+    """
+
+    def __init__(self, path, source_label="Zoho CRM", compression_level=None):
+        super().__init__(path)
+        self.source_label = source_label
+        self.compression_level = compression_level
+        self.records_processed = None # Set by the caller if it differs from count
+        fd, self._body_path = tempfile.mkstemp(prefix=".report-", suffix=".tmp",
+                                               dir=os.path.dirname(os.path.abspath(path)))
+        self._body = os.fdopen(fd, "w+", encoding="utf-8")
+
+    def _write(self, row):
+        self._body.write(f"Lead ID: {row.get('id', 'N/A')}\n")
+        self._body.write(f"Name:    {row.get('name', 'N/A')}\n")
+        self._body.write(f"Email:   {row.get('email', 'N/A')}\n")
+        self._body.write(f"Status:  {row.get('status', 'N/A')}\n")
+        self._body.write(f"Notes:   {row.get('notes', 'N/A')}\n")
+        for key, items in row.items():
+            if key.startswith("related_"):
+                label = f"Related {key[len('related_'):].capitalize()}"
+                if items is None:
+                    self._body.write(f"{label}: (not available)\n")
+                    continue
+                self._body.write(f"{label}: {len(items)}\n")
+                for item in items:
+                    values = [str(v) for k, v in item.items() if k != "id" and v not in (None, "")]
+                    self._body.write(f"  - {' | '.join(values)}\n")
+        self._body.write("-" * 80 + "\n")
+
+    def close(self):
+        processed = self.count if self.records_processed is None else self.records_processed
+        try:
+            with open_text(self.path, "w", self.compression_level) as f:
+                f.write(f"RESULTS: Found {self.count} Leads from {self.source_label}\n")
+                f.write(f"(Processed {processed} total records across fetched pages)\n")
+                f.write("=" * 60 + "\n\n")
+                if self.count:
+                    self._body.seek(0)
+                    shutil.copyfileobj(self._body, f)
+                else:
+                    f.write("No leads found or processed successfully from this source.\n")
+        finally:
+            self._body.close()
+            os.remove(self._body_path)
+
+
+def open_writer(path, source_label="Zoho CRM", extra_fields=None, compression_level=None):
+    """
+    Returns the writer matching the extension of `path` (defaults to the text report).
+    `extra_fields` are CSV columns added after ROW_FIELDS (e.g. related_notes).
+    A trailing .gz/.zst compresses the output at `compression_level`.
+    """
+    name = split_compression(path)[0].lower()
+    if name.endswith(".jsonl"):
+        return JsonlWriter(path, compression_level=compression_level)
+    if name.endswith(".csv"):
+        return CsvWriter(path, fields=ROW_FIELDS + list(extra_fields or []), compression_level=compression_level)
+    return TextReportWriter(path, source_label=source_label, compression_level=compression_level)
+
+
+def iter_jsonl(path):
+    """Yields rows from a .jsonl (or .jsonl.gz / .jsonl.zst) file one at a time."""
+    with open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+# --- End of src/api/leads/writers.py ---
@@ -3,6 +3,7 @@ import sys
 import os
 from pathlib import Path
 import argparse
+import datetime
 import traceback # Keep traceback for unexpected errors
 
 # Ensure the src directory is in the Python path
@@ -11,6 +12,15 @@ PROJECT_ROOT = SRC_DIR.parent # Assuming cli.py is in src/
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT)) # Add project root for 'from src...'
 
+# --- Thin Client Mode ---
+# `submit` only talks to a running worker server (`serve`), so it must NOT pay for
+# SDK imports and initialization. Handle it before anything else is imported.
+if __name__ == "__main__" and len(sys.argv) > 1 and sys.argv[1] == 'submit':
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path=PROJECT_ROOT / '.env') # Picks up WORKER_URL if set
+    from src.core.worker import run_client
+    sys.exit(run_client(sys.argv[2:]))
+
 # --- Early Core Imports (Logging) ---
 # Import the application logger configured in initialize.py
 # This MUST run before the SDK initialization attempt.
@@ -75,6 +85,28 @@ except Exception as e:
 # Import API functions *after* SDK is confirmed initialized.
 try:
     from src.api.leads import update_single_lead_mobile, qualify_leads_from_custom_view
+    from src.api.leads.export import (
+        export_leads_sharded, plan_page_shards, plan_created_shards, DEFAULT_CLAIM_TIMEOUT
+    )
+    from src.api.leads.search import search_leads, build_criteria, DEFAULT_CONCURRENCY
+    from src.api.leads.common import NOTIFICATION_TOKEN, NOTIFICATION_URL, NOTIFICATION_CHANNEL_ID
+    from src.api.leads.mirror import LeadMirror, sync_mirror_from_custom_view, DEFAULT_MIRROR_PATH
+    from src.api.leads.notifications import (
+        NotificationApplier, NotificationReceiver, register_lead_channel, replay_notifications,
+        DEFAULT_RECEIVER_HOST, DEFAULT_RECEIVER_PORT, RECEIVER_PATH
+    )
+    from src.api.leads.writers import open_writer, check_compression_level
+    from src.api.leads.enrich import parse_enrich_kinds, DEFAULT_CONCURRENCY as ENRICH_CONCURRENCY
+    from src.api.leads.write_behind import (
+        LeadUpdateQueue, JournalLockedError, get_update_queue, existing_update_queue, close_update_queue,
+        DEFAULT_JOURNAL_PATH
+    )
+    from src.api.leads.bulk_write import bulk_write_leads, DEFAULT_ROWS_PER_JOB, DEFAULT_POLL_INTERVAL
+    from src.api.leads.mass_update import (
+        mass_update_leads, read_ids_file, MAX_IDS_PER_JOB,
+        DEFAULT_CONCURRENCY as MASS_UPDATE_CONCURRENCY, DEFAULT_POLL_INTERVAL as MASS_UPDATE_POLL_INTERVAL
+    )
+    from src.core import worker
     # Import constants needed for argument parsing or default values
     from src.api.leads.common import (
         TARGET_LEAD_ID_FOR_UPDATE, NEW_MOBILE_FOR_UPDATE,
@@ -86,8 +118,91 @@ except ImportError as e:
      sys.exit(1)
 
 # --- Argument Parsing & Main Execution ---
-def main():
-    """Main entry point for the CLI application."""
+def _parse_cli_datetime(value):
+    """Parses an ISO date/time from the command line, assuming UTC when no offset is given."""
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return parsed
+
+
+def _parse_assignments(assignments, command):
+    """Turns repeated FIELD=VALUE arguments into a dict; returns None (after printing why) if one is malformed."""
+    fields = {}
+    for assignment in assignments:
+        field, sep, value = assignment.partition("=")
+        if not sep or not field.strip():
+            print(f"❌ Error: Invalid --set '{assignment}', expected FIELD=VALUE.")
+            logger.error(f"{command} failed: invalid --set '{assignment}'.")
+            return None
+        fields[field.strip()] = value
+    return fields
+
+
+def _run_mirror_command(args):
+    """Executes the `mirror` sub-actions. Returns an exit code."""
+    if args.mirror_action == 'replay':
+        sent, failed = replay_notifications(args.file, args.url)
+        print(f"{'✅' if not failed else '❌'} Replayed {sent} callbacks to {args.url} ({failed} failed).")
+        return 0 if not failed else 1
+
+    if args.mirror_action == 'register':
+        if not args.url or not args.channel_id or not NOTIFICATION_TOKEN:
+            print("❌ Error: --url, --channel-id and NOTIFICATION_TOKEN (in .env) are required to register a channel.")
+            logger.error("Mirror register failed: missing URL, channel id or NOTIFICATION_TOKEN.")
+            return 1
+        return 0 if register_lead_channel(args.url, NOTIFICATION_TOKEN, args.channel_id, args.expiry_hours, args.renew) else 1
+
+    mirror = LeadMirror(args.db)
+    try:
+        if args.mirror_action == 'sync':
+            if not args.cvid:
+                print("❌ Error: Custom View ID is required for sync. Provide --cvid or set QUALIFICATION_CUSTOM_VIEW_ID in .env.")
+                return 1
+            stored = sync_mirror_from_custom_view(mirror, args.cvid)
+            print(f"✅ Mirror synced: {stored} leads from Custom View {args.cvid} ({mirror.count()} in mirror).")
+
+        elif args.mirror_action == 'serve':
+            if not NOTIFICATION_TOKEN:
+                print("⚠️ NOTIFICATION_TOKEN is not set: callbacks will not be authenticated.")
+                logger.warning("Notification receiver running without a token check.")
+            receiver = NotificationReceiver(
+                NotificationApplier(mirror),
+                token=NOTIFICATION_TOKEN or None,
+                host=args.host,
+                port=args.port,
+                record_path=args.record
+            )
+            receiver.start()
+            print(f"✅ Notification receiver listening on http://{args.host}:{receiver.port}{RECEIVER_PATH} "
+                  f"({mirror.count()} leads in mirror). Press Ctrl+C to stop.")
+            try:
+                receiver.serve_forever()
+            except KeyboardInterrupt:
+                print(f"\nStopping receiver. Applied: {receiver.applier.counts}")
+
+        elif args.mirror_action == 'query':
+            output_dir = PROJECT_ROOT / "output"
+            output_dir.mkdir(exist_ok=True)
+            output_path = output_dir / args.output
+            with open_writer(output_path, source_label=f"lead mirror {args.db}") as writer:
+                for row in mirror.iter_rows(status=args.status):
+                    writer.write(row)
+            print(f"✅ Wrote {writer.count} leads from the mirror to {output_path}")
+    finally:
+        mirror.close()
+    return 0
+
+
+def _add_call_policy_arguments(subparser):
+    """Adds the per-call timeout, run deadline and hedging options shared by qualify and update."""
+    subparser.add_argument('--timeout', type=float, default=None, help='Seconds to wait for each API call (default: no limit)')
+    subparser.add_argument('--deadline', type=float, default=None, help='Seconds for the whole run; requests still open then time out (default: no limit)')
+    subparser.add_argument('--hedge', action='store_true', help='Re-issue read calls slower than the recent p95 and take the first answer')
+
+
+def build_parser():
+    """Builds the argparse parser for all CLI commands."""
     parser = argparse.ArgumentParser(description="Zoho CRM Leads CLI Tool")
     subparsers = parser.add_subparsers(dest='command', help='Available commands', required=True)
 
@@ -103,8 +218,44 @@ def main():
         '--output',
         type=str,
         default="lead_qualification_results.txt",
-        help='Output filename for qualification results (in output/ dir)'
+        help='Output filename for qualification results (in output/ dir); .txt report, .jsonl or .csv, optionally + .gz/.zst'
+    )
+    parser_qualify.add_argument(
+        '--delta',
+        action='store_true',
+        help='Also write only leads added/changed/removed since the previous --delta run to <output stem>.delta.jsonl'
+    )
+    parser_qualify.add_argument(
+        '--index',
+        type=str,
+        default=None,
+        help='Content-hash index file (in output/ dir) to compare against and update (default: <output stem>.index.tsv)'
+    )
+    parser_qualify.add_argument(
+        '--enrich',
+        type=str,
+        default=None,
+        help='Merge related lists into each row, comma-separated: notes,activities'
+    )
+    parser_qualify.add_argument(
+        '--enrich-concurrency',
+        type=int,
+        default=ENRICH_CONCURRENCY,
+        help=f'Related-list requests in flight at once (default: {ENRICH_CONCURRENCY})'
+    )
+    parser_qualify.add_argument(
+        '--enrich-cache-ttl',
+        type=float,
+        default=0,
+        help='Reuse related lists fetched by earlier runs within this many seconds (default: 0, this run only)'
+    )
+    parser_qualify.add_argument(
+        '--compression-level',
+        type=int,
+        default=None,
+        help='Compression level for a .gz (0-9, default 6) or .zst (1-22, default 3) output file; rejected for uncompressed output'
     )
+    _add_call_policy_arguments(parser_qualify)
     # Removed '--status' argument as qualify function doesn't use it currently
 
     # --- Update Command ---
@@ -121,8 +272,132 @@ def main():
         default=NEW_MOBILE_FOR_UPDATE, # Default from .env via common.py
         help=f'New mobile number (default from .env: {"*" * (len(NEW_MOBILE_FOR_UPDATE) - 4) + NEW_MOBILE_FOR_UPDATE[-4:] if NEW_MOBILE_FOR_UPDATE and len(NEW_MOBILE_FOR_UPDATE)>4 else "Not Set"})' # Mask default in help
     )
+    _add_call_policy_arguments(parser_update)
+
+    # --- Write-Behind Update Queue Commands ---
+    parser_queue_update = subparsers.add_parser(
+        'queue-update',
+        help='Queue field updates for a lead; pending updates are merged per lead and sent in batches of 100'
+    )
+    parser_queue_update.add_argument('--id', type=int, required=True, help='Lead ID to update')
+    parser_queue_update.add_argument('--set', action='append', required=True, metavar='FIELD=VALUE', help='Field change, repeatable (e.g. --set Mobile=+15551234567)')
+    parser_queue_update.add_argument('--flush', action='store_true', help='Send all pending updates before returning (standalone use)')
+    parser_queue_update.add_argument('--journal', type=str, default=str(DEFAULT_JOURNAL_PATH), help='Queue journal file (default: zoho_data/update_queue.journal.jsonl)')
+
+    parser_queue_flush = subparsers.add_parser('queue-flush', help='Send every update pending in the queue journal now')
+    parser_queue_flush.add_argument('--journal', type=str, default=str(DEFAULT_JOURNAL_PATH), help='Queue journal file (default: zoho_data/update_queue.journal.jsonl)')
+
+    # --- Bulk Write Command ---
+    parser_bulk = subparsers.add_parser('bulk-write', help='Import/update/upsert a large CSV or JSONL file through Bulk Write jobs')
+    parser_bulk.add_argument('input', type=str, help='CSV (header row = API field names) or JSONL file')
+    parser_bulk.add_argument('--operation', choices=['insert', 'update', 'upsert'], default='upsert', help='Bulk Write operation (default: upsert)')
+    parser_bulk.add_argument('--find-by', type=str, default=None, help='Duplicate-check field for upsert, e.g. Email (update always matches on id)')
+    parser_bulk.add_argument('--org-id', type=str, default=None, help='Zoho CRM org id for the upload (default: ZOHO_ORG_ID in .env)')
+    parser_bulk.add_argument('--rows-per-job', type=int, default=DEFAULT_ROWS_PER_JOB, help=f'Rows per uploaded file/job (default: {DEFAULT_ROWS_PER_JOB})')
+    parser_bulk.add_argument('--poll-interval', type=float, default=DEFAULT_POLL_INTERVAL, help=f'Seconds between job status checks (default: {DEFAULT_POLL_INTERVAL})')
+    parser_bulk.add_argument('--report', type=str, default=None, help='Per-row report CSV in output/ dir (default: <input stem>.bulk_report.csv)')
+
+    # --- Mass Update Command ---
+    parser_mass = subparsers.add_parser('mass-update', help='Set the same field values on every lead of a Custom View or id list with server-side Mass Update jobs')
+    mass_target = parser_mass.add_mutually_exclusive_group(required=True)
+    mass_target.add_argument('--cvid', type=str, help='Custom View ID whose leads are updated (one job)')
+    mass_target.add_argument('--ids-file', type=str, help='File with one lead id per line (or a CSV with ids in the first column)')
+    parser_mass.add_argument('--set', action='append', required=True, metavar='FIELD=VALUE', help='Field value to set, repeatable (e.g. --set Lead_Status=Contacted)')
+    parser_mass.add_argument('--chunk-size', type=int, default=MAX_IDS_PER_JOB, help=f'Ids per job (default/max: {MAX_IDS_PER_JOB})')
+    parser_mass.add_argument('--concurrency', type=int, default=MASS_UPDATE_CONCURRENCY, help=f'Jobs submitted and polled in parallel (default: {MASS_UPDATE_CONCURRENCY})')
+    parser_mass.add_argument('--poll-interval', type=float, default=MASS_UPDATE_POLL_INTERVAL, help=f'Seconds between job status checks (default: {MASS_UPDATE_POLL_INTERVAL})')
+
+    # --- Search Command ---
+    parser_search = subparsers.add_parser('search', help='Search leads server-side with criteria (no Custom View needed)')
+    parser_search.add_argument(
+        '--where',
+        action='append',
+        required=True,
+        help='Condition, repeatable: "Field:operator:value" (e.g. "Lead_Status:equals:Not Contacted") '
+             'or shorthand "Field=value", "Field!=value", "Field^=value" (starts with), "Field>=value"'
+    )
+    parser_search.add_argument('--any', action='store_true', help='Match any condition (OR) instead of all (AND)')
+    parser_search.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help=f'Pages fetched in parallel (default: {DEFAULT_CONCURRENCY})')
+    parser_search.add_argument('--per-page', type=int, default=200, help='Records per page, max 200 (default: 200)')
+    parser_search.add_argument('--output', type=str, default="lead_search_results.txt", help='Output filename in output/ dir; .txt report, .jsonl or .csv')
+
+    # --- Export Command ---
+    parser_export = subparsers.add_parser('export', help='Export leads in parallel shards (multi-process / multi-machine) and merge the parts')
+    parser_export.add_argument('--cvid', type=str, default=QUALIFICATION_CUSTOM_VIEW_ID, help='Custom View ID for page-range shards (default from .env)')
+    parser_export.add_argument('--pages', type=int, default=10, help='Total pages of the Custom View to export (default: 10, Zoho\'s 2000-record page limit at 200/page)')
+    parser_export.add_argument('--pages-per-shard', type=int, default=1, help='Pages fetched by each shard (default: 1)')
+    parser_export.add_argument('--per-page', type=int, default=200, help='Records per page, max 200 (default: 200)')
+    parser_export.add_argument('--created-since', type=str, default=None, help='Shard by Created_Time windows instead of pages, starting at this ISO date/time (UTC if no offset)')
+    parser_export.add_argument('--created-until', type=str, default=None, help='End (exclusive) of the Created_Time range (default: now)')
+    parser_export.add_argument('--window-hours', type=float, default=24.0, help='Size of each Created_Time window in hours (default: 24)')
+    parser_export.add_argument('--criteria', type=str, default=None, help='Extra search criteria ANDed into every Created_Time window, e.g. "(Lead_Status:equals:Not Contacted)"')
+    parser_export.add_argument('--processes', type=int, default=None, help='Worker processes on this machine (default: CPU count)')
+    parser_export.add_argument('--work-dir', type=str, default=None, help='Work directory for the plan and part files; share it to spread shards across machines (default: output/export_work)')
+    parser_export.add_argument('--join', action='store_true', help='Only run unclaimed shards of an existing plan in --work-dir (another machine merges)')
+    parser_export.add_argument('--claim-timeout', type=int, default=DEFAULT_CLAIM_TIMEOUT, help=f'Seconds without progress before a shard claimed by another process is re-taken (default: {DEFAULT_CLAIM_TIMEOUT})')
+    parser_export.add_argument('--output', type=str, default="lead_export.jsonl", help='Merged output filename in output/ dir; .jsonl, .csv or .txt (default: lead_export.jsonl)')
+
+    # --- Mirror Command (local lead store kept fresh by notifications) ---
+    parser_mirror = subparsers.add_parser('mirror', help='Local lead mirror kept up to date by Zoho notifications')
+    parser_mirror.add_argument('--db', type=str, default=str(DEFAULT_MIRROR_PATH), help='Mirror SQLite file (default: zoho_data/lead_mirror.sqlite3)')
+    mirror_actions = parser_mirror.add_subparsers(dest='mirror_action', help='Mirror actions', required=True)
+
+    mirror_sync = mirror_actions.add_parser('sync', help='Seed/refresh the mirror from a Custom View')
+    mirror_sync.add_argument('--cvid', type=str, default=QUALIFICATION_CUSTOM_VIEW_ID, help='Custom View ID (default from .env)')
+
+    mirror_register = mirror_actions.add_parser('register', help='Enable (or renew) the Leads notification channel in Zoho')
+    mirror_register.add_argument('--url', type=str, default=NOTIFICATION_URL, help='Public callback URL forwarded to the receiver (default: NOTIFICATION_URL in .env)')
+    mirror_register.add_argument('--channel-id', type=int, default=NOTIFICATION_CHANNEL_ID, help='Unique channel number (default: NOTIFICATION_CHANNEL_ID in .env)')
+    mirror_register.add_argument('--expiry-hours', type=float, default=24, help='Channel lifetime in hours, max 168 (default: 24)')
+    mirror_register.add_argument('--renew', action='store_true', help='Extend/update an existing channel instead of enabling a new one')
+
+    mirror_serve = mirror_actions.add_parser('serve', help='Run the notification receiver and apply callbacks to the mirror')
+    mirror_serve.add_argument('--host', type=str, default=DEFAULT_RECEIVER_HOST, help=f'Interface to bind (default: {DEFAULT_RECEIVER_HOST})')
+    mirror_serve.add_argument('--port', type=int, default=DEFAULT_RECEIVER_PORT, help=f'Port to listen on (default: {DEFAULT_RECEIVER_PORT})')
+    mirror_serve.add_argument('--record', type=str, default=None, help='Append every accepted callback to this .jsonl file for later replay')
+
+    mirror_replay = mirror_actions.add_parser('replay', help='POST recorded callbacks (.jsonl) to a running receiver')
+    mirror_replay.add_argument('file', type=str, help='Recorded callbacks, one JSON payload per line')
+    mirror_replay.add_argument('--url', type=str, default=f"http://{DEFAULT_RECEIVER_HOST}:{DEFAULT_RECEIVER_PORT}{RECEIVER_PATH}", help='Receiver URL')
+
+    mirror_query = mirror_actions.add_parser('query', help='Write leads from the mirror (no API calls)')
+    mirror_query.add_argument('--status', type=str, default=None, help='Only leads with this Lead_Status')
+    mirror_query.add_argument('--output', type=str, default="lead_mirror_results.txt", help='Output filename in output/ dir; .txt report, .jsonl or .csv')
+
+    # --- Serve Command ---
+    parser_serve = subparsers.add_parser('serve', help='Run a worker server that keeps the SDK initialized and executes submitted jobs')
+    parser_serve.add_argument('--host', type=str, default=worker.DEFAULT_HOST, help=f'Interface to bind (default: {worker.DEFAULT_HOST})')
+    parser_serve.add_argument('--port', type=int, default=worker.DEFAULT_PORT, help=f'Port to listen on (default: {worker.DEFAULT_PORT})')
+    parser_serve.add_argument('--workers', type=int, default=worker.DEFAULT_WORKERS, help=f'Number of concurrent worker threads (default: {worker.DEFAULT_WORKERS})')
+    parser_serve.add_argument('--queue-size', type=int, default=worker.DEFAULT_QUEUE_SIZE, help=f'Maximum queued jobs before new ones are rejected (default: {worker.DEFAULT_QUEUE_SIZE})')
+
+    # --- Submit Command (handled before SDK initialization, listed here for help output) ---
+    subparsers.add_parser(
+        'submit',
+        help='Submit a command to a running worker server, e.g. `submit qualify --cvid 123` (see `submit -h`)',
+        add_help=False
+    )
+
+    return parser
 
-    args = parser.parse_args()
+
+def main(argv=None):
+    """Main entry point for the CLI application.
+
+    Args:
+        argv (list[str], optional): Arguments to parse instead of sys.argv[1:]
+                                    (used by the worker server to run submitted jobs).
+
+    Returns:
+        int: 0 if the command completed, 1 if it reported a failure.
+    """
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == 'submit':
+        return worker.run_client(extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    exit_code = 0
 
     # --- Execute Command ---
     try:
@@ -131,14 +406,30 @@ def main():
             if not cvid_used:
                  print("❌ Error: Custom View ID is required for qualification. Provide --cvid or set QUALIFICATION_CUSTOM_VIEW_ID in .env.")
                  logger.error("Qualify command failed: Missing Custom View ID.")
-                 return # Exit main function, avoids sys.exit()
+                 return 1 # Exit main function, avoids sys.exit()
+            try:
+                enrich = parse_enrich_kinds(args.enrich)
+                check_compression_level(args.output, args.compression_level)
+            except ValueError as e:
+                print(f"❌ Error: {e}")
+                logger.error(f"Qualify command failed: {e}")
+                return 1
 
             logger.info(f"Executing 'qualify' command with CV ID: {cvid_used} and Output: {args.output}")
-            qualify_leads_from_custom_view(
+            success = qualify_leads_from_custom_view(
                 custom_view_id=cvid_used,
-                output_filename=args.output
+                output_filename=args.output,
+                delta=args.delta,
+                index_filename=args.index,
+                enrich=enrich,
+                enrich_concurrency=args.enrich_concurrency,
+                enrich_cache_ttl=args.enrich_cache_ttl,
+                call_timeout=args.timeout,
+                run_timeout=args.deadline,
+                hedge=args.hedge,
+                compression_level=args.compression_level
             )
-            # Qualify function handles its own success/failure reporting
+            exit_code = 0 if success else 1 # Qualify function handles its own success/failure reporting
 
         elif args.command == 'update':
             # Use resolved arguments
@@ -152,28 +443,192 @@ def main():
             if not lead_id_to_update or lead_id_to_update <= 0:
                 print("❌ Error: Invalid or missing Lead ID for update. Provide --id or set LEAD_ID > 0 in .env.")
                 logger.error("Update command failed: Invalid or missing --id.")
+                exit_code = 1
             elif not mobile_to_set:
                  print("❌ Error: Missing mobile number for update. Provide --mobile or set NEW_MOBILE in .env.")
                  logger.error("Update command failed: Missing --mobile.")
+                 exit_code = 1
             else:
-                success = update_single_lead_mobile(target_lead_id=lead_id_to_update, new_mobile=mobile_to_set)
+                success = update_single_lead_mobile(
+                    target_lead_id=lead_id_to_update, new_mobile=mobile_to_set,
+                    call_timeout=args.timeout, run_timeout=args.deadline, hedge=args.hedge
+                )
+                exit_code = 0 if success else 1
                 # Success/failure message is printed within update_single_lead_mobile now
                 # if success:
                 #     print(f"✅ Lead {lead_id_to_update} successfully updated with new mobile number.")
                 # else:
                 #     print(f"❌ Failed to update Lead {lead_id_to_update}. Check logs for details.")
 
+        elif args.command == 'queue-update':
+            fields = _parse_assignments(args.set, 'queue-update')
+            if fields is None:
+                return 1
+            if args.id <= 0:
+                print("❌ Error: Invalid Lead ID for queue-update. Must be a positive integer.")
+                return 1
+            logger.info(f"Executing 'queue-update' for Lead ID {args.id} with fields {list(fields)}")
+            try:
+                update_queue = get_update_queue(journal_path=args.journal)
+            except (JournalLockedError, ValueError) as e:
+                print(f"❌ Error: {e}")
+                print("   Submit the update to the worker server that owns the queue (`submit queue-update ...`).")
+                logger.error(f"queue-update failed: {e}")
+                return 1
+            update_queue.enqueue(args.id, fields)
+            print(f"✅ Queued update for lead {args.id} ({update_queue.pending_count()} leads pending).")
+            if args.flush:
+                exit_code = 0 if update_queue.flush() else 1
+                print(f"Flush {'completed' if exit_code == 0 else 'failed, updates kept in the journal'}. Stats: {update_queue.stats}")
+
+        elif args.command == 'queue-flush':
+            logger.info(f"Executing 'queue-flush' for journal {args.journal}")
+            update_queue = existing_update_queue(args.journal) # The worker server's own queue
+            if update_queue is None:
+                try:
+                    update_queue = LeadUpdateQueue(journal_path=args.journal)
+                except JournalLockedError as e:
+                    print(f"❌ Error: {e}")
+                    print("   Submit the flush to the worker server that owns the queue (`submit queue-flush`).")
+                    logger.error(f"queue-flush failed: {e}")
+                    return 1
+                standalone = True
+            else:
+                standalone = False
+            try:
+                pending = update_queue.pending_count()
+                print(f"Flushing {pending} pending lead updates from {args.journal}...")
+                exit_code = 0 if update_queue.flush() else 1
+            finally:
+                if standalone:
+                    update_queue.close()
+            print(f"{'✅' if exit_code == 0 else '❌'} Sent {update_queue.stats['sent']} updates in {update_queue.stats['calls']} calls "
+                  f"({update_queue.stats['failed']} rejected, see {update_queue.failed_path}).")
+
+        elif args.command == 'bulk-write':
+            logger.info(f"Executing 'bulk-write' command: {args.operation} {args.input} (find_by={args.find_by})")
+            success = bulk_write_leads(
+                input_path=args.input,
+                operation=args.operation,
+                find_by=args.find_by,
+                org_id=args.org_id,
+                report_filename=args.report,
+                rows_per_job=args.rows_per_job,
+                poll_interval=args.poll_interval
+            )
+            exit_code = 0 if success else 1
+
+        elif args.command == 'mass-update':
+            fields = _parse_assignments(args.set, 'mass-update')
+            if fields is None:
+                return 1
+            ids = None
+            if args.ids_file:
+                if not os.path.exists(args.ids_file):
+                    print(f"❌ Error: Id file not found: {args.ids_file}")
+                    return 1
+                ids = read_ids_file(args.ids_file)
+                if not ids:
+                    print(f"❌ Error: No lead ids found in {args.ids_file}.")
+                    return 1
+            logger.info(f"Executing 'mass-update' command: fields {list(fields)} on "
+                        f"{'Custom View ' + args.cvid if args.cvid else str(len(ids)) + ' ids'}")
+            success = mass_update_leads(
+                fields,
+                cvid=args.cvid,
+                ids=ids,
+                chunk_size=args.chunk_size,
+                concurrency=args.concurrency,
+                poll_interval=args.poll_interval
+            )
+            exit_code = 0 if success else 1
+
+        elif args.command == 'search':
+            try:
+                criteria = build_criteria(args.where, match="or" if args.any else "and")
+            except ValueError as e:
+                print(f"❌ Error: {e}")
+                logger.error(f"Search command failed: {e}")
+                return 1
+            logger.info(f"Executing 'search' command with criteria {criteria} and Output: {args.output}")
+            success = search_leads(
+                criteria=criteria,
+                output_filename=args.output,
+                per_page=args.per_page,
+                concurrency=args.concurrency
+            )
+            exit_code = 0 if success else 1
+
+        elif args.command == 'export':
+            shards = None
+            if not args.join:
+                if args.created_since:
+                    try:
+                        since = _parse_cli_datetime(args.created_since)
+                        until = _parse_cli_datetime(args.created_until) if args.created_until else datetime.datetime.now(datetime.timezone.utc)
+                    except ValueError as e:
+                        print(f"❌ Error: Invalid --created-since/--created-until value: {e}")
+                        logger.error(f"Export command failed: invalid date range: {e}")
+                        return 1
+                    shards = plan_created_shards(since, until, args.window_hours, args.criteria, args.per_page)
+                elif args.cvid:
+                    try:
+                        shards = plan_page_shards(args.cvid, args.pages, args.pages_per_shard, args.per_page)
+                    except ValueError as e:
+                        print(f"❌ Error: {e}")
+                        logger.error(f"Export command failed: {e}")
+                        return 1
+                else:
+                    print("❌ Error: Provide --cvid (or QUALIFICATION_CUSTOM_VIEW_ID in .env) or --created-since for export.")
+                    logger.error("Export command failed: Missing Custom View ID and Created_Time range.")
+                    return 1
+            logger.info(f"Executing 'export' command with {len(shards) if shards else 'existing'} shards, output: {args.output}")
+            success = export_leads_sharded(
+                shards=shards,
+                output_filename=args.output,
+                work_dir=args.work_dir,
+                processes=args.processes,
+                claim_timeout=args.claim_timeout,
+                join=args.join
+            )
+            exit_code = 0 if success else 1
+
+        elif args.command == 'mirror':
+            logger.info(f"Executing 'mirror {args.mirror_action}' command with mirror {args.db}")
+            exit_code = _run_mirror_command(args)
+
+        elif args.command == 'serve':
+            logger.info(f"Executing 'serve' command on {args.host}:{args.port} with {args.workers} workers.")
+            job_server = worker.JobServer(
+                runner=main,
+                host=args.host,
+                port=args.port,
+                workers=args.workers,
+                queue_size=args.queue_size
+            )
+            job_server.start()
+            print(f"✅ Worker server listening on http://{args.host}:{job_server.port} ({args.workers} workers). Press Ctrl+C to stop.")
+            try:
+                job_server.serve_forever()
+            except KeyboardInterrupt:
+                print("\nStopping worker server...")
+            finally:
+                close_update_queue() # Send updates still waiting in the write-behind queue
+
     except Exception as e:
         # Catch-all for unexpected errors during command execution
         logger.error(f"An unexpected error occurred executing command '{args.command}': {e}", exc_info=True)
         print(f"❌ An unexpected error occurred: {e}")
         print(f"   Check logs/app.log for details.")
         # traceback.print_exc() # Optional: uncomment for console stack trace
+        exit_code = 1
 
     finally:
         logger.info(f"CLI command '{args.command}' finished execution.")
 
+    return exit_code
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
 
 # --- End of src/cli.py ---
\ No newline at end of file
@@ -0,0 +1,353 @@
+# src/core/cassette.py
+"""
+Record/replay of the SDK's HTTP traffic ("cassettes") for network-free runs.
+
+The Zoho SDK sends every request (API calls, field metadata and OAuth token refreshes)
+through `requests`, so the layer hooks requests.Session.send:
+
+    record - real requests go out; each request/response pair is appended to the
+             cassette (.jsonl) with secrets and PII redacted.
+    replay - nothing goes out; every request is answered from the cassette, optionally
+             after a fixed or the recorded latency. A request that is not in the
+             cassette raises CassetteMissError.
+
+Enabled from the environment (read by src/core/initialize.py before SDK init):
+    ZOHO_CASSETTE_MODE=record|replay
+    ZOHO_CASSETTE=qualify_big_view.jsonl   (relative names live in zoho_data/cassettes/)
+    ZOHO_CASSETTE_LATENCY=0|<seconds>|recorded
+    ZOHO_CASSETTE_SALT=<secret>            (keys the pseudonyms, see below)
+
+Redaction: tokens, client credentials and auth headers become "REDACTED". PII fields
+(names, emails, phones, free-text notes, ...) are replaced by deterministic
+pseudonyms, e.g. user-1f3a9c04de@example.invalid, so distinct values stay distinct and
+the same lead looks the same in every response. Query values that may carry PII
+(criteria, email, phone, word) are pseudonymized the same way on both record and
+replay, so searches still match.
+
+Requests are matched on method + URL (path and query), and for POST/PUT/PATCH also on
+a hash of the redacted body, so a replayed update_record is only answered for the
+payload that was recorded. Repeated identical requests are answered in recorded order,
+and the last answer repeats once they run out.
+"""
+import os
+import io
+import json
+import time
+import base64
+import hashlib
+import logging
+import datetime
+import threading
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Same logger name as src.core.initialize
+logger = logging.getLogger('zoho_app')
+
+# --- Configuration ---
+CASSETTE_VERSION = 1
+REDACTED = "REDACTED"
+SECRET_KEYS = {
+    "access_token", "refresh_token", "id_token", "client_id", "client_secret",
+    "token", "grant_token", "api_domain_token",
+}
+# Query/form parameters also carry the OAuth grant "code"; in JSON, "code" is Zoho's status (SUCCESS, ...)
+SECRET_PARAMS = SECRET_KEYS | {"code"}
+SENSITIVE_HEADERS = {"authorization", "cookie", "set-cookie", "x-zcsrf-token", "x-refresh-token"}
+# Headers that describe the wire encoding; bodies are stored decoded
+DROPPED_RESPONSE_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+PII_FIELDS = {
+    "First_Name", "Last_Name", "Full_Name", "Salutation", "Email", "Secondary_Email",
+    "Phone", "Mobile", "Home_Phone", "Other_Phone", "Fax", "Skype_ID", "Twitter",
+    "Street", "Zip_Code", "Description", "Additional_Relocation_Notes", "Company",
+    "Note_Title", "Note_Content", "Subject", "email", "full_name", "phone", "mobile",
+}
+# Keys of lookup objects that hold a person's or company's name ("name" alone is too common
+# elsewhere, e.g. layout and profile names in metadata). Their "email" is covered by PII_FIELDS.
+# Parent_Id (Notes) and Who_Id/What_Id (Activities) point at the lead, contact or account
+# the related record belongs to, as fetched by `qualify --enrich`.
+PII_LOOKUP_FIELDS = {
+    "Owner.name", "Created_By.name", "Modified_By.name",
+    "Parent_Id.name", "Who_Id.name", "What_Id.name",
+}
+BODY_MATCH_METHODS = {"POST", "PUT", "PATCH"}
+PII_QUERY_PARAMS = {"criteria", "email", "phone", "word"}
+PHONE_FIELDS = {"Phone", "Mobile", "Home_Phone", "Other_Phone", "Fax", "phone", "mobile"}
+EMAIL_FIELDS = {"Email", "Secondary_Email", "email"}
+
+
+class CassetteMissError(RuntimeError):
+    """Raised in replay mode for a request the cassette has no answer for."""
+
+
+# --- Redaction ---
+def pseudonym(value, field, salt=""):
+    """Deterministic stand-in for a PII value, shaped like the original field."""
+    digest = hashlib.blake2b(f"{field}\0{value}".encode("utf-8"), digest_size=8,
+                             key=salt.encode("utf-8")[:64]).hexdigest()
+    if field in EMAIL_FIELDS:
+        return f"user-{digest[:10]}@example.invalid"
+    if field in PHONE_FIELDS:
+        return f"+1555{int(digest, 16) % 10_000_000:07d}"
+    return f"{field}-{digest[:10]}"
+
+
+def redact_data(data, salt="", parent=None):
+    """Returns a copy of decoded JSON data with secrets removed and PII pseudonymized."""
+    if isinstance(data, dict):
+        redacted = {}
+        for key, value in data.items():
+            pii = key in PII_FIELDS or f"{parent}.{key}" in PII_LOOKUP_FIELDS
+            if key in SECRET_KEYS and value is not None:
+                redacted[key] = REDACTED
+            elif pii and isinstance(value, str) and value:
+                redacted[key] = pseudonym(value, key, salt) # By leaf key: a user looks the same as Owner and Created_By
+            else:
+                redacted[key] = redact_data(value, salt, parent=key)
+        return redacted
+    if isinstance(data, list):
+        return [redact_data(item, salt, parent=parent) for item in data]
+    return data
+
+
+def redact_url(url, salt=""):
+    """Redacts secret and PII query values; the query is also sorted, so the result is a match key."""
+    parts = urlsplit(url)
+    query = []
+    for key, value in parse_qsl(parts.query, keep_blank_values=True):
+        if key in SECRET_PARAMS:
+            value = REDACTED
+        elif key in PII_QUERY_PARAMS and value:
+            value = pseudonym(value, key, salt)
+        query.append((key, value))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(sorted(query)), ""))
+
+
+def redact_headers(headers):
+    return {k: (REDACTED if k.lower() in SENSITIVE_HEADERS else v) for k, v in headers.items()}
+
+
+def _content_type(headers):
+    return next((v for k, v in headers.items() if k.lower() == "content-type"), "")
+
+
+def _encode_body(body, content_type, salt):
+    """Redacts a request/response body and returns (stored text, storage encoding)."""
+    if body is None or body == b"" or body == "":
+        return "", "text"
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if not isinstance(body, bytes): # e.g. a streamed multipart upload
+        return "", "omitted"
+    content_type = (content_type or "").lower()
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        return base64.b64encode(body).decode("ascii"), "base64"
+    if "json" in content_type or text[:1] in ("{", "["):
+        try:
+            return json.dumps(redact_data(json.loads(text), salt), ensure_ascii=False), "text"
+        except ValueError:
+            pass
+    if "x-www-form-urlencoded" in content_type:
+        pairs = [(k, REDACTED if k in SECRET_PARAMS else v) for k, v in parse_qsl(text, keep_blank_values=True)]
+        return urlencode(pairs), "text"
+    return text, "text"
+
+
+def _decode_body(stored, encoding):
+    if encoding == "base64":
+        return base64.b64decode(stored)
+    return stored.encode("utf-8")
+
+
+def parse_latency(value):
+    """'' / '0' -> 0.0, '<seconds>' -> float, 'recorded' -> 'recorded'."""
+    value = (value or "0").strip().lower()
+    if value == "recorded":
+        return value
+    return max(0.0, float(value))
+
+
+class Cassette:
+    """
+    One cassette file.
+
+    Args:
+        path: Cassette .jsonl file.
+        mode (str): "record" (truncates the file) or "replay" (loads it).
+        latency: Replay delay per request: seconds (float) or "recorded".
+        salt (str): Key for the PII pseudonyms; use the same value to record and replay.
+    """
+
+    def __init__(self, path, mode, latency=0.0, salt=""):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode '{mode}', expected record or replay.")
+        self.path = str(path)
+        self.mode = mode
+        self.latency = latency
+        self.salt = salt
+        self.stats = {'recorded': 0, 'replayed': 0, 'missed': 0}
+        self._lock = threading.Lock()
+        self._interactions = defaultdict(list) # match key -> [interaction, ...] in recorded order
+        self._served = defaultdict(int)
+        self._file = None
+        if mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps({'cassette_version': CASSETTE_VERSION,
+                                         'recorded_at': datetime.datetime.now().astimezone().isoformat()}) + "\n")
+            self._file.flush()
+        else:
+            self._load()
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if "request" in entry:
+                    request = entry['request']
+                    self._interactions[self.match_key(request['method'], request['url'], request.get('body', ""),
+                                                      redacted=True)].append(entry)
+        logger.info(f"Cassette {self.path}: {sum(len(v) for v in self._interactions.values())} interactions loaded for replay.")
+
+    def match_key(self, method, url, body=None, headers=None, redacted=False):
+        """
+        "<METHOD> <redacted URL>", plus "body=<hash>" of the redacted body for POST/PUT/PATCH.
+
+        With redacted=True, url and body are taken as stored in the cassette.
+        """
+        method = method.upper()
+        key = f"{method} {url if redacted else redact_url(url, self.salt)}"
+        if method in BODY_MATCH_METHODS:
+            if not redacted:
+                body = _encode_body(body, _content_type(headers or {}), self.salt)[0]
+            key += f" body={hashlib.sha256((body or '').encode('utf-8')).hexdigest()[:16]}"
+        return key
+
+    def record(self, method, url, request_headers, request_body, status, reason, response_headers, response_body, elapsed):
+        """Appends one redacted interaction to the cassette."""
+        req_body, req_encoding = _encode_body(request_body, _content_type(request_headers), self.salt)
+        resp_body, resp_encoding = _encode_body(response_body, _content_type(response_headers), self.salt)
+        entry = {
+            'request': {'method': method.upper(), 'url': redact_url(url, self.salt),
+                        'headers': redact_headers(request_headers), 'body': req_body, 'body_encoding': req_encoding},
+            'response': {'status': status, 'reason': reason,
+                         'headers': {k: v for k, v in redact_headers(response_headers).items()
+                                     if k.lower() not in DROPPED_RESPONSE_HEADERS},
+                         'body': resp_body, 'body_encoding': resp_encoding},
+            'elapsed': round(elapsed, 4),
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self.stats['recorded'] += 1
+
+    def lookup(self, method, url, body=None, headers=None):
+        """
+        Returns (status, reason, headers, body bytes) for a request, after the configured latency.
+
+        Raises:
+            CassetteMissError: If the cassette holds no answer for the request.
+        """
+        key = self.match_key(method, url, body, headers)
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                self.stats['missed'] += 1
+                raise CassetteMissError(f"No recorded response in {self.path} for {key}")
+            entry = entries[min(self._served[key], len(entries) - 1)]
+            self._served[key] += 1
+            self.stats['replayed'] += 1
+        delay = entry.get('elapsed', 0.0) if self.latency == "recorded" else self.latency
+        if delay:
+            time.sleep(delay)
+        response = entry['response']
+        return response['status'], response.get('reason', ""), response['headers'], \
+            _decode_body(response['body'], response.get('body_encoding', "text"))
+
+    def close(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+
+# --- requests Hook ---
+_installed = None
+
+
+def install(cassette):
+    """Routes every requests.Session.send through the cassette. Returns the cassette."""
+    global _installed
+    import requests
+    from requests.structures import CaseInsensitiveDict
+    from requests.utils import get_encoding_from_headers
+
+    if _installed is not None:
+        raise RuntimeError(f"A cassette is already installed ({_installed.path}).")
+    original_send = requests.Session.send
+
+    def send(session, request, **kwargs):
+        if cassette.mode == "replay":
+            status, reason, headers, body = cassette.lookup(request.method, request.url, request.body, request.headers)
+            response = requests.Response()
+            response.status_code = status
+            response.reason = reason
+            response.headers = CaseInsensitiveDict(headers)
+            response._content = body
+            response.raw = io.BytesIO(body)
+            response.url = request.url
+            response.request = request
+            response.encoding = get_encoding_from_headers(response.headers)
+            response.elapsed = datetime.timedelta(0)
+            return response
+        started = time.monotonic()
+        response = original_send(session, request, **kwargs)
+        elapsed = time.monotonic() - started
+        try:
+            cassette.record(request.method, request.url, dict(request.headers), request.body,
+                            response.status_code, response.reason, dict(response.headers), response.content, elapsed)
+        except Exception:
+            logger.error(f"Failed to record {request.method} {request.url} to cassette {cassette.path}", exc_info=True)
+        return response
+
+    send.original = original_send
+    requests.Session.send = send
+    _installed = cassette
+    logger.info(f"Cassette {cassette.mode} mode active: {cassette.path}")
+    return cassette
+
+
+def uninstall():
+    """Restores requests.Session.send and closes the installed cassette."""
+    global _installed
+    if _installed is None:
+        return
+    import requests
+    requests.Session.send = requests.Session.send.original
+    _installed.close()
+    logger.info(f"Cassette {_installed.path} closed: {_installed.stats}")
+    _installed = None
+
+
+def install_from_env(default_dir):
+    """
+    Installs a cassette as configured by ZOHO_CASSETTE_MODE / ZOHO_CASSETTE / ZOHO_CASSETTE_LATENCY /
+    ZOHO_CASSETTE_SALT. Returns the cassette, or None when no mode is set.
+    """
+    mode = os.getenv("ZOHO_CASSETTE_MODE", "").strip().lower()
+    if not mode:
+        return None
+    path = os.getenv("ZOHO_CASSETTE", "").strip()
+    if not path:
+        raise ValueError("ZOHO_CASSETTE_MODE is set but ZOHO_CASSETTE (cassette file) is not.")
+    if not os.path.isabs(path):
+        path = os.path.join(str(default_dir), path)
+    cassette = Cassette(path, mode, latency=parse_latency(os.getenv("ZOHO_CASSETTE_LATENCY")),
+                        salt=os.getenv("ZOHO_CASSETTE_SALT", ""))
+    return install(cassette)
+
+# --- End of src/core/cassette.py ---
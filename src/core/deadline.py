@@ -0,0 +1,244 @@
+# src/core/deadline.py
+"""
+Per-call timeouts, a whole-run deadline and hedged requests for blocking SDK calls.
+
+The SDK calls (ops.get_records, ops.get_record, ...) take no timeout argument, so the
+limit is applied at the transport: CallPolicy.call() records when the current call
+must end (the call timeout or the run deadline, whichever comes first), and the
+requests.Session.send hook in http_compression passes the time left as the `timeout`
+of every HTTP request the call makes. A call that runs out of time therefore fails on
+its own socket instead of being left running; CallPolicy turns that failure (which
+the SDK may wrap in an SDKException) into DeadlineExceeded. The limit applies to each
+connect and read, so a server that keeps trickling bytes can still overrun it.
+
+Hedging (idempotent calls only): if a call has not answered after the p95 of recent
+latencies of the same kind of call, an identical second request is sent and the first
+successful answer wins. Latencies are kept per kind (by default the function name,
+e.g. get_records) for the whole process, so jobs in the worker server share them.
+At most one extra request is sent per call, and only for the slowest ~5% of calls,
+so tail latency follows the median instead of the occasional hung page.
+
+Standard library only, like worker.py.
+"""
+import time
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+# Same logger name as src.core.initialize
+logger = logging.getLogger('zoho_app')
+
+# --- Configuration ---
+LATENCY_WINDOW = 200 # Recent call latencies kept for the percentile
+MIN_SAMPLES = 10 # Below this, hedging uses DEFAULT_HEDGE_DELAY
+DEFAULT_HEDGE_DELAY = 2.0 # Seconds
+MIN_HEDGE_DELAY = 0.05 # Never hedge sooner than this, however fast calls have been
+MIN_TRANSPORT_TIMEOUT = 0.001 # requests rejects a timeout of 0; an expired call gets this instead
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a call outlives its per-call timeout or the run deadline."""
+
+
+class LatencyTracker:
+    """Sliding window of call latencies with a percentile-based hedge delay."""
+
+    def __init__(self, window=LATENCY_WINDOW, min_samples=MIN_SAMPLES, default_delay=DEFAULT_HEDGE_DELAY):
+        self.min_samples = min_samples
+        self.default_delay = default_delay
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, p):
+        """Returns the p-th percentile (0-100) of the window, or None when it is empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def hedge_delay(self):
+        """p95 of recent latencies, or the default until enough calls were seen."""
+        with self._lock:
+            enough = len(self._samples) >= self.min_samples
+        if not enough:
+            return self.default_delay
+        return max(MIN_HEDGE_DELAY, self.percentile(95))
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def latency_tracker(kind):
+    """Returns the process-wide LatencyTracker for one kind of call, e.g. "get_records"."""
+    with _trackers_lock:
+        if kind not in _trackers:
+            _trackers[kind] = LatencyTracker()
+        return _trackers[kind]
+
+
+class _CallScope:
+    """Time limit of one attempt, read by the transport hook on the attempt's thread."""
+
+    def __init__(self, expires):
+        self.expires = expires # time.monotonic() value, or None for no limit
+        self.timed_out = False
+
+
+_scope = contextvars.ContextVar("zoho_call_scope", default=None)
+
+
+def transport_timeout():
+    """Seconds the HTTP request being sent may take, or None outside a time-limited call."""
+    scope = _scope.get()
+    if scope is None or scope.expires is None:
+        return None
+    return max(MIN_TRANSPORT_TIMEOUT, scope.expires - time.monotonic())
+
+
+def note_transport_timeout():
+    """Called by the transport hook when a request timed out, so the call reports DeadlineExceeded."""
+    scope = _scope.get()
+    if scope is not None:
+        scope.timed_out = True
+
+
+def _run_scoped(fn, args, kwargs, scope):
+    token = _scope.set(scope)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _scope.reset(token)
+
+
+def _start(fn, args, kwargs, name, scope):
+    """Runs fn on a daemon thread (never blocks interpreter exit) and returns its Future."""
+    future = Future()
+
+    def _run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(_run_scoped(fn, args, kwargs, scope))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, name=name, daemon=True).start()
+    return future
+
+
+class CallPolicy:
+    """
+    Timeout, deadline and hedging settings for the calls of one run.
+
+    Args:
+        call_timeout (float, optional): Seconds to wait for any single call.
+        run_timeout (float, optional): Seconds from now after which no call may still be waiting
+                                       and no new call is started.
+        hedge (bool): Re-issue idempotent calls that are slower than the recent p95.
+    """
+
+    def __init__(self, call_timeout=None, run_timeout=None, hedge=False):
+        self.call_timeout = call_timeout or None
+        self.deadline = time.monotonic() + run_timeout if run_timeout else None
+        self.hedge = hedge
+        self.stats = {'calls': 0, 'hedged': 0, 'hedge_wins': 0, 'timeouts': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def remaining(self):
+        """Seconds left until the run deadline (None without one)."""
+        return None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+
+    def _limit(self, label):
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            self._count('timeouts')
+            raise DeadlineExceeded(f"{label}: run deadline reached before the call was made.")
+        limits = [t for t in (self.call_timeout, remaining) if t is not None]
+        return min(limits) if limits else None
+
+    def _timed_out(self, label, started, cause=None):
+        self._count('timeouts')
+        reason = "run deadline" if self.deadline is not None and self.remaining() <= 0 else f"call timeout of {self.call_timeout}s"
+        logger.warning(f"{label}: gave up after {time.monotonic() - started:.1f}s ({reason}).")
+        error = DeadlineExceeded(f"{label}: no response within the {reason}.")
+        error.__cause__ = cause
+        return error
+
+    def call(self, fn, *args, label="call", idempotent=False, kind=None, **kwargs):
+        """
+        Calls fn(*args, **kwargs) within the per-call timeout and the run deadline.
+
+        The call runs on the calling thread unless it is hedged; its HTTP requests get the
+        time left as their transport timeout (see transport_timeout()).
+
+        Args:
+            label (str): Short description used in errors and logs.
+            idempotent (bool): The call may safely be sent twice (reads only); enables hedging.
+            kind (str, optional): Latency window to use; defaults to fn's name.
+
+        Raises:
+            DeadlineExceeded: If the time ran out before or during the call.
+            Exception: Whatever fn raised, when every attempt failed.
+        """
+        limit = self._limit(label)
+        self._count('calls')
+        latency = latency_tracker(kind or getattr(fn, "__name__", "call"))
+        started = time.monotonic()
+        expires = None if limit is None else started + limit
+
+        if not (self.hedge and idempotent):
+            scope = _CallScope(expires)
+            try:
+                result = _run_scoped(fn, args, kwargs, scope)
+            except Exception as e:
+                if scope.timed_out:
+                    raise self._timed_out(label, started, e)
+                raise
+            latency.record(time.monotonic() - started)
+            return result
+
+        scopes = [_CallScope(expires)]
+        primary = _start(fn, args, kwargs, f"zoho-call-{label}", scopes[0])
+        attempts = {primary: started}
+        pending = {primary}
+        delay = latency.hedge_delay()
+        if limit is None or delay < limit:
+            done, _ = wait(pending, timeout=delay)
+            if not done:
+                self._count('hedged')
+                logger.info(f"{label}: no answer after {delay:.2f}s (p95), sending a hedged request.")
+                scopes.append(_CallScope(expires))
+                hedge = _start(fn, args, kwargs, f"zoho-hedge-{label}", scopes[-1])
+                attempts[hedge] = time.monotonic()
+                pending.add(hedge)
+
+        # Each attempt ends on its own transport timeout; only the run deadline bounds the wait here.
+        errors = []
+        while pending:
+            done, pending = wait(pending, timeout=self.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                raise self._timed_out(label, started)
+            for future in done:
+                if future.exception() is None:
+                    latency.record(time.monotonic() - attempts[future])
+                    if future is not primary:
+                        self._count('hedge_wins')
+                    return future.result()
+                errors.append(future.exception())
+        if any(scope.timed_out for scope in scopes):
+            raise self._timed_out(label, started, errors[-1])
+        raise errors[-1]
+
+# --- End of src/core/deadline.py ---
@@ -0,0 +1,109 @@
+# src/core/http_compression.py
+"""
+Compressed responses on the SDK's fetch path.
+
+The SDK sends its requests through `requests`, whose default Accept-Encoding already
+asks for gzip/deflate, and urllib3 decodes such responses transparently. A header
+passed by the SDK (or a proxy) can still replace that default, so the hook installed
+here makes sure every request asks for "gzip, deflate". It also counts wire bytes
+against decoded bytes so the saving is visible in the logs (transfer_summary()).
+
+ZOHO_HTTP_COMPRESSION=0 sends "Accept-Encoding: identity" instead, for comparisons.
+
+The same hook applies the time limit of the current CallPolicy call (deadline.py) as the
+request's `timeout`, so a slow request fails on its socket instead of running on unseen.
+"""
+import os
+import logging
+import threading
+
+from src.core.deadline import transport_timeout, note_transport_timeout
+
+# Same logger name as src.core.initialize
+logger = logging.getLogger('zoho_app')
+
+# --- Configuration ---
+ACCEPT_ENCODING = "gzip, deflate"
+# Uncompressed responses larger than this are reported once (compression is not working)
+UNCOMPRESSED_WARN_BYTES = 4096
+
+transfer_stats = {'responses': 0, 'compressed': 0, 'wire_bytes': 0, 'decoded_bytes': 0}
+_stats_lock = threading.Lock()
+_warned = False
+_installed = False
+
+
+def _observe(response, stream):
+    """Counts one response. Streamed bodies are not read here; they only count as a response."""
+    global _warned
+    encoding = response.headers.get("Content-Encoding", "").lower()
+    decoded = wire = 0
+    if not stream:
+        decoded = len(response.content) # Reads (and decodes) the body now; requests caches it
+        tell = getattr(response.raw, "tell", None)
+        wire = tell() if callable(tell) and encoding else decoded
+    with _stats_lock:
+        transfer_stats['responses'] += 1
+        transfer_stats['compressed'] += 1 if encoding in ("gzip", "deflate", "br", "zstd") else 0
+        transfer_stats['wire_bytes'] += wire
+        transfer_stats['decoded_bytes'] += decoded
+        warn = not encoding and decoded > UNCOMPRESSED_WARN_BYTES and not _warned
+        if warn:
+            _warned = True
+    if warn:
+        logger.warning(f"Uncompressed {decoded}-byte response from {response.url.split('?')[0]} "
+                       f"(requested Accept-Encoding: {response.request.headers.get('Accept-Encoding')}).")
+
+
+def install():
+    """Hooks requests.Session.send to request compressed responses, apply call time limits and count transfer sizes."""
+    global _installed
+    if _installed:
+        return
+    import requests
+
+    enabled = os.getenv("ZOHO_HTTP_COMPRESSION", "1").strip().lower() not in ("0", "false", "no", "off")
+    accept = ACCEPT_ENCODING if enabled else "identity"
+    original_send = requests.Session.send
+
+    def send(session, request, **kwargs):
+        request.headers["Accept-Encoding"] = accept
+        limit = transport_timeout()
+        current = kwargs.get("timeout")
+        if limit is not None and not (isinstance(current, (int, float)) and current <= limit):
+            kwargs["timeout"] = limit # requests passes timeout=None explicitly, so setdefault would not apply
+        try:
+            response = original_send(session, request, **kwargs)
+        except requests.exceptions.Timeout:
+            note_transport_timeout()
+            raise
+        try:
+            _observe(response, kwargs.get("stream", False))
+        except Exception:
+            logger.debug(f"Could not measure response size for {request.url}", exc_info=True)
+        return response
+
+    send.original = original_send
+    requests.Session.send = send
+    _installed = True
+    logger.debug(f"HTTP response compression {'enabled' if enabled else 'disabled'} (Accept-Encoding: {accept}).")
+
+
+def transfer_snapshot():
+    """Copy of the process-wide counters, to summarise one run with transfer_summary(since=...)."""
+    with _stats_lock:
+        return dict(transfer_stats)
+
+
+def transfer_summary(since=None):
+    """One-line summary of the transfer statistics (since an earlier snapshot, if given)."""
+    stats = transfer_snapshot()
+    if since:
+        stats = {k: v - since.get(k, 0) for k, v in stats.items()}
+    if not stats['responses']:
+        return "no HTTP responses"
+    ratio = f", {stats['decoded_bytes'] / stats['wire_bytes']:.1f}x smaller on the wire" if stats['wire_bytes'] else ""
+    return (f"{stats['responses']} responses ({stats['compressed']} compressed): "
+            f"{stats['wire_bytes'] / 1e6:.2f} MB transferred for {stats['decoded_bytes'] / 1e6:.2f} MB of data{ratio}")
+
+# --- End of src/core/http_compression.py ---
@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import sys
 import pathlib
+import shutil
 import logging # Import standard logging
 from dotenv import load_dotenv
 
@@ -13,6 +14,8 @@ from zohocrmsdk.src.com.zoho.crm.api.dc import USDataCenter, EUDataCenter, INDat
 from zohocrmsdk.src.com.zoho.api.authenticator import OAuthToken
 from zohocrmsdk.src.com.zoho.api.authenticator.store import FileStore
 from zohocrmsdk.src.com.zoho.api.logger import Logger as SDKLogger # Rename SDK logger
+from src.core.cassette import install_from_env as install_cassette_from_env
+from src.core import http_compression
 # REMOVED: from zohocrmsdk.src.com.zoho.crm.api.util import SDKException # <-- REMOVE THIS LINE
 
 # --- Project Structure Setup ---
@@ -21,6 +24,7 @@ DATA_DIR = PROJECT_ROOT / "zoho_data" # Corrected path from previous edits
 LOGS_DIR = PROJECT_ROOT / "logs"
 TOKEN_DIR = DATA_DIR / "tokens"
 API_RESOURCES_DIR = DATA_DIR / "api_resources"
+CASSETTE_DIR = DATA_DIR / "cassettes"
 
 # Ensure directories exist
 DATA_DIR.mkdir(exist_ok=True)
@@ -93,6 +97,13 @@ else:
 if not Initializer.get_initializer():
     logger.info("Attempting Zoho CRM SDK Initialization...")
     try:
+        # HTTP hooks must be in place before the SDK makes any call. Compression is installed
+        # first so a recording cassette sees (and stores) the decoded responses.
+        http_compression.install()
+        # Record/Replay (optional, ZOHO_CASSETTE_MODE)
+        cassette = install_cassette_from_env(CASSETTE_DIR)
+        replaying = cassette is not None and cassette.mode == "replay"
+
         # Environment
         accounts_url_env = os.getenv("ACCOUNTS_URL", "https://accounts.zoho.com")
         environment = _pick_dc(accounts_url_env)
@@ -102,6 +113,9 @@ if not Initializer.get_initializer():
         client_id = os.getenv("CLIENT_ID")
         client_secret = os.getenv("CLIENT_SECRET")
         refresh_token = os.getenv("REFRESH_TOKEN")
+        if replaying and not all([client_id, client_secret, refresh_token]):
+             # Token refreshes are answered from the cassette, so any placeholder works offline
+             client_id, client_secret, refresh_token = client_id or "replay", client_secret or "replay", refresh_token or "replay"
         if not all([client_id, client_secret, refresh_token]):
              logger.critical("Missing required OAuth credentials (CLIENT_ID, CLIENT_SECRET, REFRESH_TOKEN) in environment variables.")
              raise ValueError("Missing required OAuth credentials in environment variables.")
@@ -115,8 +129,14 @@ if not Initializer.get_initializer():
         logger.debug("OAuthToken object created.")
 
         # Token Store
-        store = FileStore(file_path=str(token_file))
-        logger.debug(f"Using FileStore at: {token_file}")
+        store_file = token_file
+        if cassette is not None:
+            # Start cassette runs without a token so the refresh is always recorded and replayed,
+            # and keep redacted tokens out of the real store
+            store_file = TOKEN_DIR / f"{cassette.mode}_token_store.txt"
+            store_file.unlink(missing_ok=True)
+        store = FileStore(file_path=str(store_file))
+        logger.debug(f"Using FileStore at: {store_file}")
 
         # SDK Config
         sdk_config = SDKConfig(
@@ -127,6 +147,13 @@ if not Initializer.get_initializer():
 
         # Resource Path
         resource_path = str(API_RESOURCES_DIR)
+        if cassette is not None:
+            # Per-cassette field metadata; recording starts empty so the metadata calls are captured too
+            resource_dir = pathlib.Path(cassette.path).with_suffix(".resources")
+            if cassette.mode == "record":
+                shutil.rmtree(resource_dir, ignore_errors=True)
+            resource_dir.mkdir(parents=True, exist_ok=True)
+            resource_path = str(resource_dir)
         logger.debug(f"Using SDK resource path: {resource_path}")
 
         # SDK Logger
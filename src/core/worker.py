@@ -0,0 +1,384 @@
+# src/core/worker.py
+"""
+Long-running worker daemon and thin client for the CLI.
+
+`python src/cli.py serve` keeps one initialized SDK warm and accepts jobs over a
+local HTTP endpoint. Each job is a CLI argument list (e.g. ["qualify", "--cvid", "123"])
+that is placed on a bounded queue and executed by a fixed-size pool of worker threads.
+`python src/cli.py submit <command> [args...]` posts a job to a running server, so each
+job only pays for the API round trip instead of interpreter start-up and SDK init.
+
+This module deliberately uses only the standard library and does NOT import
+src.core.initialize: the client side must stay cheap to start.
+"""
+import io
+import os
+import sys
+import json
+import uuid
+import time
+import queue
+import logging
+import argparse
+import threading
+import traceback
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Same logger name as src.core.initialize; it is fully configured in the server process.
+logger = logging.getLogger('zoho_app')
+
+# --- Configuration ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 100
+MAX_FINISHED_JOBS = 1000 # Finished jobs kept in memory for status lookups
+# Commands that must never be executed as jobs inside the server itself: servers that
+# never return, and `export`, which spawns its own process pool
+NON_JOB_COMMANDS = {"serve", "submit", "export"}
+# Long-running sub-commands, as (command, action)
+NON_JOB_ACTIONS = {("mirror", "serve")}
+
+
+def default_worker_url():
+    """Returns the worker URL from WORKER_URL (env/.env) or the local default."""
+    return os.getenv("WORKER_URL", f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+
+
+# --- Per-thread stdout/stderr capture ---
+class _ThreadLocalStream(io.TextIOBase):
+    """
+    sys.stdout/sys.stderr replacement that routes print() output (and argparse usage
+    errors) of worker threads into a per-job buffer, while every other thread keeps
+    writing to the real stream.
+    """
+
+    def __init__(self, fallback):
+        self._fallback = fallback
+        self._local = threading.local()
+
+    def capture(self, buffer):
+        self._local.buffer = buffer
+
+    def release(self):
+        self._local.buffer = None
+
+    def write(self, s):
+        target = getattr(self._local, 'buffer', None) or self._fallback
+        return target.write(s)
+
+    def flush(self):
+        target = getattr(self._local, 'buffer', None) or self._fallback
+        target.flush()
+
+
+class Job:
+    """A single submitted CLI invocation and its outcome."""
+
+    def __init__(self, argv):
+        self.id = uuid.uuid4().hex
+        self.argv = list(argv)
+        self.status = "queued" # queued -> running -> succeeded | failed
+        self.exit_code = None
+        self.output = ""
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'argv': self.argv,
+            'status': self.status,
+            'exit_code': self.exit_code,
+            'output': self.output,
+            'error': self.error,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobServer:
+    """
+    Bounded job queue plus a fixed pool of worker threads behind a local HTTP endpoint.
+
+    Args:
+        runner: Callable taking an argv list and returning an exit code (0 = success).
+        host (str): Interface to bind (keep this on localhost; there is no auth).
+        port (int): TCP port to listen on.
+        workers (int): Number of worker threads executing jobs concurrently.
+        queue_size (int): Maximum number of queued jobs before submissions are rejected.
+    """
+
+    def __init__(self, runner, host=DEFAULT_HOST, port=DEFAULT_PORT,
+                 workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        self.runner = runner
+        self.host = host
+        self.port = port
+        self.workers = max(1, int(workers))
+        self.jobs_queue = queue.Queue(maxsize=max(1, int(queue_size)))
+        self.jobs = {}
+        self._finished_order = []
+        self._lock = threading.Lock()
+        self._threads = []
+        self._httpd = None
+
+    # --- Job handling ---
+    def submit(self, argv):
+        """Queues a job. Raises ValueError for invalid argv and queue.Full when saturated."""
+        if not isinstance(argv, list) or not argv or not all(isinstance(a, str) for a in argv):
+            raise ValueError("'argv' must be a non-empty list of strings.")
+        blocked = argv[0] if argv[0] in NON_JOB_COMMANDS else next(
+            (f"{command} {action}" for command, action in NON_JOB_ACTIONS
+             if argv[0] == command and action in argv[1:]), None)
+        if blocked:
+            raise ValueError(f"Command '{blocked}' cannot be run as a job; run it directly.")
+        job = Job(argv)
+        with self._lock:
+            self.jobs[job.id] = job
+        try:
+            self.jobs_queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self.jobs.pop(job.id, None)
+            raise
+        logger.info(f"Worker job {job.id} queued: {' '.join(argv)}")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _remember_finished(self, job):
+        with self._lock:
+            self._finished_order.append(job.id)
+            while len(self._finished_order) > MAX_FINISHED_JOBS:
+                self.jobs.pop(self._finished_order.pop(0), None)
+
+    def _run_job(self, job):
+        buffer = io.StringIO()
+        job.status = "running"
+        job.started_at = time.time()
+        streams = self._install_streams()
+        for stream in streams:
+            stream.capture(buffer)
+        try:
+            exit_code = self.runner(job.argv)
+            job.exit_code = 0 if exit_code is None else int(exit_code)
+        except SystemExit as e: # argparse errors and explicit sys.exit() calls
+            # Same mapping as the interpreter: None -> 0, an int as is, anything else (a message) -> 1
+            job.exit_code = e.code if isinstance(e.code, int) else 0 if e.code is None else 1
+        except Exception as e:
+            job.exit_code = 1
+            job.error = str(e)
+            logger.error(f"Worker job {job.id} raised an unexpected error", exc_info=True)
+            buffer.write(traceback.format_exc())
+        finally:
+            for stream in streams:
+                stream.release()
+        job.output = buffer.getvalue()
+        job.status = "succeeded" if job.exit_code == 0 else "failed"
+        job.finished_at = time.time()
+        job.done.set()
+        self._remember_finished(job)
+        logger.info(f"Worker job {job.id} {job.status} in {job.finished_at - job.started_at:.2f}s (exit code {job.exit_code}).")
+
+    def _install_streams(self):
+        # Re-checked per job in case something swapped sys.stdout/sys.stderr after start()
+        with self._lock:
+            if not isinstance(sys.stdout, _ThreadLocalStream):
+                sys.stdout = _ThreadLocalStream(sys.stdout)
+            if not isinstance(sys.stderr, _ThreadLocalStream):
+                sys.stderr = _ThreadLocalStream(sys.stderr)
+            return sys.stdout, sys.stderr
+
+    def _worker_loop(self):
+        while True:
+            job = self.jobs_queue.get()
+            if job is None: # Shutdown sentinel
+                self.jobs_queue.task_done()
+                return
+            try:
+                self._run_job(job)
+            finally:
+                self.jobs_queue.task_done()
+
+    # --- Lifecycle ---
+    def start(self):
+        """Binds the HTTP endpoint and starts the worker threads (non-blocking)."""
+        self._install_streams()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker_loop, name=f"zoho-worker-{i + 1}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1] # Resolve port 0 to the real port
+        logger.info(f"Worker server listening on http://{self.host}:{self.port} with {self.workers} workers (queue size {self.jobs_queue.maxsize}).")
+
+    def serve_forever(self):
+        """Starts the server and blocks until interrupted."""
+        if self._httpd is None:
+            self.start()
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Stops accepting requests and lets the workers finish their current job."""
+        if self._httpd is not None:
+            self._httpd.server_close()
+        for _ in self._threads:
+            self.jobs_queue.put(None)
+        for t in self._threads:
+            t.join(timeout=5)
+        self._threads = []
+        logger.info("Worker server stopped.")
+
+
+def _make_handler(server):
+    """Builds the HTTP request handler class bound to a JobServer instance."""
+
+    class _JobRequestHandler(BaseHTTPRequestHandler):
+
+        def log_message(self, format, *args):
+            logger.debug(f"Worker HTTP {self.address_string()} - {format % args}")
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _wait_and_send(self, job, wait_seconds):
+            if wait_seconds > 0:
+                job.done.wait(timeout=wait_seconds)
+            self._send_json(200 if job.done.is_set() else 202, job.to_dict())
+
+        def do_GET(self):
+            path, _, query = self.path.partition("?")
+            if path == "/health":
+                self._send_json(200, {
+                    'status': 'ok',
+                    'workers': server.workers,
+                    'queued': server.jobs_queue.qsize(),
+                })
+                return
+            if path.startswith("/jobs/"):
+                job = server.get(path[len("/jobs/"):])
+                if job is None:
+                    self._send_json(404, {'error': 'Unknown job id.'})
+                    return
+                params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+                try:
+                    wait_seconds = float(params.get("wait", 0))
+                except ValueError:
+                    wait_seconds = 0
+                self._wait_and_send(job, wait_seconds)
+                return
+            self._send_json(404, {'error': 'Not found.'})
+
+        def do_POST(self):
+            if self.path != "/jobs":
+                self._send_json(404, {'error': 'Not found.'})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                job = server.submit(payload.get("argv"))
+            except queue.Full:
+                self._send_json(503, {'error': 'Job queue is full, retry later.'})
+                return
+            except (ValueError, AttributeError) as e:
+                self._send_json(400, {'error': str(e)})
+                return
+            self._wait_and_send(job, float(payload.get("wait", 0) or 0))
+
+    return _JobRequestHandler
+
+
+# --- Thin Client ---
+def _http_json(url, payload=None, timeout=None):
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    request = urllib.request.Request(url, data=data, method="POST" if data else "GET",
+                                     headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as resp:
+            return resp.status, json.loads(resp.read() or b"{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b"{}")
+
+
+def submit_job(argv, url=None, wait=True, timeout=3600.0, poll_interval=30.0):
+    """
+    Submits a CLI job to a running worker server.
+
+    Args:
+        argv (list[str]): CLI arguments for the job, e.g. ["update", "--id", "123"].
+        url (str, optional): Worker base URL. Defaults to WORKER_URL or http://127.0.0.1:8765.
+        wait (bool): Block until the job finishes (long-polling the server).
+        timeout (float): Maximum total seconds to wait for the job when wait=True.
+        poll_interval (float): Seconds per long-poll request.
+
+    Returns:
+        dict: The job state as reported by the server.
+
+    Raises:
+        RuntimeError: If the server rejects the job or cannot be reached.
+    """
+    base_url = (url or default_worker_url()).rstrip("/")
+    deadline = time.monotonic() + timeout
+    first_wait = min(poll_interval, timeout) if wait else 0
+    try:
+        status, job = _http_json(f"{base_url}/jobs", {'argv': argv, 'wait': first_wait},
+                                 timeout=first_wait + 10)
+        if status not in (200, 202):
+            raise RuntimeError(f"Worker rejected job (HTTP {status}): {job.get('error', 'unknown error')}")
+        while wait and status == 202 and time.monotonic() < deadline:
+            remaining = max(0.0, min(poll_interval, deadline - time.monotonic()))
+            status, job = _http_json(f"{base_url}/jobs/{job['id']}?wait={remaining}", timeout=remaining + 10)
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Could not reach worker server at {base_url}: {e.reason}")
+    return job
+
+
+def run_client(argv):
+    """
+    Entry point for `python src/cli.py submit ...`. Returns a process exit code.
+    """
+    parser = argparse.ArgumentParser(
+        prog="cli.py submit",
+        description="Submit a command to a running worker server (see `cli.py serve`)."
+    )
+    parser.add_argument('--url', type=str, default=None,
+                        help=f'Worker base URL (default: WORKER_URL or http://{DEFAULT_HOST}:{DEFAULT_PORT})')
+    parser.add_argument('--no-wait', action='store_true', help='Return immediately with the job id')
+    parser.add_argument('--timeout', type=float, default=3600.0, help='Seconds to wait for the job to finish')
+    parser.add_argument('job', nargs=argparse.REMAINDER, help='Command and arguments to run, e.g. qualify --cvid 123')
+    args = parser.parse_args(argv)
+
+    if not args.job:
+        parser.error("a command to submit is required, e.g. `submit qualify --cvid 123`")
+
+    try:
+        job = submit_job(args.job, url=args.url, wait=not args.no_wait, timeout=args.timeout)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if job.get('status') in ("queued", "running"):
+        print(f"Job {job['id']} {job['status']}. Check it with: GET {(args.url or default_worker_url()).rstrip('/')}/jobs/{job['id']}")
+        return 0 if args.no_wait else 1
+    if job.get('output'):
+        print(job['output'], end="")
+    return job.get('exit_code') or 0
+
+# --- End of src/core/worker.py ---
@@ -0,0 +1,186 @@
+# src/tests/bulk_write_standin.py
+"""
+Local stand-in for the Zoho Bulk Write endpoints, used by test_bulk_write.py and for
+manual dry runs of `cli.py bulk-write` without touching a real org:
+
+    python -m src.tests.bulk_write_standin --port 8767
+    BULK_API_BASE=http://127.0.0.1:8767 BULK_UPLOAD_BASE=http://127.0.0.1:8767 \
+    BULK_DOWNLOAD_BASE=http://127.0.0.1:8767 python src/cli.py bulk-write leads.csv --find-by Email --org-id 1
+
+Job lifecycle: ADDED -> IN PROGRESS -> COMPLETED, advancing one step per status poll.
+Each input row gets a result row: SKIPPED with an error when its find_by value is empty,
+otherwise UPDATED (update / known upsert keys) or ADDED (insert / new upsert keys).
+Standard library only, so it can run without the SDK.
+"""
+import io
+import csv
+import json
+import uuid
+import argparse
+import threading
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class BulkWriteStandIn:
+    """
+    In-memory Bulk Write simulator behind an HTTP server.
+
+    Args:
+        host (str), port (int): Address to bind (port 0 picks a free port).
+        existing_keys (iterable, optional): find_by values treated as existing records on upsert.
+        polls_to_complete (int): Status polls before a job reports COMPLETED.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, existing_keys=(), polls_to_complete=2):
+        self.files = {} # file_id -> zip bytes
+        self.jobs = {} # job_id -> job dict
+        self.results = {} # job_id -> result zip bytes
+        self.requests = [] # (method, path) log for assertions
+        self.existing_keys = set(existing_keys)
+        self.polls_to_complete = polls_to_complete
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self.url = f"http://{host}:{self._httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    # --- Simulation ---
+    def _build_result(self, job):
+        resource = job['resource'][0]
+        find_by = resource.get('find_by')
+        operation = job['operation']
+        out = io.BytesIO()
+        counts = {'added_count': 0, 'updated_count': 0, 'skipped_count': 0}
+        with zipfile.ZipFile(self.files[resource['file_id']]) as src, \
+                zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as dst:
+            with io.TextIOWrapper(src.open(src.namelist()[0]), encoding="utf-8", newline="") as f:
+                reader = csv.DictReader(f)
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(list(reader.fieldnames) + ["STATUS", "RECORD_ID", "ERRORS"])
+                for n, row in enumerate(reader, start=1):
+                    key = row.get(find_by, "") if find_by else ""
+                    if find_by and not key:
+                        status, record_id, errors = "SKIPPED", "", f"MANDATORY_NOT_FOUND: {find_by}"
+                        counts['skipped_count'] += 1
+                    elif operation == "update" or (operation == "upsert" and key in self.existing_keys):
+                        status, record_id, errors = "UPDATED", key if find_by == "id" else f"9{n:08d}", ""
+                        counts['updated_count'] += 1
+                    else:
+                        status, record_id, errors = "ADDED", f"8{n:08d}", ""
+                        counts['added_count'] += 1
+                    writer.writerow([row[c] for c in reader.fieldnames] + [status, record_id, errors])
+            dst.writestr(f"{job['id']}.csv", buffer.getvalue())
+        return out.getvalue(), counts
+
+    def _status(self, job_id):
+        with self._lock:
+            job = self.jobs[job_id]
+            job['polls'] += 1
+            if job['polls'] < self.polls_to_complete:
+                state = "ADDED" if job['polls'] == 1 else "IN PROGRESS"
+                return {'id': job_id, 'status': state, 'operation': job['operation']}
+            if job_id not in self.results:
+                self.results[job_id], job['counts'] = self._build_result(job)
+            return {
+                'id': job_id,
+                'status': "COMPLETED",
+                'operation': job['operation'],
+                'resource': [{'status': "COMPLETED", 'type': "data",
+                              'module': job['resource'][0]['module'],
+                              'file': {'status': "COMPLETED", **job['counts']}}],
+                'result': {'download_url': f"/download/{job_id}.zip"},
+            }
+
+    def _make_handler(self):
+        standin = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status, body, content_type="application/json"):
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self):
+                if not self.headers.get("Authorization", "").startswith("Zoho-oauthtoken "):
+                    self._send(401, {'code': "INVALID_TOKEN", 'status': "error"})
+                    return False
+                return True
+
+            def do_POST(self):
+                standin.requests.append(("POST", self.path))
+                if not self._authorized():
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path == "/crm/v8/upload":
+                    if self.headers.get("feature") != "bulk-write" or not self.headers.get("X-CRM-ORG"):
+                        self._send(400, {'code': "MANDATORY_NOT_FOUND", 'status': "error"})
+                        return
+                    boundary = self.headers["Content-Type"].split("boundary=")[-1].encode("utf-8")
+                    part = body.split(b"--" + boundary)[1]
+                    file_bytes = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+                    file_id = uuid.uuid4().hex
+                    standin.files[file_id] = io.BytesIO(file_bytes)
+                    self._send(200, {'status': "success", 'code': "FILE_UPLOAD_SUCCESS",
+                                     'details': {'file_id': file_id}})
+                elif self.path == "/crm/bulk/v8/write":
+                    payload = json.loads(body)
+                    if payload['resource'][0]['file_id'] not in standin.files:
+                        self._send(400, {'status': "error", 'code': "INVALID_DATA", 'message': "unknown file_id"})
+                        return
+                    job_id = uuid.uuid4().hex
+                    with standin._lock:
+                        standin.jobs[job_id] = {'id': job_id, 'polls': 0, **payload}
+                    self._send(201, {'status': "success", 'code': "SUCCESS", 'details': {'id': job_id}})
+                else:
+                    self._send(404, {'status': "error"})
+
+            def do_GET(self):
+                standin.requests.append(("GET", self.path))
+                if not self._authorized():
+                    return
+                if self.path.startswith("/crm/bulk/v8/write/"):
+                    job_id = self.path.rsplit("/", 1)[-1]
+                    if job_id not in standin.jobs:
+                        self._send(404, {'status': "error", 'code': "RESOURCE_NOT_FOUND"})
+                        return
+                    self._send(200, standin._status(job_id))
+                elif self.path.startswith("/download/"):
+                    job_id = self.path[len("/download/"):-len(".zip")]
+                    if job_id not in standin.results:
+                        self._send(404, {'status': "error"})
+                        return
+                    self._send(200, standin.results[job_id], content_type="application/zip")
+                else:
+                    self._send(404, {'status': "error"})
+
+        return _Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local Zoho Bulk Write stand-in server")
+    parser.add_argument('--port', type=int, default=8767)
+    args = parser.parse_args()
+    server = BulkWriteStandIn(port=args.port)
+    print(f"Bulk Write stand-in listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
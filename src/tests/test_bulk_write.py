@@ -0,0 +1,82 @@
+import os
+import csv
+import json
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import bulk_write
+from src.tests.bulk_write_standin import BulkWriteStandIn
+
+
+class TestBulkWriteAgainstStandIn(unittest.TestCase):
+    def setUp(self):
+        self.standin = BulkWriteStandIn(existing_keys={"known@example.com"}).start()
+        self.client = bulk_write.BulkWriteClient(
+            org_id="1", token_provider=lambda: "test-token",
+            api_base=self.standin.url, upload_base=self.standin.url, download_base=self.standin.url
+        )
+        self._tmp = tempfile.TemporaryDirectory()
+        # Reports go to <PROJECT_ROOT>/output; keep them out of the real project
+        self._project_root = mock.patch.object(bulk_write, "PROJECT_ROOT", pathlib.Path(self._tmp.name))
+        self._project_root.start()
+
+    def tearDown(self):
+        self._project_root.stop()
+        self.standin.stop()
+        self._tmp.cleanup()
+
+    def _report_rows(self, name):
+        with open(pathlib.Path(self._tmp.name) / "output" / name, encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+
+    def test_upsert_csv_in_several_jobs(self):
+        input_path = os.path.join(self._tmp.name, "leads.csv")
+        with open(input_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["Last_Name", "Email", "Lead_Status"])
+            writer.writerow(["Known", "known@example.com", "Contacted"])
+            writer.writerow(["New", "new@example.com", "Not Contacted"])
+            writer.writerow(["NoEmail", "", "Not Contacted"])
+
+        ok = bulk_write.bulk_write_leads(input_path, operation="upsert", find_by="Email", rows_per_job=2,
+                                         report_filename="test_bulk_report.csv", poll_interval=0, client=self.client)
+
+        self.assertTrue(ok) # A skipped row is reported, not a failure
+        self.assertEqual(len(self.standin.jobs), 2)
+        rows = self._report_rows("test_bulk_report.csv")
+        self.assertEqual([r['status'] for r in rows], ["UPDATED", "ADDED", "SKIPPED"])
+        self.assertIn("MANDATORY_NOT_FOUND", rows[2]['errors'])
+
+    def test_update_jsonl_by_id(self):
+        input_path = os.path.join(self._tmp.name, "updates.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            for lead_id in ("101", "102"):
+                f.write(json.dumps({'id': lead_id, 'Lead_Status': "Contacted"}) + "\n")
+
+        ok = bulk_write.bulk_write_leads(input_path, operation="update", report_filename="test_bulk_update.csv",
+                                         poll_interval=0, client=self.client)
+
+        self.assertTrue(ok)
+        job = next(iter(self.standin.jobs.values()))
+        self.assertEqual(job['resource'][0]['find_by'], "id")
+        self.assertEqual([r['record_id'] for r in self._report_rows("test_bulk_update.csv")], ["101", "102"])
+
+    def test_jsonl_columns_include_keys_of_later_rows(self):
+        input_path = os.path.join(self._tmp.name, "mixed.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({'id': "101", 'Lead_Status': "Contacted"}) + "\n")
+            f.write(json.dumps({'id': "102", 'Mobile': "+15551234567"}) + "\n")
+
+        ok = bulk_write.bulk_write_leads(input_path, operation="update", report_filename="test_bulk_mixed.csv",
+                                         poll_interval=0, client=self.client)
+
+        self.assertTrue(ok)
+        job = next(iter(self.standin.jobs.values()))
+        self.assertEqual([m['api_name'] for m in job['resource'][0]['field_mappings']], ["id", "Lead_Status", "Mobile"])
+
+
+if __name__ == '__main__':
+    unittest.main()
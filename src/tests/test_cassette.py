@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core.cassette import Cassette, CassetteMissError, install, uninstall, redact_url
+
+try:
+    import requests
+except ImportError: # Installed with the SDK; only missing in bare environments
+    requests = None
+
+LEAD_PAGE = {
+    'data': [{'id': "1649349000440877054", 'First_Name': "Ada", 'Last_Name': "Lovelace",
+              'Email': "ada@example.com", 'Mobile': "+447700900123", 'Lead_Status': "Contacted",
+              'Owner': {'id': "1", 'name': "Grace Hopper", 'email': "owner@example.com"},
+              'Created_By': {'id': "1", 'name': "Grace Hopper", 'email': "owner@example.com"}}],
+    'info': {'more_records': False, 'page': 1},
+}
+# Related lists as fetched by `qualify --enrich notes,activities`
+RELATED_PAGES = {
+    'Notes': {'data': [{'id': "9001", 'Note_Title': "Call with Ada Lovelace", 'Note_Content': "Wants a flat",
+                        'Parent_Id': {'id': "1649349000440877054", 'name': "Ada Lovelace", 'module': {'api_name': "Leads"}},
+                        'Created_By': {'id': "1", 'name': "Grace Hopper"}}]},
+    'Activities': {'data': [{'id': "9002", 'Subject': "Viewing with Ada Lovelace", 'Status': "Not Started",
+                             'Who_Id': {'id': "77", 'name': "Charles Babbage"},
+                             'What_Id': {'id': "88", 'name': "Analytical Engines Ltd"},
+                             'Company': "Analytical Engines Ltd"}]},
+}
+
+
+class _FakeZoho(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _json(self, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        related = self.path.split("?")[0].rsplit("/", 1)[-1]
+        self._json(RELATED_PAGES.get(related, LEAD_PAGE))
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._json({'access_token': "1000.secret", 'expires_in': 3600})
+
+    def do_PUT(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self._json({'data': [{'code': "SUCCESS", 'details': {'Mobile': body['data'][0]['Mobile']}}]})
+
+
+@unittest.skipIf(requests is None, "requests is not installed")
+class TestCassette(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "run.jsonl")
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeZoho)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        uninstall()
+        self.server.shutdown()
+        self.server.server_close()
+        self._tmp.cleanup()
+
+    def _record(self):
+        install(Cassette(self.path, "record"))
+        requests.post(f"{self.base}/oauth/v2/token", data={'refresh_token': "1000.refresh", 'client_secret': "s3cret"})
+        live = requests.get(f"{self.base}/crm/v8/Leads?page=1&cvid=42",
+                            headers={'Authorization': "Zoho-oauthtoken 1000.secret"}).json()
+        uninstall()
+        return live
+
+    def test_recording_redacts_tokens_and_pii(self):
+        live = self._record()
+        self.assertEqual(live['data'][0]['Email'], "ada@example.com") # Callers still see real data
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        for secret in ("1000.secret", "1000.refresh", "s3cret", "ada@example.com", "Lovelace", "+447700900123",
+                       "owner@example.com", "Grace Hopper"):
+            self.assertNotIn(secret, text)
+        self.assertIn("Contacted", text)
+        self.assertIn("1649349000440877054", text)
+        with open(self.path, encoding="utf-8") as f:
+            lead = json.loads(f.readlines()[-1])['response']['body']
+        owner = json.loads(lead)['data'][0]
+        self.assertEqual(owner['Owner']['name'], owner['Created_By']['name'])
+
+    def test_enriched_related_lists_are_redacted(self):
+        install(Cassette(self.path, "record"))
+        for related in RELATED_PAGES:
+            requests.get(f"{self.base}/crm/v8/Leads/1649349000440877054/{related}?page=1&per_page=10")
+        uninstall()
+        with open(self.path, encoding="utf-8") as f:
+            text = f.read()
+        for name in ("Ada", "Lovelace", "Grace Hopper", "Charles Babbage", "Analytical Engines"):
+            self.assertNotIn(name, text)
+        self.assertIn("Not Started", text)
+
+    def test_replay_needs_no_network(self):
+        self._record()
+        self.server.shutdown() # Nothing is listening any more
+        replay = install(Cassette(self.path, "replay"))
+        # Same request with the query in another order
+        page = requests.get(f"{self.base}/crm/v8/Leads?cvid=42&page=1").json()
+        self.assertEqual(page['data'][0]['Lead_Status'], "Contacted")
+        self.assertTrue(page['data'][0]['Email'].endswith("@example.invalid"))
+        # The refresh token differs, but it is redacted before the body is matched
+        token = requests.post(f"{self.base}/oauth/v2/token", data={'refresh_token': "1000.other", 'client_secret': "s3cret"})
+        self.assertEqual(token.json()['access_token'], "REDACTED")
+        with self.assertRaises(CassetteMissError):
+            requests.get(f"{self.base}/crm/v8/Leads?cvid=42&page=2")
+        self.assertEqual(replay.stats, {'recorded': 0, 'replayed': 2, 'missed': 1})
+
+    def test_writes_are_matched_on_their_body(self):
+        install(Cassette(self.path, "record"))
+        url = f"{self.base}/crm/v8/Leads/1649349000440877054"
+        requests.put(url, json={'data': [{'Mobile': "+15551234567"}]})
+        uninstall()
+        install(Cassette(self.path, "replay"))
+        self.assertEqual(requests.put(url, json={'data': [{'Mobile': "+15551234567"}]}).json()['data'][0]['code'], "SUCCESS")
+        with self.assertRaises(CassetteMissError):
+            requests.put(url, json={'data': [{'Mobile': "+15559999999"}]})
+
+    def test_fixed_latency(self):
+        self._record()
+        install(Cassette(self.path, "replay", latency=0.1))
+        started = time.monotonic()
+        requests.get(f"{self.base}/crm/v8/Leads?page=1&cvid=42")
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+
+class TestRedaction(unittest.TestCase):
+    def test_pii_query_values_match_across_runs(self):
+        url = "https://www.zohoapis.com/crm/v8/Leads/search?email=ada%40example.com&page=1"
+        self.assertEqual(redact_url(url), redact_url(url))
+        self.assertNotIn("ada", redact_url(url))
+        self.assertNotEqual(redact_url(url, salt="a"), redact_url(url, salt="b"))
+
+
+if __name__ == '__main__':
+    unittest.main()
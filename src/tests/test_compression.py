@@ -0,0 +1,126 @@
+import os
+import gzip
+import json
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads.writers import open_writer, iter_jsonl, check_compression_level
+from src.core import http_compression
+
+try:
+    import requests
+except ImportError: # Installed with the SDK; only missing in bare environments
+    requests = None
+try:
+    import zstandard
+except ImportError: # Optional dependency
+    zstandard = None
+
+NOTES = "Relocating to Lisbon in Q3, wants a two-bedroom flat near the river. " * 20
+
+
+def _rows(n):
+    return [{'id': i, 'name': f"Lead {i}", 'email': 'N/A', 'status': "Contacted", 'notes': NOTES} for i in range(n)]
+
+
+class TestCompressedWriters(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _write(self, name, rows, level=None):
+        path = os.path.join(self._tmp.name, name)
+        with open_writer(path, compression_level=level) as writer:
+            for row in rows:
+                writer.write(row)
+        return path
+
+    def test_jsonl_gz_round_trip(self):
+        rows = _rows(200)
+        path = self._write("leads.jsonl.gz", rows)
+        self.assertEqual(list(iter_jsonl(path)), rows)
+        plain = self._write("leads.jsonl", rows)
+        self.assertLess(os.path.getsize(path), os.path.getsize(plain) / 10)
+
+    def test_csv_and_report_gz_are_plain_gzip(self):
+        path = self._write("leads.csv.gz", _rows(3), level=1)
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            self.assertEqual(f.readline().strip(), "id,name,email,status,notes")
+        report = self._write("leads.txt.gz", _rows(3))
+        with gzip.open(report, "rt", encoding="utf-8") as f:
+            self.assertTrue(f.readline().startswith("RESULTS: Found 3 Leads"))
+
+    @unittest.skipIf(zstandard is None, "zstandard is not installed")
+    def test_csv_zst_round_trip(self):
+        path = self._write("leads.csv.zst", _rows(50), level=10)
+        with zstandard.ZstdDecompressor().stream_reader(open(path, "rb")) as f:
+            self.assertEqual(f.read().decode("utf-8").count("\n"), 51)
+
+    def test_explicit_level_zero_is_kept(self):
+        rows = _rows(50)
+        stored = self._write("stored.jsonl.gz", rows, level=0)
+        default = self._write("default.jsonl.gz", rows)
+        self.assertEqual(list(iter_jsonl(stored)), rows)
+        self.assertGreater(os.path.getsize(stored), os.path.getsize(default) * 5)
+
+    def test_out_of_range_levels_are_rejected(self):
+        self.assertEqual(check_compression_level("leads.jsonl.gz", None), 6)
+        self.assertIsNone(check_compression_level("leads.jsonl", None))
+        with self.assertRaises(ValueError): # The level would silently have no effect
+            check_compression_level("leads.jsonl", 6)
+        for path, level in (("leads.jsonl.gz", 10), ("leads.jsonl.gz", -1), ("leads.csv.zst", 0), ("leads.csv.zst", 23)):
+            with self.assertRaises(ValueError):
+                check_compression_level(path, level)
+        with self.assertRaises(ValueError):
+            self._write("leads.jsonl.gz", _rows(1), level=10)
+
+    @unittest.skipIf(zstandard is not None, "zstandard is installed")
+    def test_zst_without_zstandard_explains(self):
+        with self.assertRaises(RuntimeError):
+            self._write("leads.csv.zst", _rows(1))
+
+
+class _GzipServer(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({'data': _rows(20)}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@unittest.skipIf(requests is None, "requests is not installed")
+class TestResponseCompression(unittest.TestCase):
+    def test_responses_are_requested_compressed_and_decoded(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _GzipServer)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            http_compression.install()
+            before = http_compression.transfer_snapshot()
+            # An explicit header from the caller must not switch compression off
+            response = requests.get(f"http://127.0.0.1:{server.server_address[1]}/crm/v8/Leads",
+                                    headers={'Accept-Encoding': "identity"})
+            self.assertEqual(response.json()['data'][0]['notes'], NOTES)
+            after = http_compression.transfer_snapshot()
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(after['compressed'] - before['compressed'], 1)
+        self.assertLess((after['wire_bytes'] - before['wire_bytes']) * 10, after['decoded_bytes'] - before['decoded_bytes'])
+        self.assertIn("smaller on the wire", http_compression.transfer_summary(since=before))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import time
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.core import http_compression
+from src.core.deadline import (CallPolicy, DeadlineExceeded, LatencyTracker, latency_tracker,
+                               transport_timeout, note_transport_timeout)
+
+try:
+    import requests
+except ImportError: # Installed with the SDK; only missing in bare environments
+    requests = None
+
+
+class _SlowOnce:
+    """The first call hangs for `hang` seconds; later calls answer after `fast` seconds."""
+
+    def __init__(self, hang=1.0, fast=0.01):
+        self.hang = hang
+        self.fast = fast
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, page):
+        with self._lock:
+            self.calls += 1
+            first = self.calls == 1
+        time.sleep(self.hang if first else self.fast)
+        return f"page {page}"
+
+
+def _transport(seconds):
+    """Behaves like an SDK call whose socket honours transport_timeout()."""
+    limit = transport_timeout()
+    if limit is not None and limit < seconds:
+        time.sleep(limit)
+        note_transport_timeout()
+        raise RuntimeError("read timed out") # The SDK wraps the requests error in its own exception
+    time.sleep(seconds)
+    return "ok"
+
+
+class _SlowServer(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(1.0)
+        self.send_response(204)
+        self.end_headers()
+
+
+class TestCallPolicy(unittest.TestCase):
+    def test_call_timeout_raises(self):
+        policy = CallPolicy(call_timeout=0.05)
+        with self.assertRaises(DeadlineExceeded):
+            policy.call(_transport, 1, label="slow call", kind="test-timeout")
+        self.assertEqual(policy.stats['timeouts'], 1)
+        self.assertIsNone(transport_timeout()) # The limit only applies inside the call
+
+    def test_calls_run_on_the_calling_thread(self):
+        policy = CallPolicy(call_timeout=1)
+        self.assertIs(policy.call(threading.current_thread, kind="test-inline"), threading.current_thread())
+
+    @unittest.skipIf(requests is None, "requests is not installed")
+    def test_timeout_is_applied_to_the_http_request(self):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowServer)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            http_compression.install()
+            policy = CallPolicy(call_timeout=0.2)
+            started = time.monotonic()
+            with self.assertRaises(DeadlineExceeded) as caught:
+                policy.call(requests.get, f"http://127.0.0.1:{server.server_address[1]}/crm/v8/Leads",
+                            label="get page", kind="test-http")
+            self.assertLess(time.monotonic() - started, 0.8)
+            self.assertIsInstance(caught.exception.__cause__, requests.exceptions.Timeout)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_run_deadline_stops_new_calls(self):
+        policy = CallPolicy(run_timeout=0.05)
+        self.assertEqual(policy.call(lambda: "ok", kind="test-deadline"), "ok")
+        time.sleep(0.06)
+        with self.assertRaises(DeadlineExceeded):
+            policy.call(lambda: "late", kind="test-deadline")
+
+    def test_hedged_request_wins_over_hung_call(self):
+        tracker = latency_tracker("test-hedge")
+        for _ in range(20):
+            tracker.record(0.01)
+        fn = _SlowOnce(hang=1.0)
+        policy = CallPolicy(hedge=True)
+        started = time.monotonic()
+        self.assertEqual(policy.call(fn, 3, label="page 3", idempotent=True, kind="test-hedge"), "page 3")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual((policy.stats['hedged'], policy.stats['hedge_wins']), (1, 1))
+
+    def test_non_idempotent_calls_are_never_hedged(self):
+        tracker = latency_tracker("test-no-hedge")
+        for _ in range(20):
+            tracker.record(0.01)
+        fn = _SlowOnce(hang=0.2)
+        CallPolicy(hedge=True).call(fn, 1, kind="test-no-hedge")
+        self.assertEqual(fn.calls, 1)
+
+    def test_errors_propagate(self):
+        def fail():
+            raise ValueError("bad request")
+        with self.assertRaises(ValueError):
+            CallPolicy(call_timeout=1).call(fail, kind="test-error")
+
+    def test_hedge_delay_is_p95(self):
+        tracker = LatencyTracker(min_samples=5)
+        self.assertEqual(tracker.hedge_delay(), tracker.default_delay)
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+        self.assertAlmostEqual(tracker.hedge_delay(), 0.096)
+
+
+if __name__ == '__main__':
+    unittest.main()
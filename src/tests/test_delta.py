@@ -0,0 +1,116 @@
+import os
+import json
+import tempfile
+import pathlib
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from zohocrmsdk.src.com.zoho.crm.api.record import Record, ResponseWrapper, Info
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import qualify
+from src.api.leads.delta import DeltaTracker
+
+
+def _lead(lead_id, status="Not Contacted"):
+    return {'id': lead_id, 'name': f"Lead {lead_id}", 'email': 'N/A', 'status': status, 'notes': 'N/A'}
+
+
+class TestDeltaTracker(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.index_path = os.path.join(self._tmp.name, "leads.index.tsv")
+        self.delta_path = os.path.join(self._tmp.name, "leads.delta.jsonl")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _run(self, rows, complete=True):
+        tracker = DeltaTracker(self.index_path, self.delta_path)
+        for row in rows:
+            tracker.observe(row)
+        counts = tracker.close(complete=complete)
+        with open(self.delta_path, encoding="utf-8") as f:
+            changes = [(c['change'], c['id']) for c in map(json.loads, f)]
+        return counts, changes
+
+    def test_first_run_reports_everything_as_added(self):
+        counts, changes = self._run([_lead(1), _lead(2)])
+        self.assertEqual(changes, [("added", 1), ("added", 2)])
+        self.assertEqual(counts['removed'], 0)
+
+    def test_second_run_reports_only_differences(self):
+        self._run([_lead(1), _lead(2), _lead(3)])
+        counts, changes = self._run([_lead(1), _lead(2, status="Contacted"), _lead(4), _lead(4)])
+        self.assertEqual(changes, [("changed", 2), ("added", 4), ("removed", 3)])
+        self.assertEqual(counts['unchanged'], 1)
+
+    def test_ids_are_integers_in_every_change(self):
+        self._run([_lead(1), _lead(2)])
+        _, changes = self._run([_lead("2", status="Contacted"), _lead(3)])
+        self.assertEqual(changes, [("changed", 2), ("added", 3), ("removed", 1)])
+
+    def test_enrichment_lists_do_not_count_as_changes(self):
+        self._run([{**_lead(1), 'related_notes': [{'Note_Title': "Call"}]}])
+        counts, changes = self._run([{**_lead(1), 'related_notes': None}]) # Enrichment failed this time
+        self.assertEqual(changes, [])
+        self.assertEqual(counts['unchanged'], 1)
+
+    def test_incomplete_run_keeps_previous_index(self):
+        self._run([_lead(1), _lead(2)])
+        _, changes = self._run([_lead(1)], complete=False)
+        self.assertEqual(changes, [])
+        _, changes = self._run([_lead(1), _lead(2)])
+        self.assertEqual(changes, [])
+
+    def test_incomplete_run_updates_the_leads_it_saw(self):
+        self._run([_lead(1), _lead(2)])
+        _, changes = self._run([_lead(1, status="Contacted"), _lead(3)], complete=False)
+        self.assertEqual(changes, [("changed", 1), ("added", 3)])
+        _, changes = self._run([_lead(1, status="Contacted"), _lead(3)], complete=False)
+        self.assertEqual(changes, []) # Not reported twice; lead 2 is still in the index
+        _, changes = self._run([_lead(1, status="Contacted"), _lead(3)])
+        self.assertEqual(changes, [("removed", 2)])
+
+
+class _RecordOperations:
+    """Stands in for RecordOperations over a view larger than Zoho's page limit: every page says more_records."""
+
+    def __init__(self, module=None):
+        self.pages = []
+
+    def get_records(self, param_instance, header_instance):
+        page = int(param_instance.request_parameters['page'])
+        self.pages.append(page)
+        if page > 10:
+            raise RuntimeError("Zoho refuses pages past the 2000th record")
+        records = []
+        for lead_id in range((page - 1) * 200 + 1, page * 200 + 1):
+            record = Record()
+            record.set_id(lead_id)
+            record.add_key_value("Last_Name", f"Lead {lead_id}")
+            records.append(record)
+        info = Info()
+        info.set_more_records(True)
+        wrapper = ResponseWrapper()
+        wrapper.set_data(records)
+        wrapper.set_info(info)
+        return SimpleNamespace(get_status_code=lambda: 200, get_object=lambda: wrapper)
+
+
+class TestQualifyDelta(unittest.TestCase):
+    def test_run_ending_on_the_page_limit_is_a_normal_end(self):
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch.object(qualify, "PROJECT_ROOT", pathlib.Path(tmp)):
+            for expected in (2000, 0):
+                ops = _RecordOperations()
+                with mock.patch.object(qualify, "RecordOperations", return_value=ops):
+                    self.assertTrue(qualify.qualify_leads_from_custom_view("42", "leads.jsonl", delta=True))
+                self.assertEqual(ops.pages, list(range(1, 11))) # The page past the limit is never requested
+                with open(os.path.join(tmp, "output", "leads.delta.jsonl"), encoding="utf-8") as f:
+                    self.assertEqual(len(f.readlines()), expected) # Second run: no changes
+
+
+if __name__ == '__main__':
+    unittest.main()
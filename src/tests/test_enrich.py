@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import random
+import tempfile
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from zohocrmsdk.src.com.zoho.crm.api.record import Record
+from zohocrmsdk.src.com.zoho.crm.api.related_records import ResponseWrapper as RelatedResponseWrapper
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import enrich
+from src.api.leads.enrich import RelatedEnricher, RelatedRecordsCache, parse_enrich_kinds
+
+
+class _FakeFetcher:
+    """Returns one related record per call after a random delay, counting calls."""
+
+    def __init__(self, fail_ids=()):
+        self.calls = []
+        self.fail_ids = set(fail_ids)
+        self._lock = threading.Lock()
+
+    def __call__(self, lead_id, kind, per_lead):
+        with self._lock:
+            self.calls.append((lead_id, kind))
+        time.sleep(random.uniform(0, 0.01))
+        if lead_id in self.fail_ids:
+            raise RuntimeError("timeout")
+        return [{'id': f"{kind}-{lead_id}", 'Subject': f"{kind} for {lead_id}"}]
+
+
+class TestRelatedEnricher(unittest.TestCase):
+    def _run(self, enricher, ids):
+        out = []
+        for lead_id in ids:
+            out.extend(enricher.submit({'id': lead_id}))
+        out.extend(enricher.drain())
+        return out
+
+    def test_rows_keep_order_and_get_every_list(self):
+        fetcher = _FakeFetcher()
+        enricher = RelatedEnricher(["notes", "activities"], concurrency=8, window=5, fetcher=fetcher)
+        rows = self._run(enricher, list(range(50)))
+        self.assertEqual([r['id'] for r in rows], list(range(50)))
+        self.assertEqual(rows[3]['related_notes'], [{'id': "notes-3", 'Subject': "notes for 3"}])
+        self.assertEqual(len(fetcher.calls), 100)
+
+    def test_failures_are_null_and_not_cached(self):
+        fetcher = _FakeFetcher(fail_ids={2})
+        enricher = RelatedEnricher(["notes"], fetcher=fetcher)
+        rows = self._run(enricher, [1, 2, 3])
+        self.assertIsNone(rows[1]['related_notes'])
+        self.assertEqual(enricher.stats, {'fetched': 2, 'cached': 0, 'errors': 1})
+        self.assertIsNone(enricher.cache.get("notes", 2))
+
+    def test_persistent_cache_is_reused_within_ttl(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.jsonl")
+            first = _FakeFetcher()
+            self._run(RelatedEnricher(["notes"], cache=RelatedRecordsCache(path, ttl=60), fetcher=first), [1, 2])
+            second = _FakeFetcher()
+            enricher = RelatedEnricher(["notes"], cache=RelatedRecordsCache(path, ttl=60), fetcher=second)
+            rows = self._run(enricher, [1, 2, 3])
+        self.assertEqual(second.calls, [(3, "notes")])
+        self.assertEqual(rows[0]['related_notes'], [{'id': "notes-1", 'Subject': "notes for 1"}])
+
+    def test_persistent_cache_drops_expired_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.jsonl")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({'kind': "notes", 'id': "1", 'at': time.time() - 3600, 'items': []}) + "\n")
+                f.write(json.dumps({'kind': "notes", 'id': "2", 'at': time.time(), 'items': []}) + "\n")
+            self._run(RelatedEnricher(["notes"], cache=RelatedRecordsCache(path, ttl=60), fetcher=_FakeFetcher()), [1, 3])
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(sorted(json.loads(line)['id'] for line in f), ["1", "2", "3"])
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({'kind': "notes", 'id': "4", 'at': time.time() - 3600, 'items': []}) + "\n")
+            RelatedRecordsCache(path, ttl=60).close()
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(len(f.readlines()), 3) # Expired line 4 dropped, nothing duplicated
+
+    def test_parse_enrich_kinds(self):
+        self.assertEqual(parse_enrich_kinds("Notes, activities,notes"), ["notes", "activities"])
+        self.assertEqual(parse_enrich_kinds(None), [])
+        with self.assertRaises(ValueError):
+            parse_enrich_kinds("notes,emails")
+
+
+class _RelatedRecordsOperations:
+    """Stands in for RelatedRecordsOperations: answers with the given records, keeping the request parameters."""
+
+    def __init__(self, records):
+        self.records = records
+        self.params = None
+
+    def __call__(self, related_list, module):
+        return self
+
+    def get_related_records(self, lead_id, param_instance, header_instance):
+        self.params = param_instance.request_parameters
+        wrapper = RelatedResponseWrapper()
+        wrapper.set_data(self.records)
+        return SimpleNamespace(get_status_code=lambda: 200, get_object=lambda: wrapper)
+
+
+def _record(record_id, **values):
+    record = Record()
+    record.set_id(record_id)
+    for field, value in values.items():
+        record.add_key_value(field, value)
+    return record
+
+
+class TestFetchRelated(unittest.TestCase):
+    def test_notes_are_requested_newest_first(self):
+        ops = _RelatedRecordsOperations([_record(1, Note_Title="Latest"), _record(2, Note_Title="Older")])
+        with mock.patch.object(enrich, "RelatedRecordsOperations", ops):
+            notes = enrich.fetch_related("1649349000440877054", "notes", per_lead=2)
+        self.assertEqual(ops.params['sort_by'], "Created_Time")
+        self.assertEqual(ops.params['sort_order'], "desc")
+        self.assertEqual(ops.params['per_page'], "2")
+        self.assertEqual([n['Note_Title'] for n in notes], ["Latest", "Older"])
+
+    def test_only_open_activities_are_kept(self):
+        statuses = ["Completed", "Not Started", "Closed", "In Progress", None, "Deferred"]
+        ops = _RelatedRecordsOperations([_record(i, Subject=f"Task {i}", Status=status)
+                                         for i, status in enumerate(statuses)])
+        with mock.patch.object(enrich, "RelatedRecordsOperations", ops):
+            activities = enrich.fetch_related("1649349000440877054", "activities", per_lead=3)
+        self.assertEqual(ops.params['per_page'], str(enrich.EXCLUDE_FETCH_PAGE)) # Room left after filtering
+        self.assertNotIn('sort_by', ops.params)
+        self.assertEqual([a['id'] for a in activities], [1, 3, 4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import json
+import datetime
+import tempfile
+import unittest
+from unittest import mock
+
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import export, fetch
+
+
+class TestShardPlanning(unittest.TestCase):
+    def test_page_shards_cover_every_page_once(self):
+        shards = export.plan_page_shards("123", total_pages=10, pages_per_shard=3)
+        self.assertEqual([(s['first_page'], s['last_page']) for s in shards], [(1, 3), (4, 6), (7, 9), (10, 10)])
+        self.assertEqual([s['index'] for s in shards], [0, 1, 2, 3])
+
+    def test_page_shards_stop_at_the_page_limit(self):
+        self.assertEqual(len(export.plan_page_shards("123", total_pages=10, pages_per_shard=1, per_page=200)), 10)
+        with self.assertRaises(ValueError):
+            export.plan_page_shards("123", total_pages=11, pages_per_shard=1, per_page=200)
+
+    def test_created_shards_are_half_open_windows(self):
+        since = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+        until = since + datetime.timedelta(hours=30)
+        shards = export.plan_created_shards(since, until, window_hours=24, base_criteria="(Lead_Status:equals:New)")
+        self.assertEqual(len(shards), 2)
+        self.assertIn("Created_Time:greater_equal:2025-01-01T00:00:00+00:00", shards[0]['criteria'])
+        self.assertIn("Created_Time:less_than:2025-01-02T00:00:00+00:00", shards[0]['criteria'])
+        self.assertIn("Created_Time:greater_equal:2025-01-02T00:00:00+00:00", shards[1]['criteria'])
+        self.assertTrue(shards[1]['criteria'].endswith("and(Lead_Status:equals:New))"))
+
+
+class TestShardRecords(unittest.TestCase):
+    def test_full_created_window_fails_instead_of_truncating(self):
+        shard = export.plan_created_shards(datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc),
+                                           datetime.datetime(2025, 1, 2, tzinfo=datetime.timezone.utc),
+                                           window_hours=24, per_page=200)[0]
+        full_page = lambda ops, criteria, page, per_page: ([object()] * per_page, True)
+        with mock.patch.object(export, "search_page", side_effect=full_page):
+            records = export._iter_shard_records(None, shard, heartbeat=lambda: None)
+            with self.assertRaises(fetch.PageFetchError):
+                list(records)
+
+    def test_sdk_errors_become_page_fetch_errors(self):
+        ops = mock.Mock()
+        ops.get_records.side_effect = SDKException("connection reset")
+        with self.assertRaises(fetch.PageFetchError):
+            fetch.fetch_view_page(ops, "123", 1)
+
+
+class TestWorkDirectory(unittest.TestCase):
+    def setUp(self):
+        patch = mock.patch.object(export, "CLAIM_SETTLE", 0)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+    def test_claims_are_exclusive_until_stale(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            self.assertTrue(export._try_claim(work_dir, 0, claim_timeout=60))
+            self.assertFalse(export._try_claim(work_dir, 0, claim_timeout=60))
+            self.assertTrue(export._try_claim(work_dir, 0, claim_timeout=0))
+
+    def test_only_the_last_stale_claim_takeover_wins(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            export._try_claim(work_dir, 0, claim_timeout=60)
+            claim = export._claim_path(work_dir, 0)
+
+            def other_worker_takes_over(seconds):
+                with open(claim, "w", encoding="utf-8") as f:
+                    f.write("other-host:1:deadbeef\n")
+
+            with mock.patch.object(export.time, "sleep", side_effect=other_worker_takes_over):
+                self.assertIsNone(export._try_claim(work_dir, 0, claim_timeout=0))
+            self.assertEqual(export._claim_owner(claim), "other-host:1:deadbeef")
+
+    def test_shard_stops_when_its_claim_is_taken_over(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            shard = export.plan_page_shards("123", total_pages=3, pages_per_shard=3)[0]
+            claim = export._claim_path(work_dir, 0)
+
+            def page(ops, cv_id, page, per_page):
+                if page == 2: # Another worker decided this shard was stale
+                    with open(claim, "w", encoding="utf-8") as f:
+                        f.write("other-host:1:deadbeef\n")
+                return [{'id': page}], True
+
+            with mock.patch.object(export, "RecordOperations"), \
+                    mock.patch.object(export, "fetch_view_page", side_effect=page), \
+                    mock.patch.object(export, "lead_to_row", side_effect=lambda record: record):
+                self.assertIsNone(export.run_shard(work_dir, shard))
+            self.assertFalse(os.path.exists(export._part_path(work_dir, 0)))
+            self.assertEqual(export._claim_owner(claim), "other-host:1:deadbeef") # Left for the new owner
+
+    def test_merge_keeps_shard_order(self):
+        with tempfile.TemporaryDirectory() as work_dir:
+            export.write_plan(work_dir, export.plan_page_shards("123", total_pages=2, pages_per_shard=1))
+            for index, ids in ((0, [1, 2]), (1, [3])):
+                with open(export._part_path(work_dir, index), "w", encoding="utf-8") as f:
+                    for lead_id in ids:
+                        f.write(json.dumps({'id': lead_id, 'name': 'N/A'}) + "\n")
+            output_path = os.path.join(work_dir, "merged.jsonl")
+            self.assertEqual(export.merge_parts(work_dir, output_path), 3)
+            with open(output_path, encoding="utf-8") as f:
+                self.assertEqual([json.loads(line)['id'] for line in f], [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
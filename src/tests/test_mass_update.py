@@ -0,0 +1,141 @@
+import threading
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import mass_update
+
+
+class _Record:
+    def __init__(self):
+        self.values = {}
+
+    def add_key_value(self, field, value):
+        self.values[field] = value
+
+
+class _Body:
+    def __init__(self):
+        self.data, self.cvid, self.ids = None, None, None
+
+    def set_data(self, data):
+        self.data = data
+
+    def set_cvid(self, cvid):
+        self.cvid = cvid
+
+    def set_ids(self, ids):
+        self.ids = ids
+
+
+class _ParameterMap(dict):
+    def add(self, param, value):
+        self[param] = value
+
+
+class _ActionWrapper:
+    def __init__(self, data):
+        self._data = data
+
+    def get_data(self):
+        return self._data
+
+
+class _Success:
+    def __init__(self, job_id):
+        self._job_id = job_id
+
+    def get_details(self):
+        return {"job_id": self._job_id}
+
+
+class _StatusWrapper(_ActionWrapper):
+    pass
+
+
+class _Job:
+    def __init__(self, status, total):
+        self._status, self._total = status, total
+
+    def get_status(self):
+        return SimpleNamespace(get_value=lambda: self._status)
+
+    def get_total_count(self):
+        return self._total
+
+    def get_updated_count(self):
+        return self._total if self._status == "COMPLETED" else 0
+
+    def get_not_updated_count(self):
+        return 0
+
+    def get_failed_count(self):
+        return 0
+
+
+class _RecordOperations:
+    """Stands in for RecordOperations: jobs report SCHEDULED once, then COMPLETED."""
+
+    def __init__(self, module=None):
+        self.bodies = []
+        self.polls = []
+        self._lock = threading.Lock()
+
+    def mass_update_records(self, request):
+        with self._lock:
+            self.bodies.append(request)
+            job_id = str(len(self.bodies))
+        return SimpleNamespace(get_object=lambda: _ActionWrapper([_Success(job_id)]))
+
+    def get_mass_update_status(self, param_instance):
+        job_id = param_instance["job_id"]
+        with self._lock:
+            self.polls.append(job_id)
+            status = "COMPLETED" if self.polls.count(job_id) > 1 else "SCHEDULED"
+        body = self.bodies[int(job_id) - 1]
+        job = _Job(status, len(body.ids) if body.ids else 10)
+        return SimpleNamespace(get_object=lambda: _StatusWrapper([job]))
+
+
+class TestMassUpdate(unittest.TestCase):
+    def setUp(self):
+        self.ops = _RecordOperations()
+        patches = [
+            mock.patch.object(mass_update, "RecordOperations", return_value=self.ops),
+            mock.patch.object(mass_update, "Record", _Record),
+            mock.patch.object(mass_update, "MassUpdateBodyWrapper", _Body),
+            mock.patch.object(mass_update, "ParameterMap", _ParameterMap),
+            mock.patch.object(mass_update, "GetMassUpdateStatusParam", SimpleNamespace(job_id="job_id")),
+            mock.patch.object(mass_update, "MassUpdateActionWrapper", _ActionWrapper),
+            mock.patch.object(mass_update, "MassUpdateSuccessResponse", _Success),
+            mock.patch.object(mass_update, "MassUpdateResponseWrapper", _StatusWrapper),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_ids_are_split_into_jobs_and_polled_until_complete(self):
+        ok = mass_update.mass_update_leads({"Lead_Status": "Contacted"}, ids=[1, 2, 3, 4, 5],
+                                           chunk_size=2, poll_interval=0)
+        self.assertTrue(ok)
+        self.assertEqual(sorted(tuple(b.ids) for b in self.ops.bodies), [(1, 2), (3, 4), (5,)])
+        self.assertTrue(all(b.cvid is None and b.data[0].values == {"Lead_Status": "Contacted"} for b in self.ops.bodies))
+        self.assertEqual(sorted(self.ops.polls), ["1", "1", "2", "2", "3", "3"])
+
+    def test_custom_view_is_one_job(self):
+        self.assertTrue(mass_update.mass_update_leads({"Lead_Status": "Contacted"}, cvid="123", poll_interval=0))
+        self.assertEqual([(b.cvid, b.ids) for b in self.ops.bodies], [("123", None)])
+
+    def test_sdk_errors_fail_the_job(self):
+        with mock.patch.object(self.ops, "get_mass_update_status", side_effect=SDKException("connection reset")):
+            with self.assertRaises(mass_update.MassUpdateError):
+                mass_update.get_mass_update_status(self.ops, "1")
+        with mock.patch.object(self.ops, "mass_update_records", side_effect=SDKException("connection reset")):
+            self.assertFalse(mass_update.mass_update_leads({"Lead_Status": "Contacted"}, cvid="123", poll_interval=0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import mirror as mirror_module
+from src.api.leads.mirror import LeadMirror, sync_mirror_from_custom_view
+from src.api.leads.notifications import (
+    NotificationApplier, NotificationReceiver, replay_notifications, RECEIVER_PATH
+)
+
+TOKEN = "test-token"
+
+# Recorded callbacks, in the shape Zoho POSTs them
+RECORDED_CALLBACKS = [
+    {"module": "Leads", "operation": "insert", "ids": ["1", "2"], "channel_id": "100", "token": TOKEN},
+    {"module": "Leads", "operation": "update", "ids": ["1"], "channel_id": "100", "token": TOKEN,
+     "affected_fields": [{"1": ["Lead_Status"]}],
+     "affected_values": [{"record_id": "1", "values": {"Lead_Status": "Contacted"}}]},
+    {"module": "Leads", "operation": "delete", "ids": ["2"], "channel_id": "100", "token": TOKEN},
+    {"module": "Contacts", "operation": "insert", "ids": ["9"], "channel_id": "100", "token": TOKEN},
+    {"module": "Leads", "operation": "insert", "ids": ["3"], "channel_id": "100", "token": "wrong"},
+]
+
+
+def _fake_fetcher(ids):
+    """Stands in for get_records by ids."""
+    return [{"id": i, "First_Name": "Lead", "Last_Name": i, "Lead_Status": "Not Contacted"} for i in ids]
+
+
+class TestNotificationReplay(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.mirror = LeadMirror(os.path.join(self._tmp.name, "mirror.sqlite3"))
+        self.receiver = NotificationReceiver(NotificationApplier(self.mirror, fetcher=_fake_fetcher),
+                                             token=TOKEN, port=0)
+        self.receiver.start()
+        threading.Thread(target=self.receiver._httpd.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.receiver._httpd.shutdown()
+        self.receiver.shutdown()
+        self.mirror.close()
+        self._tmp.cleanup()
+
+    def test_replayed_callbacks_update_the_mirror(self):
+        recording = os.path.join(self._tmp.name, "callbacks.jsonl")
+        with open(recording, "w", encoding="utf-8") as f:
+            for payload in RECORDED_CALLBACKS:
+                f.write(json.dumps(payload) + "\n")
+
+        url = f"http://{self.receiver.host}:{self.receiver.port}{RECEIVER_PATH}"
+        sent, failed = replay_notifications(recording, url)
+
+        self.assertEqual((sent, failed), (4, 1)) # Wrong token is rejected with 403
+        self.assertEqual(self.mirror.count(), 1)
+        self.assertEqual(self.mirror.get("1")["Lead_Status"], "Contacted")
+        self.assertEqual(self.mirror.get("1")["First_Name"], "Lead")
+        self.assertIsNone(self.mirror.get("2"))
+        self.assertEqual(self.receiver.applier.counts, {'upserted': 2, 'merged': 1, 'deleted': 1, 'ignored': 1})
+        self.assertEqual([row['status'] for row in self.mirror.iter_rows()], ["Contacted"])
+
+    def test_failed_apply_is_not_acknowledged(self):
+        def failing_fetcher(ids):
+            raise RuntimeError("get_records failed")
+        self.receiver.applier.fetcher = failing_fetcher
+        status = self.receiver.accept({"module": "Leads", "operation": "insert", "ids": ["5"], "token": TOKEN})
+        self.assertEqual(status, 500)
+        self.assertEqual((self.receiver.received, self.receiver.failed), (0, 1))
+        self.assertIsNone(self.mirror.get("5"))
+
+
+class TestMirrorSync(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.mirror = LeadMirror(os.path.join(self._tmp.name, "mirror.sqlite3"))
+
+    def tearDown(self):
+        self.mirror.close()
+        self._tmp.cleanup()
+
+    def _sync(self, pages):
+        """Syncs from fake view pages: a list of id lists, one per page."""
+        def fake_page(ops, cv_id, page):
+            return [{"id": i, "Lead_Status": "New"} for i in pages[page - 1]], page < len(pages)
+        with mock.patch.object(mirror_module, "RecordOperations"), \
+                mock.patch.object(mirror_module, "fetch_view_page", side_effect=fake_page), \
+                mock.patch.object(mirror_module, "record_to_fields", side_effect=dict):
+            return sync_mirror_from_custom_view(self.mirror, "123")
+
+    def test_sync_removes_leads_that_left_the_view(self):
+        self._sync([["1", "2"], ["3"]])
+        self.assertEqual(self._sync([["1"], ["3"]]), 2)
+        self.assertEqual([row['id'] for row in self.mirror.iter_rows()], ["1", "3"])
+
+    def test_sync_stops_at_the_page_limit_without_removing(self):
+        self._sync([["old"]])
+        self.assertEqual(self._sync([[str(p)] for p in range(12)]), 10)
+        self.assertIsNotNone(self.mirror.get("old"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+# The real SDK module, so a symbol that does not exist in it fails here
+from zohocrmsdk.src.com.zoho.crm.api.record import RecordOperations, RecordCountParam
+from zohocrmsdk.src.com.zoho.crm.api.exception import SDKException
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import search
+from src.api.leads.search import build_criteria, parse_condition
+
+
+class TestCriteriaBuilding(unittest.TestCase):
+    def test_zoho_syntax_and_shorthand(self):
+        self.assertEqual(parse_condition("Lead_Status:equals:Not Contacted"), "(Lead_Status:equals:Not Contacted)")
+        self.assertEqual(parse_condition("Lead_Status=Not Contacted"), "(Lead_Status:equals:Not Contacted)")
+        self.assertEqual(parse_condition("Email^=info@"), "(Email:starts_with:info@)")
+        self.assertEqual(parse_condition("Created_Time>=2025-01-01T00:00:00+00:00"),
+                         "(Created_Time:greater_equal:2025-01-01T00:00:00+00:00)")
+
+    def test_shorthand_splits_at_the_earliest_operator(self):
+        self.assertEqual(parse_condition("Description=a<b"), "(Description:equals:a<b)")
+        self.assertEqual(parse_condition("Score>=10=x"), "(Score:greater_equal:10=x)")
+        self.assertEqual(parse_condition("Email!=a^=b"), "(Email:not_equal:a^=b)")
+
+    def test_values_are_escaped_except_list_separators(self):
+        self.assertEqual(parse_condition("Company=Acme (UK), Ltd"), "(Company:equals:Acme \\(UK\\)\\, Ltd)")
+        self.assertEqual(parse_condition("Lead_Status:in:New, Contacted"), "(Lead_Status:in:New,Contacted)")
+
+    def test_conditions_are_combined(self):
+        self.assertEqual(build_criteria(["Lead_Status=New"]), "(Lead_Status:equals:New)")
+        self.assertEqual(build_criteria(["Lead_Status=New", "Email^=info"], match="or"),
+                         "((Lead_Status:equals:New)or(Email:starts_with:info))")
+
+    def test_invalid_conditions_are_rejected(self):
+        with self.assertRaises(ValueError):
+            parse_condition("Lead_Status")
+        with self.assertRaises(ValueError):
+            build_criteria([])
+
+
+class TestSearchPages(unittest.TestCase):
+    def _pages(self, total, per_page=200, concurrency=4, count=True):
+        """Runs iter_search_pages against `total` fake matches; returns (pages requested, last more_records)."""
+        requested = []
+
+        def fake_page(ops, criteria, page, per_page):
+            requested.append(page)
+            first = (page - 1) * per_page
+            return list(range(first, min(first + per_page, total))), first + per_page < total
+
+        with mock.patch.object(search, "RecordOperations"), \
+                mock.patch.object(search, "search_page", side_effect=fake_page), \
+                mock.patch.object(search, "count_matches", return_value=total if count else None):
+            results = list(search.iter_search_pages("(Lead_Status:equals:New)", per_page, concurrency))
+        return sorted(requested), results[-1][1], sum(len(records) for records, _ in results)
+
+    def test_only_pages_holding_matches_are_requested(self):
+        self.assertEqual(self._pages(450), ([1, 2, 3], False, 450))
+        self.assertEqual(self._pages(150), ([1], False, 150))
+        self.assertEqual(self._pages(450, count=False), ([1, 2, 3], False, 450))
+
+    def test_page_limit_is_reported(self):
+        requested, truncated, rows = self._pages(2500)
+        self.assertEqual(requested, list(range(1, 11)))
+        self.assertTrue(truncated)
+        self.assertEqual(rows, 2000)
+
+
+class TestCountMatches(unittest.TestCase):
+    def test_count_uses_the_sdk_record_count(self):
+        ops = mock.create_autospec(RecordOperations, instance=True) # Unknown methods raise AttributeError
+        ops.record_count.return_value.get_object.return_value.get_count.return_value = 450
+        self.assertEqual(search.count_matches(ops, "(Lead_Status:equals:New)"), 450)
+        param_instance = ops.record_count.call_args.args[0]
+        self.assertEqual(param_instance.request_parameters, {RecordCountParam.criteria.name: "(Lead_Status:equals:New)"})
+
+    def test_count_errors_fall_back_to_none(self):
+        ops = mock.create_autospec(RecordOperations, instance=True)
+        ops.record_count.side_effect = SDKException(message="connection reset")
+        self.assertIsNone(search.count_matches(ops, "(Lead_Status:equals:New)"))
+
+
+if __name__ == '__main__':
+    unittest.main()
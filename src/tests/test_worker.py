@@ -0,0 +1,66 @@
+import unittest
+
+# The worker module is standard-library only, so it can be tested without the SDK
+from src.core import worker
+
+
+def _fake_runner(argv):
+    """Stands in for cli.main: echoes its arguments and fails on 'fail'."""
+    print(f"ran {' '.join(argv)}")
+    if argv[0] == "fail":
+        return 1
+    if argv[0] == "boom":
+        raise RuntimeError("boom")
+    if argv[0] == "usage":
+        import argparse
+        argparse.ArgumentParser(prog="cli.py").parse_args(["--unknown"])
+    if argv[0] == "exit":
+        raise SystemExit(None if len(argv) == 1 else argv[1])
+    return 0
+
+
+class TestWorkerServer(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = worker.JobServer(runner=_fake_runner, port=0, workers=2, queue_size=10)
+        cls.server.start()
+        import threading
+        cls.thread = threading.Thread(target=cls.server._httpd.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://{cls.server.host}:{cls.server.port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server._httpd.shutdown()
+        cls.server.shutdown()
+
+    def test_job_output_is_returned_to_client(self):
+        job = worker.submit_job(["qualify", "--cvid", "123"], url=self.url, timeout=10)
+        self.assertEqual(job['status'], "succeeded")
+        self.assertEqual(job['exit_code'], 0)
+        self.assertEqual(job['output'], "ran qualify --cvid 123\n")
+
+    def test_failed_and_crashing_jobs(self):
+        self.assertEqual(worker.submit_job(["fail"], url=self.url, timeout=10)['status'], "failed")
+        crashed = worker.submit_job(["boom"], url=self.url, timeout=10)
+        self.assertEqual(crashed['exit_code'], 1)
+        self.assertEqual(crashed['error'], "boom")
+
+    def test_server_commands_are_rejected(self):
+        for argv in (["serve"], ["mirror", "--db", "m.sqlite3", "serve"], ["export", "--pages", "10"]):
+            with self.subTest(argv=argv), self.assertRaises(RuntimeError):
+                worker.submit_job(argv, url=self.url, timeout=10)
+        self.assertEqual(worker.submit_job(["mirror", "query"], url=self.url, timeout=10)['status'], "succeeded")
+
+    def test_usage_errors_are_captured(self):
+        job = worker.submit_job(["usage"], url=self.url, timeout=10)
+        self.assertEqual(job['exit_code'], 2)
+        self.assertIn("unrecognized arguments: --unknown", job['output'])
+
+    def test_sys_exit_codes_match_the_interpreter(self):
+        self.assertEqual(worker.submit_job(["exit"], url=self.url, timeout=10)['exit_code'], 0)
+        self.assertEqual(worker.submit_job(["exit", "fatal: bad config"], url=self.url, timeout=10)['exit_code'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+# Importing the leads package runs SDK initialization (see test_init.py)
+from src.api.leads import write_behind
+from src.api.leads.write_behind import LeadUpdateQueue, JournalLockedError
+
+
+class _FakeSender:
+    """Records batches instead of calling update_records."""
+
+    def __init__(self, fail_calls=0, reject=()):
+        self.batches = []
+        self.fail_calls = fail_calls
+        self.reject = set(reject)
+
+    def __call__(self, batch):
+        if self.fail_calls:
+            self.fail_calls -= 1
+            raise RuntimeError("network down")
+        self.batches.append(batch)
+        return {lead_id: ("INVALID_DATA" if lead_id in self.reject else None) for lead_id in batch}
+
+
+class TestLeadUpdateQueue(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self._tmp.name, "queue.journal.jsonl")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_updates_coalesce_per_lead_and_field(self):
+        sender = _FakeSender()
+        with LeadUpdateQueue(self.journal, sender=sender, fsync=False) as q:
+            q.enqueue(1, {"Mobile": "111"})
+            q.enqueue(1, {"Mobile": "222", "Lead_Status": "Contacted"})
+            q.enqueue(2, {"Mobile": "333"})
+        self.assertEqual(sender.batches, [{"1": {"Mobile": "222", "Lead_Status": "Contacted"}, "2": {"Mobile": "333"}}])
+
+    def test_batches_respect_batch_size(self):
+        sender = _FakeSender()
+        with LeadUpdateQueue(self.journal, batch_size=2, sender=sender, fsync=False) as q:
+            for lead_id in range(1, 6):
+                q.enqueue(lead_id, {"Mobile": str(lead_id)})
+        self.assertEqual([len(b) for b in sender.batches], [2, 2, 1])
+
+    def test_journal_survives_a_crash(self):
+        crashed = LeadUpdateQueue(self.journal, sender=_FakeSender(), fsync=False)
+        crashed.enqueue(7, {"Mobile": "777"})
+        crashed.enqueue(7, {"Lead_Status": "Contacted"})
+        crashed._journal.close() # Simulate dying without flushing; the OS drops the lock
+        write_behind._unlock_journal(crashed._journal_lock)
+
+        sender = _FakeSender()
+        with LeadUpdateQueue(self.journal, sender=sender, fsync=False) as q:
+            self.assertEqual(q.pending_count(), 1)
+        self.assertEqual(sender.batches, [{"7": {"Mobile": "777", "Lead_Status": "Contacted"}}])
+        self.assertEqual(os.path.getsize(self.journal), 0)
+
+    def test_failed_calls_are_retried_and_rejections_recorded(self):
+        sender = _FakeSender(fail_calls=1, reject={"2"})
+        q = LeadUpdateQueue(self.journal, sender=sender, fsync=False)
+        q.enqueue(1, {"Mobile": "111"})
+        q.enqueue(2, {"Mobile": "222"})
+        self.assertFalse(q.flush())
+        q.enqueue(1, {"Mobile": "999"})
+        self.assertTrue(q.close())
+        self.assertEqual(sender.batches, [{"1": {"Mobile": "999"}, "2": {"Mobile": "222"}}])
+        self.assertEqual(q.stats['failed'], 1)
+        self.assertTrue(os.path.exists(q.failed_path))
+
+    def test_journal_has_a_single_owner(self):
+        owner = LeadUpdateQueue(self.journal, sender=_FakeSender(), fsync=False)
+        with self.assertRaises(JournalLockedError):
+            LeadUpdateQueue(self.journal, sender=_FakeSender(), fsync=False)
+        owner.close()
+        LeadUpdateQueue(self.journal, sender=_FakeSender(), fsync=False).close()
+
+    def test_process_wide_queue_rejects_other_settings(self):
+        try:
+            shared = write_behind.get_update_queue(journal_path=self.journal, sender=_FakeSender(), fsync=False)
+            self.assertIs(write_behind.existing_update_queue(self.journal), shared)
+            with self.assertRaises(ValueError):
+                write_behind.get_update_queue(journal_path=os.path.join(self._tmp.name, "other.jsonl"))
+        finally:
+            write_behind.close_update_queue()
+        self.assertIsNone(write_behind.existing_update_queue(self.journal))
+
+
+if __name__ == '__main__':
+    unittest.main()